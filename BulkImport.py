@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+from MultiLaneMonitor import MATCH_JMENO
+from SetaCore import API_URL, LOG_DIR, fault_handler, parsuj_tch_soubor, prihlaseni_ze_souboru
+from ShotFingerprints import klic_strely, otisk_strely
+from ShotScoring import skore
+from ShotStore import ShotStore
+
+# Hromadný import archivovaných .tch souborů (soubory se nemažou):
+#
+#   python -m BulkImport ARCHIV [--user-id ID] [--store seta-web/data/shots] [--procesy 4]
+#
+# Soubory se parsují paralelně v procesech, rány se buď nahrají po dávkách
+# na /api/shots, nebo zapíšou přímo do sloupcového úložiště (ShotStore).
+# Hotové soubory se zapisují do stavového souboru, takže přerušený import
+# pokračuje tam, kde skončil.
+
+STAV_SOUBOR = os.path.join(LOG_DIR, 'bulk_import.jsonl')
+RACE_SOUBOR = 'race.shots'  # Stejné jméno jako v seta-web/src/lib/shotIngest.ts
+
+
+def race_id_souboru(data):
+    """Stabilní ID závodu odvozené z obsahu souboru."""
+    return f"import_{hashlib.blake2b(data, digest_size=8).hexdigest()}"
+
+
+def najdi_soubory(koren):
+    """Projde strom adresářů a vrátí seřazené cesty k .tch souborům."""
+    soubory = []
+    for adresar, _, jmena in os.walk(koren):
+        soubory.extend(os.path.join(adresar, jmeno) for jmeno in jmena if jmeno.lower().endswith('.tch'))
+    return sorted(soubory)
+
+
+def klic_souboru(cesta):
+    """Klíč hotového souboru ve stavu importu - změněný soubor se importuje znovu."""
+    stat = os.stat(cesta)
+    return f"{os.path.abspath(cesta)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def inicializuj_proces(fronta):
+    """Chyby procesů poolu zapisuje rodič, do rotovaného logu tak píše jen jeden proces."""
+    fault_handler.do_fronty(fronta)
+
+
+def zpracuj_soubor(cesta):
+    """Načte a rozparsuje jeden soubor (běží v procesu poolu)."""
+    start = time.perf_counter()
+    try:
+        with open(cesta, 'rb') as file:
+            data = file.read()
+        race_id = race_id_souboru(data)
+        strely = parsuj_tch_soubor(cesta) or []
+    except OSError as e:
+        return {'cesta': cesta, 'chyba': str(e)}
+    # index z parseru počítá i vadné záznamy, takže sedí s živým odesíláním
+    for strela in strely:
+        strela['id'] = klic_strely(otisk_strely(race_id, strela))
+        strela['score'] = skore(strela['x'], strela['y'])
+    return {
+        'cesta': cesta,
+        'race_id': race_id,
+        'strely': strely,
+        'velikost': len(data),
+        'cas_parsovani': time.perf_counter() - start,
+    }
+
+
+class BulkImport:
+    """Řídí import: rozdělí soubory do poolu procesů a výsledky nahraje nebo uloží."""
+
+    def __init__(self, user_id=None, uploader=None, store_adresar=None, stav_soubor=STAV_SOUBOR,
+                 procesy=None, davka=500):
+        self.user_id = user_id
+        self.uploader = uploader
+        self.store_adresar = store_adresar
+        self.stav_soubor = stav_soubor
+        self.procesy = procesy or os.cpu_count() or 1
+        self.davka = davka
+        self.hotove = self._nacti_stav()
+        self.zavody = set()  # race_id importované v tomto běhu (stejný soubor na více místech)
+        self.statistiky = {'soubory': 0, 'preskoceno': 0, 'chyby': 0, 'rany': 0, 'bajty': 0}
+
+    def _nacti_stav(self):
+        hotove = set()
+        if self.stav_soubor and os.path.exists(self.stav_soubor):
+            with open(self.stav_soubor, 'r', encoding='utf-8') as file:
+                for radek in file:
+                    try:
+                        hotove.add(json.loads(radek)['klic'])
+                    except (ValueError, KeyError):
+                        continue  # Neúplný poslední řádek po přerušení
+        return hotove
+
+    def _zapis_stav(self, klic, vysledek, stav):
+        if not self.stav_soubor:
+            return
+        self.hotove.add(klic)
+        with open(self.stav_soubor, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({'klic': klic, 'race_id': vysledek.get('race_id'),
+                                   'rany': len(vysledek.get('strely', ())), 'stav': stav}) + '\n')
+
+    def user_id_souboru(self, cesta):
+        if self.user_id:
+            return self.user_id
+        shoda = MATCH_JMENO.match(os.path.basename(cesta))
+        return shoda.group(1) if shoda else None
+
+    def spust(self, soubory):
+        """Importuje soubory a vrátí statistiky běhu."""
+        cekajici = []
+        for cesta in soubory:
+            try:
+                klic = klic_souboru(cesta)
+            except OSError as e:
+                logging.error(f"Soubor nelze přečíst: {cesta}: {e}")
+                self.statistiky['chyby'] += 1
+                continue
+            if klic in self.hotove:
+                self.statistiky['preskoceno'] += 1
+            else:
+                cekajici.append((cesta, klic))
+        logging.info(f"Souborů k importu: {len(cekajici)}, již hotových: {self.statistiky['preskoceno']}")
+        if not cekajici:
+            return self.statistiky
+
+        klice = dict(cekajici)
+        start = time.perf_counter()
+        fronta_chyb = multiprocessing.Queue()
+        listener = fault_handler.prijimej(fronta_chyb)
+        try:
+            with multiprocessing.Pool(min(self.procesy, len(cekajici)), inicializuj_proces,
+                                      (fronta_chyb,)) as pool:
+                vysledky = pool.imap_unordered(zpracuj_soubor, [cesta for cesta, _ in cekajici], chunksize=4)
+                for poradi, vysledek in enumerate(vysledky, 1):
+                    self._zpracuj_vysledek(vysledek, klice[vysledek['cesta']])
+                    uplynulo = time.perf_counter() - start
+                    logging.info(
+                        f"[{poradi}/{len(cekajici)}] {vysledek['cesta']}: {len(vysledek.get('strely', ()))} ran, "
+                        f"{self.statistiky['soubory'] / uplynulo:.1f} souborů/s, "
+                        f"{self.statistiky['rany'] / uplynulo:.0f} ran/s, "
+                        f"{self.statistiky['bajty'] / uplynulo / 1e6:.2f} MB/s")
+                # Řádné ukončení procesů, aby stihly do fronty dopsat chyby
+                pool.close()
+                pool.join()
+        finally:
+            listener.stop()
+        self.statistiky['cas'] = time.perf_counter() - start
+        return self.statistiky
+
+    def _zpracuj_vysledek(self, vysledek, klic):
+        cesta = vysledek['cesta']
+        if 'chyba' in vysledek:
+            logging.error(f"Chyba při čtení {cesta}: {vysledek['chyba']}")
+            self.statistiky['chyby'] += 1
+            return  # Bez záznamu ve stavu, příště se zkusí znovu
+        if not vysledek['strely']:
+            self._zapis_stav(klic, vysledek, 'prazdny')  # Neplatný soubor se nezmění
+            return
+        user_id = self.user_id_souboru(cesta)
+        if not user_id:
+            logging.error(f"Neznámý uživatel pro {cesta} (jméno není Match_<id>.tch, chybí --user-id)")
+            self.statistiky['chyby'] += 1
+            return
+        if vysledek['race_id'] in self.zavody:
+            self.statistiky['preskoceno'] += 1
+            self._zapis_stav(klic, vysledek, 'duplicita')
+            return
+
+        try:
+            if self.store_adresar:
+                self._uloz(user_id, vysledek)
+            else:
+                self._nahraj(user_id, vysledek)
+        except Exception as e:
+            logging.error(f"Import {cesta} selhal: {e}")
+            self.statistiky['chyby'] += 1
+            return
+        self.zavody.add(vysledek['race_id'])
+        self.statistiky['soubory'] += 1
+        self.statistiky['rany'] += len(vysledek['strely'])
+        self.statistiky['bajty'] += vysledek['velikost']
+        self._zapis_stav(klic, vysledek, 'ok')
+
+    def _uloz(self, user_id, vysledek):
+        """Zapíše závod přímo do úložiště serveru (data/shots/<user>/<race>/race.shots)."""
+        adresar = os.path.join(self.store_adresar, user_id, vysledek['race_id'])
+        os.makedirs(adresar, exist_ok=True)
+        store = ShotStore(os.path.join(adresar, RACE_SOUBOR))
+        try:
+            # Závod je jeden blok, takže je buď celý zapsaný, nebo vůbec
+            if len(store) == 0:
+                store.pripoj(vysledek['strely'])
+            elif len(store) != len(vysledek['strely']):
+                logging.warning(f"Závod {vysledek['race_id']} už existuje s jiným počtem ran, přeskakuji")
+        finally:
+            store.zavri()
+
+    def _nahraj(self, user_id, vysledek):
+        """Nahraje rány po dávkách; server duplicity podle id zahodí, opakování je bezpečné."""
+        strely = vysledek['strely']
+        for zacatek in range(0, len(strely), self.davka):
+            payload = {
+                "user_id": user_id,
+                "race_id": vysledek['race_id'],
+                "shots": strely[zacatek:zacatek + self.davka],
+            }
+            response = self.uploader.odesli(payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"API Error: {response.status_code} - {response.text}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m BulkImport",
+                                     description="Hromadný import archivovaných .tch souborů.")
+    parser.add_argument('adresar', help="kořen stromu s archivovanými .tch soubory")
+    parser.add_argument('--user-id', help="uživatel pro všechny soubory (jinak z názvu Match_<id>.tch)")
+    parser.add_argument('--api-url', default=API_URL, help="URL endpointu /api/shots")
+    parser.add_argument('--config', help="config.txt s přihlášením (uzivatelske_id, heslo), výchozí z USB nebo lokální")
+    parser.add_argument('--store', help="zapisovat přímo do adresáře úložiště (např. seta-web/data/shots)")
+    parser.add_argument('--procesy', type=int, help="počet procesů pro parsování (výchozí počet CPU)")
+    parser.add_argument('--davka', type=int, default=500, help="ran v jednom požadavku")
+    parser.add_argument('--stav', default=STAV_SOUBOR, help="soubor se stavem importu")
+    parser.add_argument('--znovu', action='store_true', help="ignorovat stav a importovat vše znovu")
+    parser.add_argument('-v', '--verbose', action='store_true', help="podrobné logování")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if not os.path.isdir(args.adresar):
+        logging.error(f"Adresář neexistuje: {args.adresar}")
+        return 2
+    if args.znovu and os.path.exists(args.stav):
+        os.remove(args.stav)
+
+    uploader = None
+    if not args.store:
+        from ShotUploader import ShotUploader
+        uploader = ShotUploader(args.api_url, gzip_body=True, prihlaseni=prihlaseni_ze_souboru(args.config))
+    importer = BulkImport(args.user_id, uploader, args.store, args.stav, args.procesy, args.davka)
+    try:
+        statistiky = importer.spust(najdi_soubory(args.adresar))
+    finally:
+        if uploader:
+            uploader.zavri()
+    cas = statistiky.get('cas') or 0
+    logging.info(f"Import dokončen: {statistiky['soubory']} souborů, {statistiky['rany']} ran, "
+                 f"přeskočeno {statistiky['preskoceno']}, chyb {statistiky['chyby']}"
+                 + (f", {statistiky['rany'] / cas:.0f} ran/s" if cas else ""))
+    return 1 if statistiky['chyby'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import glob
+import logging
+import os
+import select
+import struct
+import sys
+import time
+
+# Konstanty z <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+INOTIFY_MASKA = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_UDALOST = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Záložní watcher založený na os.stat s adaptivním intervalem.
+
+    Hned po změně kontroluje soubory často, při nečinnosti interval postupně
+    prodlužuje až na max_interval.
+    """
+
+    def __init__(self, adresar, vzor, min_interval=0.02, max_interval=1.0):
+        self.adresar = adresar
+        self.vzor = vzor
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._podpisy = self._nacti_podpisy()
+
+    def _nacti_podpisy(self):
+        podpisy = {}
+        for cesta in glob.glob(os.path.join(glob.escape(self.adresar), self.vzor)):
+            try:
+                stat = os.stat(cesta)
+            except OSError:
+                continue
+            podpisy[cesta] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        return podpisy
+
+    def cekej(self, timeout=1.0):
+        """Čeká na změnu souborů, vrátí množinu změněných cest (prázdnou po timeoutu)."""
+        konec = time.monotonic() + timeout
+        while True:
+            podpisy = self._nacti_podpisy()
+            zmenene = {cesta for cesta in podpisy.keys() | self._podpisy.keys()
+                       if podpisy.get(cesta) != self._podpisy.get(cesta)}
+            self._podpisy = podpisy
+            if zmenene:
+                self.interval = self.min_interval
+                return zmenene
+
+            zbyva = konec - time.monotonic()
+            if zbyva <= 0:
+                return set()
+            time.sleep(min(self.interval, zbyva))
+            self.interval = min(self.interval * 1.5, self.max_interval)
+
+    def zavri(self):
+        pass
+
+
+class InotifyWatcher:
+    """Watcher nad Linuxovým inotify (přes ctypes), probouzí se okamžitě po zápisu."""
+
+    def __init__(self, adresar, vzor):
+        self.adresar = adresar
+        self.vzor = vzor
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 selhalo: {os.strerror(errno)}")
+        if libc.inotify_add_watch(self._fd, os.fsencode(adresar), INOTIFY_MASKA) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch selhalo pro {adresar}: {os.strerror(errno)}")
+
+    def cekej(self, timeout=1.0):
+        """Čeká na změnu souborů, vrátí množinu změněných cest (prázdnou po timeoutu)."""
+        konec = time.monotonic() + timeout
+        while True:
+            zbyva = konec - time.monotonic()
+            if zbyva <= 0:
+                return set()
+            pripraveno, _, _ = select.select([self._fd], [], [], zbyva)
+            if not pripraveno:
+                return set()
+            zmenene = self._precti_udalosti()
+            if zmenene:
+                return zmenene
+
+    def _precti_udalosti(self):
+        zmenene = set()
+        try:
+            buf = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return zmenene
+
+        pozice = 0
+        while pozice + INOTIFY_UDALOST.size <= len(buf):
+            _, maska, _, delka = INOTIFY_UDALOST.unpack_from(buf, pozice)
+            pozice += INOTIFY_UDALOST.size
+            jmeno = os.fsdecode(buf[pozice:pozice + delka].rstrip(b'\0'))
+            pozice += delka
+            if maska & IN_Q_OVERFLOW:
+                # Fronta přetekla - nevíme co se změnilo, ohlásíme vše odpovídající vzoru
+                zmenene.update(glob.glob(os.path.join(glob.escape(self.adresar), self.vzor)))
+            elif jmeno and fnmatch.fnmatch(jmeno, self.vzor):
+                zmenene.add(os.path.join(self.adresar, jmeno))
+        return zmenene
+
+    def zavri(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def vytvor_watcher(adresar, vzor):
+    """Vytvoří nejlepší dostupný watcher pro soubory odpovídající vzoru v adresáři."""
+    if sys.platform.startswith('linux'):
+        try:
+            watcher = InotifyWatcher(adresar, vzor)
+            logging.debug(f"Používám inotify watcher pro {os.path.join(adresar, vzor)}")
+            return watcher
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify není dostupné, používám polling: {e}")
+    return PollingWatcher(adresar, vzor)
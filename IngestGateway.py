@@ -0,0 +1,637 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import collections
+import concurrent.futures
+import getpass
+import hashlib
+import hmac
+import json
+import logging
+import math
+import os
+import re
+import secrets
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+
+from BulkImport import RACE_SOUBOR
+from ShotCodec import MAGIC, TYP_OBSAHU, PrilisVelkeTelo, dekoduj_davku, rozbal_gzip
+from ShotSocketUploader import SOCKET_PATH
+from ShotStore import ShotStore
+
+try:
+    from aiohttp import web  # pip install aiohttp
+except ImportError:
+    web = None
+
+try:
+    import socketio  # pip install python-socketio
+except ImportError:
+    socketio = None  # Bez knihovny brána přijímá jen HTTP a rány webu nepředává
+
+# Samostatná ingest brána pro mnoho LiveSenderů najednou:
+#
+#   python -m IngestGateway [--port 8080] [--store seta-web/data/shots] [--zapisovace 8]
+#                           [--socket-url http://localhost:3000]
+#   python -m IngestGateway --nastav-heslo ID [--strelci ID,ID]
+#
+# Přijímá dávky ran stejně jako POST /api/shots (JSON, gzip i rámec ShotCodec)
+# a přes socket.io 'ingestShots'. Klient se přihlašuje svým uzivatelske_id a
+# heslem (HTTP Basic, u socket.io v auth) a smí posílat jen rány pod svým
+# user_id, případně pod ID střelců povolenými v souboru uživatelů (klubový
+# počítač s více drahami). Opakovaně neúspěšné přihlášení účtu nebo IP adresy
+# brána na chvíli odmítá s 429. Zápisy se rozdělí podle (user_id, race_id) mezi
+# zapisovače (asyncio úlohy): každý závod má jednoho zapisovače, takže pořadí
+# ran zůstane zachované a čekající dávky závodu se zapíšou jedním blokem
+# ShotStore. Když je fronta zapisovače plná, brána odpoví 429 s Retry-After.
+# Uložené rány předává po dávkách socket.io vrstvě seta-web (událost
+# 'publishShots'), aby je web ukázal živě. Brána musí být jediný zapisovač do
+# úložiště - ingest na Next.js serveru se pak nepoužívá.
+
+UZIVATELE_SOUBOR = 'gateway_users.json'
+ITERACE = 200_000  # PBKDF2-SHA256
+PLATNE_ID = re.compile(r'^(?!\.{1,2}$)[\w.-]{1,128}$')  # user_id a race_id jsou jména adresářů
+HEX_ID = re.compile(r'^[0-9a-f]{16}$')
+MAX_RETRY_AFTER = 30
+MAX_TELO = 8 * 1024 * 1024  # Největší požadavek, přijatý i po rozbalení gzipu
+MAX_NEUSPECHU = 10  # Neúspěšných přihlášení za OKNO_NEUSPECHU na účet i na IP adresu
+OKNO_NEUSPECHU = 60.0
+MAX_OVEROVANI = 32  # Hesel čekajících na PBKDF2, další přihlášení brána hned odmítne
+
+
+def hash_hesla(heslo, sul=None, iterace=ITERACE):
+    """Záznam hesla pro soubor uživatelů: pbkdf2_sha256$iterace$sůl$hash."""
+    sul = sul or secrets.token_hex(16)
+    otisk = hashlib.pbkdf2_hmac('sha256', heslo.encode('utf-8'), bytes.fromhex(sul), iterace)
+    return f"pbkdf2_sha256${iterace}${sul}${otisk.hex()}"
+
+
+def over_hash(heslo, zaznam):
+    try:
+        algoritmus, iterace, sul, otisk = zaznam.split('$')
+        if algoritmus != 'pbkdf2_sha256':
+            return False
+        return hmac.compare_digest(hash_hesla(heslo, sul, int(iterace)).split('$')[3], otisk)
+    except (ValueError, AttributeError):
+        return False
+
+
+def normalizuj_id(id_strely):
+    """Stejné id jako normalizeShotId v seta-web/src/lib/shotStore.ts."""
+    if HEX_ID.match(id_strely):
+        return id_strely
+    return hashlib.sha256(id_strely.encode('utf-8')).hexdigest()[:16]
+
+
+class Uzivatele:
+    """Přihlašovací údaje brány v JSON souboru, při změně souboru se načtou znovu.
+
+    Soubor má tvar {"user_id": {"heslo": "<hash_hesla>", "strelci": ["id", ...]}},
+    "strelci" jsou další user_id, pod kterými smí účet posílat ("*" = kdokoli).
+    Úspěšně ověřené heslo se pamatuje, aby se PBKDF2 nepočítalo u každé dávky.
+    """
+
+    def __init__(self, cesta=UZIVATELE_SOUBOR):
+        self.cesta = cesta
+        self.data = {}
+        self._podpis = None
+        self._overene = {}  # user_id -> (záznam hesla, sha256 ověřeného hesla)
+
+    def _aktualni(self):
+        try:
+            stat = os.stat(self.cesta)
+            podpis = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            podpis = None
+        if podpis != self._podpis:
+            data = {}
+            if podpis is not None:
+                try:
+                    with open(self.cesta, 'r', encoding='utf-8') as file:
+                        data = json.load(file)
+                except (OSError, ValueError) as e:
+                    logging.error(f"Soubor uživatelů {self.cesta} nelze načíst: {e}")
+                    return self.data
+            self.data = data
+            self._podpis = podpis
+        return self.data
+
+    def prihlas(self, user_id, heslo):
+        """Ověří uzivatelske_id a heslo (první ověření trvá desítky ms)."""
+        zaznam = self._aktualni().get(user_id, {}).get('heslo')
+        if not zaznam or not heslo:
+            return False
+        otisk = hashlib.sha256(heslo.encode('utf-8')).digest()
+        overeno = self._overene.get(user_id)
+        if overeno is not None and overeno[0] == zaznam:
+            return hmac.compare_digest(overeno[1], otisk)
+        if not over_hash(heslo, zaznam):
+            return False
+        self._overene[user_id] = (zaznam, otisk)
+        return True
+
+    def overeno(self, user_id, heslo):
+        """True, pokud heslo ověřené dřív platí - bez PBKDF2, lze volat ze smyčky."""
+        overeno = self._overene.get(user_id)
+        zaznam = self._aktualni().get(user_id, {}).get('heslo')
+        return (overeno is not None and bool(heslo) and overeno[0] == zaznam
+                and hmac.compare_digest(overeno[1], hashlib.sha256(heslo.encode('utf-8')).digest()))
+
+    def smi(self, prihlaseny, user_id):
+        """Smí přihlášený účet posílat rány pod user_id?"""
+        if prihlaseny == user_id:
+            return True
+        strelci = self._aktualni().get(prihlaseny, {}).get('strelci', ())
+        return '*' in strelci or user_id in strelci
+
+    def nastav_heslo(self, user_id, heslo, strelci=None):
+        """Uloží heslo uživatele (a povolené střelce) do souboru atomicky."""
+        data = dict(self._aktualni())
+        zaznam = dict(data.get(user_id, {}), heslo=hash_hesla(heslo))
+        if strelci is not None:
+            zaznam['strelci'] = strelci
+        data[user_id] = zaznam
+        docasny = f"{self.cesta}.tmp"
+        with open(docasny, 'w', encoding='utf-8') as file:
+            json.dump(data, file, indent=2, ensure_ascii=False)
+        os.replace(docasny, self.cesta)
+
+
+class OmezeniNeuspechu:
+    """Počítá neúspěšná přihlášení v pevném okně, aby hádání hesel nezahltilo PBKDF2.
+
+    Pokus se započítá už před ověřením (souběžné požadavky limit nepřeskočí)
+    a úspěšné přihlášení ho vrátí.
+    """
+
+    def __init__(self, limit=MAX_NEUSPECHU, okno=OKNO_NEUSPECHU, max_klicu=100_000):
+        self.limit = limit
+        self.okno = okno
+        self.max_klicu = max_klicu
+        self._neuspechy = {}  # klíč (user_id nebo IP) -> (začátek okna, počet)
+
+    def cekani(self, *klice):
+        """Kolik sekund musí klíče počkat, 0 = přihlášení se smí zkusit."""
+        ted = time.monotonic()
+        cekani = 0.0
+        for klic in klice:
+            zacatek, pocet = self._neuspechy.get(klic, (ted, 0))
+            if pocet >= self.limit and ted - zacatek < self.okno:
+                cekani = max(cekani, self.okno - (ted - zacatek))
+        return cekani
+
+    def pokus(self, *klice):
+        ted = time.monotonic()
+        if len(self._neuspechy) >= self.max_klicu:
+            # Staré záznamy se zahodí, aby tabulka nerostla s každou novou adresou
+            self._neuspechy = {klic: hodnota for klic, hodnota in self._neuspechy.items()
+                               if ted - hodnota[0] < self.okno}
+        for klic in klice:
+            zacatek, pocet = self._neuspechy.get(klic, (ted, 0))
+            if ted - zacatek >= self.okno:
+                zacatek, pocet = ted, 0
+            self._neuspechy[klic] = (zacatek, pocet + 1)
+
+    def uspech(self, *klice):
+        for klic in klice:
+            zacatek, pocet = self._neuspechy.get(klic, (0.0, 0))
+            if pocet > 1:
+                self._neuspechy[klic] = (zacatek, pocet - 1)
+            else:
+                self._neuspechy.pop(klic, None)
+
+
+class Zapisovac:
+    """Jeden shard zápisů: fronta dávek a úloha, která je zapisuje do ShotStore.
+
+    Soubory závodů drží otevřené (nejvýš max_otevrenych) spolu s množinou už
+    uložených id, duplicity podle id se zahodí stejně jako v shotIngest.ts.
+    Zápis běží ve vlákně (asyncio.to_thread), smyčka brány tedy neblokuje.
+    """
+
+    def __init__(self, cislo, adresar, preposilani=None, fronta=256, max_otevrenych=64):
+        self.cislo = cislo
+        self.adresar = adresar
+        self.preposilani = preposilani
+        self.fronta = asyncio.Queue(maxsize=fronta)
+        self.max_otevrenych = max_otevrenych
+        self.ulozeno = 0
+        self._cas_davky = 0.005  # Klouzavý průměr zápisu jedné dávky (s)
+        self._zavody = collections.OrderedDict()  # (user_id, race_id) -> (ShotStore, set id)
+
+    def pridej(self, klic, strely):
+        """Zařadí dávku a vrátí future s (timestamp, přijaté rány); plná fronta vyhodí QueueFull."""
+        future = asyncio.get_running_loop().create_future()
+        self.fronta.put_nowait((klic, strely, future))
+        return future
+
+    def retry_after(self):
+        """Za kolik sekund se fronta nejspíš uvolní (pro hlavičku Retry-After)."""
+        return min(max(math.ceil(self.fronta.qsize() * self._cas_davky), 1), MAX_RETRY_AFTER)
+
+    async def smycka(self):
+        while True:
+            polozky = [await self.fronta.get()]
+            while not self.fronta.empty():
+                polozky.append(self.fronta.get_nowait())
+            start = time.perf_counter()
+            podle_zavodu = collections.OrderedDict()
+            for klic, strely, future in polozky:
+                podle_zavodu.setdefault(klic, []).append((strely, future))
+            for klic, davky in podle_zavodu.items():
+                try:
+                    prijato, prijate = await asyncio.to_thread(self._zapis, klic, [strely for strely, _ in davky])
+                except Exception as e:
+                    logging.error(f"Zápis závodu {klic[0]}/{klic[1]} selhal: {e}")
+                    for _, future in davky:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                timestamp = datetime.fromtimestamp(prijato / 1000, timezone.utc).isoformat(
+                    timespec='milliseconds').replace('+00:00', 'Z')
+                for (_, future), nove in zip(davky, prijate):
+                    if not future.done():
+                        future.set_result((timestamp, nove))
+                vse = [strela for nove in prijate for strela in nove]
+                self.ulozeno += len(vse)
+                if vse and self.preposilani is not None:
+                    self.preposilani.pridej(klic[0], klic[1], timestamp, vse)
+            self._cas_davky = 0.8 * self._cas_davky + 0.2 * (time.perf_counter() - start) / len(polozky)
+            for _ in polozky:
+                self.fronta.task_done()
+
+    def _otevri(self, klic):
+        if klic in self._zavody:
+            self._zavody.move_to_end(klic)
+            return self._zavody[klic]
+        adresar = os.path.join(self.adresar, *klic)
+        os.makedirs(adresar, exist_ok=True)
+        store = ShotStore(os.path.join(adresar, RACE_SOUBOR))
+        ids = {f"{int(id_strely):016x}" for id_strely in store.nacti()['id'] if id_strely}
+        # Starší závody mají rány po jedné v JSON souborech
+        for jmeno in os.listdir(adresar):
+            if jmeno.endswith('.json'):
+                try:
+                    with open(os.path.join(adresar, jmeno), 'r', encoding='utf-8') as file:
+                        id_strely = json.load(file)['shot_data'].get('id')
+                except (OSError, ValueError, KeyError, AttributeError):
+                    continue
+                if id_strely:
+                    ids.add(normalizuj_id(str(id_strely)))
+        self._zavody[klic] = (store, ids)
+        if len(self._zavody) > self.max_otevrenych:
+            _, (nejstarsi, _) = self._zavody.popitem(last=False)
+            nejstarsi.zavri()
+        return store, ids
+
+    def _zapis(self, klic, davky):
+        """Zapíše dávky jednoho závodu jedním blokem, vrátí (čas přijetí, nové rány po dávkách)."""
+        store, ids = self._otevri(klic)
+        davka_ids = set()
+        prijate = []
+        for strely in davky:
+            nove = []
+            for strela in strely:
+                if strela['id']:
+                    if strela['id'] in ids or strela['id'] in davka_ids:
+                        continue
+                    davka_ids.add(strela['id'])
+                nove.append(strela)
+            prijate.append(nove)
+        prijato = time.time() * 1000
+        store.pripoj([strela for nove in prijate for strela in nove], prijato)
+        ids.update(davka_ids)  # Až po zápisu, neuložená rána nesmí být duplicitou
+        return prijato, prijate
+
+    def zavri(self):
+        for store, _ in self._zavody.values():
+            store.zavri()
+        self._zavody.clear()
+
+
+class Preposilani:
+    """Po dávkách předává uložené rány socket.io vrstvě seta-web (událost 'publishShots').
+
+    Rány za interval se sloučí do jedné zprávy na závod. Když web neběží,
+    rány se jen nezobrazí živě - uložené jsou a stránka si je dočte přes
+    GET /api/shots s kurzorem.
+    """
+
+    def __init__(self, url, token, interval=0.05, socket_path=SOCKET_PATH, max_fronta=10000,
+                 interval_pripojeni=5.0):
+        self.url = url
+        self.token = token
+        self.interval = interval
+        self.socket_path = socket_path
+        self.interval_pripojeni = interval_pripojeni
+        self.fronta = asyncio.Queue(maxsize=max_fronta)
+        self.odeslano = 0
+        self.zahozeno = 0
+        self._dalsi_pokus = 0.0
+        self._sio = socketio.AsyncClient(reconnection=True, reconnection_delay_max=interval_pripojeni)
+
+    def pridej(self, user_id, race_id, timestamp, strely):
+        try:
+            self.fronta.put_nowait((user_id, race_id, timestamp, strely))
+        except asyncio.QueueFull:
+            self.zahozeno += len(strely)
+
+    async def _pripoj(self):
+        if self._sio.connected or time.monotonic() < self._dalsi_pokus:
+            return
+        self._dalsi_pokus = time.monotonic() + self.interval_pripojeni
+        try:
+            await self._sio.connect(self.url, socketio_path=self.socket_path, transports=['websocket'],
+                                    wait_timeout=5)
+            logging.info(f"Předávání ran připojeno k {self.url}")
+        except Exception as e:
+            logging.debug(f"Socket.io vrstva webu nedostupná ({e}), další pokus za {self.interval_pripojeni:.0f} s")
+
+    async def smycka(self):
+        while True:
+            polozky = [await self.fronta.get()]
+            await asyncio.sleep(self.interval)  # Sběr dalších ran do stejné zprávy
+            while not self.fronta.empty():
+                polozky.append(self.fronta.get_nowait())
+            podle_zavodu = collections.OrderedDict()
+            for user_id, race_id, timestamp, strely in polozky:
+                podle_zavodu.setdefault((user_id, race_id), []).extend(
+                    {'user_id': user_id, 'race_id': race_id, 'timestamp': timestamp, 'shot_data': strela}
+                    for strela in strely)
+            await self._pripoj()
+            for (user_id, race_id), strely in podle_zavodu.items():
+                if not self._sio.connected:
+                    self.zahozeno += len(strely)
+                    continue
+                try:
+                    await self._sio.emit('publishShots', {'token': self.token, 'user_id': user_id,
+                                                          'race_id': race_id, 'shots': strely})
+                    self.odeslano += len(strely)
+                except Exception as e:
+                    logging.debug(f"Předání ran webu selhalo: {e}")
+                    self.zahozeno += len(strely)
+
+    async def zavri(self):
+        if self._sio.connected:
+            await self._sio.disconnect()
+
+
+class IngestGateway:
+    """Asyncio ingest brána: ověření, sharding zápisů podle závodu a backpressure."""
+
+    def __init__(self, adresar, uzivatele, zapisovace=8, fronta=256, socket_url=None, token=None):
+        self.adresar = adresar
+        self.uzivatele = uzivatele
+        self.pocet_zapisovacu = zapisovace
+        self.velikost_fronty = fronta
+        self.socket_url = socket_url
+        self.token = token
+        self.zapisovace = []
+        self.preposilani = None
+        self.statistiky = {'davky': 0, 'rany': 0, 'duplicity': 0, 'odmitnuto': 0, 'neprihlaseno': 0,
+                           'omezeno': 0}
+        self.omezeni = OmezeniNeuspechu()
+        # PBKDF2 běží ve vlastních vláknech, výchozí executor patří zápisům do úložiště
+        self._overovani = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='prihlaseni')
+        self._cekajicich_overeni = 0
+        self._ulohy = []
+        self._sio = None
+
+    def zapisovac(self, user_id, race_id):
+        """Shard závodu - stabilní, takže jeden závod zapisuje vždy stejná úloha."""
+        return self.zapisovace[zlib.crc32(f"{user_id}/{race_id}".encode('utf-8')) % len(self.zapisovace)]
+
+    async def prijmi(self, prihlaseny, data):
+        """Zpracuje dávku (dict nebo rámec ShotCodec), vrátí (status, tělo odpovědi, hlavičky)."""
+        if isinstance(data, (bytes, bytearray)):
+            try:
+                data = dekoduj_davku(bytes(data), MAX_TELO)
+            except PrilisVelkeTelo:
+                return 413, {'error': 'Shot frame too large'}, {}
+            except (ValueError, IndexError, OSError, UnicodeDecodeError):
+                return 400, {'error': 'Invalid shot frame'}, {}
+        if not isinstance(data, dict):
+            return 400, {'error': 'Invalid request body'}, {}
+        user_id = data.get('user_id')
+        race_id = data.get('race_id')
+        shots = data.get('shots')
+        if not isinstance(shots, list):
+            shots = [data['shot_data']] if data.get('shot_data') else []
+        if not user_id or not race_id or not shots:
+            return 400, {'error': 'Missing required fields'}, {}
+        if not PLATNE_ID.match(str(user_id)) or not PLATNE_ID.match(str(race_id)):
+            return 400, {'error': 'Invalid user_id or race_id'}, {}
+        if not self.uzivatele.smi(prihlaseny, user_id):
+            return 403, {'error': 'Forbidden'}, {}
+        try:
+            strely = [{
+                'x': float(strela['x']),
+                'y': float(strela['y']),
+                'time': str(strela.get('time') or ''),
+                'index': int(strela.get('index') or 0),
+                'id': normalizuj_id(str(strela['id'])) if strela.get('id') else None,
+                'score': float(strela['score']) if strela.get('score') is not None else None,
+            } for strela in shots]
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return 400, {'error': 'Invalid shot'}, {}
+
+        zapisovac = self.zapisovac(user_id, race_id)
+        try:
+            future = zapisovac.pridej((user_id, race_id), strely)
+        except asyncio.QueueFull:
+            self.statistiky['odmitnuto'] += 1
+            retry_after = zapisovac.retry_after()
+            return 429, {'error': 'Too many requests', 'retry_after': retry_after}, {'Retry-After': str(retry_after)}
+        try:
+            timestamp, prijate = await future
+        except Exception:
+            return 500, {'error': 'Internal server error'}, {}
+        self.statistiky['davky'] += 1
+        self.statistiky['rany'] += len(prijate)
+        self.statistiky['duplicity'] += len(strely) - len(prijate)
+        return 200, {'success': True, 'timestamp': timestamp, 'count': len(prijate),
+                     'duplicates': len(strely) - len(prijate)}, {}
+
+    async def _prihlas(self, user_id, heslo, adresa):
+        """Ověří přihlášení, vrátí (přihlášen, kolik sekund počkat při omezení)."""
+        if self.uzivatele.overeno(user_id, heslo):
+            return True, 0
+        klice = (('user', user_id), ('ip', adresa))
+        cekani = self.omezeni.cekani(*klice)
+        if cekani or self._cekajicich_overeni >= MAX_OVEROVANI:
+            self.statistiky['omezeno'] += 1
+            return False, max(math.ceil(cekani), 1)
+        # První ověření hesla (PBKDF2) trvá, nesmí blokovat smyčku ani zápisy
+        self.omezeni.pokus(*klice)
+        self._cekajicich_overeni += 1
+        try:
+            prihlasen = await asyncio.get_running_loop().run_in_executor(
+                self._overovani, self.uzivatele.prihlas, user_id, heslo)
+        finally:
+            self._cekajicich_overeni -= 1
+        if prihlasen:
+            self.omezeni.uspech(*klice)
+            return True, 0
+        self.statistiky['neprihlaseno'] += 1
+        return False, 0
+
+    async def _http_shots(self, request):
+        prihlaseny = None
+        cekani = 0
+        try:
+            typ, _, udaje = request.headers.get('Authorization', '').partition(' ')
+            if typ.lower() == 'basic':
+                user_id, _, heslo = base64.b64decode(udaje).decode('utf-8').partition(':')
+                prihlasen, cekani = await self._prihlas(user_id, heslo, request.remote)
+                if prihlasen:
+                    prihlaseny = user_id
+        except (binascii.Error, UnicodeDecodeError):
+            pass
+        if cekani:
+            return web.json_response({'error': 'Too many failed logins', 'retry_after': cekani}, status=429,
+                                     headers={'Retry-After': str(cekani)})
+        if prihlaseny is None:
+            return web.json_response({'error': 'Unauthorized'}, status=401,
+                                     headers={'WWW-Authenticate': 'Basic realm="seta"'})
+        try:
+            telo = await request.read()
+            if request.headers.get('Content-Encoding') == 'gzip':
+                telo = rozbal_gzip(telo, MAX_TELO)
+            if request.content_type == TYP_OBSAHU or telo[:4] == MAGIC:
+                data = telo
+            else:
+                data = json.loads(telo)
+        except PrilisVelkeTelo:
+            return web.json_response({'error': 'Request body too large'}, status=413)
+        except (OSError, EOFError, ValueError):
+            return web.json_response({'error': 'Invalid request body'}, status=400)
+        status, odpoved, hlavicky = await self.prijmi(prihlaseny, data)
+        return web.json_response(odpoved, status=status, headers=hlavicky)
+
+    async def _http_stav(self, request):
+        return web.json_response(self.stav())
+
+    def stav(self):
+        stav = dict(self.statistiky)
+        stav['fronty'] = [zapisovac.fronta.qsize() for zapisovac in self.zapisovace]
+        stav['ulozeno'] = sum(zapisovac.ulozeno for zapisovac in self.zapisovace)
+        if self.preposilani is not None:
+            stav['predano'] = self.preposilani.odeslano
+            stav['nepredano'] = self.preposilani.zahozeno
+        return stav
+
+    def _socket_server(self, aplikace):
+        self._sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins=[],
+                                         max_http_buffer_size=MAX_TELO)
+        self._sio.attach(aplikace, socketio_path=SOCKET_PATH.strip('/'))
+
+        @self._sio.event
+        async def connect(sid, environ, auth=None):
+            auth = auth if isinstance(auth, dict) else {}
+            user_id = str(auth.get('user_id') or '')
+            pozadavek = environ.get('aiohttp.request')
+            prihlasen, cekani = await self._prihlas(user_id, str(auth.get('heslo') or ''),
+                                                    pozadavek.remote if pozadavek is not None else None)
+            if not prihlasen:
+                raise socketio.exceptions.ConnectionRefusedError('Too many failed logins' if cekani else 'Unauthorized')
+            await self._sio.save_session(sid, {'user_id': user_id})
+
+        @self._sio.on('ingestShots')
+        async def ingest_shots(sid, data):
+            relace = await self._sio.get_session(sid)
+            status, odpoved, _ = await self.prijmi(relace['user_id'], data)
+            return dict(odpoved, status=status)
+
+    def aplikace(self):
+        """Vytvoří aiohttp aplikaci brány (POST /api/shots, GET /api/status, socket.io).
+
+        Spouští se s auto_decompress=False, gzip těla rozbaluje brána sama.
+        """
+        # Tělo rozbaluje _http_shots s limitem, aiohttp hlídá jen velikost na drátě
+        aplikace = web.Application(client_max_size=MAX_TELO)
+        aplikace.router.add_post('/api/shots', self._http_shots)
+        aplikace.router.add_get('/api/status', self._http_stav)
+        if socketio is not None:
+            self._socket_server(aplikace)
+        else:
+            logging.warning("python-socketio není nainstalováno, brána přijímá jen HTTP")
+        aplikace.on_startup.append(self._spust)
+        aplikace.on_cleanup.append(self._zastav)
+        return aplikace
+
+    async def _spust(self, aplikace):
+        if self.socket_url and self.token and socketio is not None:
+            self.preposilani = Preposilani(self.socket_url, self.token)
+            self._ulohy.append(asyncio.create_task(self.preposilani.smycka()))
+        elif self.socket_url:
+            logging.warning("Předávání ran webu vyžaduje python-socketio a token (SETA_GATEWAY_TOKEN)")
+        self.zapisovace = [Zapisovac(cislo, self.adresar, self.preposilani, self.velikost_fronty)
+                           for cislo in range(self.pocet_zapisovacu)]
+        self._ulohy += [asyncio.create_task(zapisovac.smycka()) for zapisovac in self.zapisovace]
+
+    async def _zastav(self, aplikace):
+        # Nejdřív dopsat přijaté dávky, klienti na ně čekají s potvrzením
+        for zapisovac in self.zapisovace:
+            await zapisovac.fronta.join()
+        for uloha in self._ulohy:
+            uloha.cancel()
+        await asyncio.gather(*self._ulohy, return_exceptions=True)
+        for zapisovac in self.zapisovace:
+            zapisovac.zavri()
+        if self.preposilani is not None:
+            await self.preposilani.zavri()
+        self._overovani.shutdown(wait=False, cancel_futures=True)
+        logging.info(f"Brána zastavena: {self.stav()}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m IngestGateway",
+                                     description="Ingest brána pro rány z mnoha LiveSenderů.")
+    parser.add_argument('--host', default='0.0.0.0', help="adresa, na které brána naslouchá")
+    parser.add_argument('--port', type=int, default=8080, help="port brány")
+    parser.add_argument('--store', default=os.path.join('seta-web', 'data', 'shots'),
+                        help="adresář úložiště ran (stejný čte seta-web)")
+    parser.add_argument('--uzivatele', default=UZIVATELE_SOUBOR, help="soubor s hesly uživatelů")
+    parser.add_argument('--zapisovace', type=int, default=8, help="počet shardů zápisu")
+    parser.add_argument('--fronta', type=int, default=256, help="dávek ve frontě shardu, pak 429")
+    parser.add_argument('--socket-url', help="seta-web pro předávání ran živému zobrazení "
+                                             "(např. http://localhost:3000, token v SETA_GATEWAY_TOKEN)")
+    parser.add_argument('--nastav-heslo', metavar='ID', help="nastavit heslo uživatele a skončit")
+    parser.add_argument('--strelci', help="s --nastav-heslo: další user_id, pod kterými smí posílat (čárkou, * = všichni)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="podrobné logování")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    uzivatele = Uzivatele(args.uzivatele)
+    if args.nastav_heslo:
+        heslo = getpass.getpass(f"Heslo pro {args.nastav_heslo}: ")
+        if not heslo:
+            logging.error("Prázdné heslo")
+            return 2
+        strelci = [strelec.strip() for strelec in args.strelci.split(',')] if args.strelci else None
+        uzivatele.nastav_heslo(args.nastav_heslo, heslo, strelci)
+        logging.info(f"Heslo uživatele {args.nastav_heslo} uloženo do {args.uzivatele}")
+        return 0
+
+    if web is None:
+        logging.error("Brána vyžaduje balíček aiohttp (pip install aiohttp)")
+        return 2
+    if not os.path.exists(args.uzivatele):
+        logging.error(f"Soubor uživatelů {args.uzivatele} neexistuje, vytvořte ho přes --nastav-heslo ID")
+        return 2
+    os.makedirs(args.store, exist_ok=True)
+    gateway = IngestGateway(args.store, uzivatele, args.zapisovace, args.fronta, args.socket_url,
+                            os.environ.get('SETA_GATEWAY_TOKEN'))
+    # Access log jen s -v, při stovkách dávek za sekundu by zdržoval
+    web.run_app(gateway.aplikace(), host=args.host, port=args.port, print=None, auto_decompress=False,
+                access_log=logging.getLogger('aiohttp.access') if args.verbose else None)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,39 +1,22 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import os
-import xml.etree.ElementTree as ET
-import hashlib
-import time
 import json
-from SetaFaultHandler import SetaFaultHandler  # Updated import
-import glob  # Import glob
 import logging
-import threading
 import subprocess  # Add this import
-import uuid  # Add this import for unique IDs
-import datetime  # Add this import for timestamps
-import requests  # Add this at the top with other imports
-
-# Configure basic logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+import time
+from RaceSession import RaceSession
+from SetaConfig import SetaConfig
+from SetaCore import (API_URL, get_monitor_filename, smaz_existujici_soubor, spust_odesilani,
+                      zastav_odesilani, vytvor_pipeline, prenastav_drahu, zmen_api_url,
+                      prihlaseni_z_configu, zmen_prihlaseni)
 
-fault_handler = SetaFaultHandler()  # Updated instantiation
+# Tenké GUI nad SetaCore - bez okna lze uploader spustit přes python -m SetaDaemon
 
 def uloz_config():
-    """Uloží aktuální nastavení do config souboru."""
-    try:
-        config_data = {
-            "seta_adresar": seta_adresar,
-            "uzivatelske_id": uzivatelske_id,
-            "heslo": heslo,
-            "seta_path": seta_path
-        }
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        config_filepath = os.path.join(script_dir, "config.txt")
-        with open(config_filepath, 'w') as config_file:
-            json.dump(config_data, config_file)
-    except Exception as e:
-        messagebox.showerror("Chyba", f"Chyba při ukládání nastavení: {e}")
+    """Předá aktuální nastavení configu, na disk se zapíše po chvíli klidu."""
+    config.nastav(seta_adresar=seta_adresar, uzivatelske_id=uzivatelske_id,
+                  heslo=heslo, seta_path=seta_path)
 
 def vybrat_adresar():
     """Otevře dialog pro výběr adresáře a uloží cestu."""
@@ -66,8 +49,8 @@ def on_entry_change(*args):
     uloz_config()  # Automatické uložení při změně
 
 def ulozit_nastaveni():
-    """Uloží nastavení a spustí monitorování."""
-    global seta_adresar, uzivatelske_id, heslo, monitoring_thread, seta_path
+    """Uloží nastavení a spustí SETA aplikaci."""
+    global seta_adresar, uzivatelske_id, heslo, seta_path
     seta_adresar = cesta_entry.get()
     uzivatelske_id = id_entry.get()
     heslo = heslo_entry.get()
@@ -85,19 +68,10 @@ def ulozit_nastaveni():
         messagebox.showerror("Chyba", "SETA.exe nebyla nalezena.")
         return
 
-    config_data = {
-        "seta_adresar": seta_adresar,
-        "uzivatelske_id": uzivatelske_id,
-        "heslo": heslo,
-        "seta_path": seta_path
-    }
-
     try:
         # Save config
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        config_filepath = os.path.join(script_dir, "config.txt")
-        with open(config_filepath, 'w') as config_file:
-            json.dump(config_data, config_file)
+        uloz_config()
+        config.uloz()
 
         # Clean up existing file
         monitor_filepath = get_monitor_filename(seta_adresar, uzivatelske_id)
@@ -107,19 +81,8 @@ def ulozit_nastaveni():
         if not spust_seta(seta_path):
             return
 
-        # Start monitoring
-        if monitoring_thread and monitoring_thread.is_alive():
-            stop_monitoring.set()
-            monitoring_thread.join(timeout=1.0)
-        
-        stop_monitoring.clear()
-        monitoring_thread = threading.Thread(
-            target=lambda: monitoruj_a_nahravej(seta_adresar, uzivatelske_id, heslo, root),
-            daemon=True
-        )
-        monitoring_thread.start()
-        
-        nastaveni_ulozeno_label.config(text="Monitoring spuštěn...")
+        # Monitoring běží jen během nahrávání, pipeline spouští RaceSession
+        nastaveni_ulozeno_label.config(text="Nastavení uloženo, spusťte nahrávání.")
     except Exception as e:
         messagebox.showerror("Chyba", f"Chyba při ukládání nastavení: {e}")
 
@@ -141,236 +104,36 @@ def spust_seta(seta_path):
         messagebox.showerror("Chyba", f"Nelze spustit SETA aplikaci: {e}")
         return False
 
-def get_monitor_filename(adresar, uzivatelske_id):
-    """Vytvoří celou cestu k monitorovanému souboru."""
-    filename = f"Match_{uzivatelske_id}.tch"
-    return os.path.join(adresar, filename)
-
-def smaz_existujici_soubor(filepath):
-    """Smaže existující soubor pokud existuje."""
-    try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logging.info(f"Existující soubor smazán: {filepath}")
-    except Exception as e:
-        logging.error(f"Chyba při mazání souboru: {e}")
-
-def monitoruj_a_nahravej(adresar, uzivatelske_id, heslo, root):
-    """Monitoruje konkrétní soubor a nahrává změny."""
-    def update_label(text):
-        root.after(0, lambda: nastaveni_ulozeno_label.config(text=text))
-
-    monitor_filepath = get_monitor_filename(adresar, uzivatelske_id)
-    last_size = 0
-
-    print(f"Monitoruji soubor: {monitor_filepath}")
-    
-    while not stop_monitoring.is_set():
-        try:
-            if os.path.exists(monitor_filepath):
-                current_size = os.path.getsize(monitor_filepath)
-                if current_size > last_size:  # File has grown
-                    data = parsuj_tch_soubor(monitor_filepath)
-                    if data:
-                        nahraj_data_do_cloudu(data, uzivatelske_id, heslo, os.path.basename(monitor_filepath))
-                        print(f"Nová data nahrána z {monitor_filepath}")
-                    last_size = current_size
-
-        except Exception as e:
-            logging.error(f"Chyba při monitorování souboru: {str(e)}")
-        
-        time.sleep(1)  # Check every second
-
-def hash_souboru(filepath):
-    """Vypočítá hash souboru pro detekci změn a duplicit."""
-    hasher = hashlib.md5()
-    with open(filepath, 'rb') as file:
-        buf = file.read()
-        hasher.update(buf)
-    return hasher.hexdigest()
-
-def parsuj_tch_soubor(filepath):
-    """Parsuje .tch soubor a extrahuje data."""
-    logging.debug(f"Parsování TCH souboru: {filepath}")
-    try:
-        # Check if file is empty or too small to be valid XML
-        if os.path.getsize(filepath) < 50:  # Increased minimum size for valid SETA XML
-            fault_handler.log_fault(f"Soubor je příliš malý nebo prázdný: {filepath}")
-            logging.warning(f"Soubor je příliš malý: {filepath}")
-            return None
-
-        tree = ET.parse(filepath)
-        root = tree.getroot()
-        
-        # Validate root structure and required elements
-        game_info = root.find('Game_information')
-        if game_info is None:
-            fault_handler.log_fault(f"Chybí Game_information element: {filepath}")
-            logging.warning(f"Chybí Game_information element: {filepath}")
-            return None
-            
-        # Check if user_name is present and not empty
-        user_name = game_info.find('user_name')
-        if user_name is None or not user_name.text:
-            fault_handler.log_fault(f"Prázdné nebo chybějící user_name: {filepath}")
-            logging.warning(f"Prázdné nebo chybějící user_name: {filepath}")
-            return None
-
-        game_data = root.find('GameData')
-        if game_data is None or len(game_data) == 0:
-            fault_handler.log_fault(f"Prázdný nebo chybějící GameData element: {filepath}")
-            logging.warning(f"Prázdný nebo chybějící GameData element: {filepath}")
-            return None
-            
-        shots = []
-        for data_element in game_data:
-            try:
-                shot_data = {
-                    'x': float(data_element.find('x_data').text),
-                    'y': float(data_element.find('y_data').text),
-                    'time': data_element.find('time_stamp').text
-                }
-                shots.append(shot_data)
-            except (ValueError, AttributeError) as e:
-                fault_handler.log_fault(f"Neplatná data v záznamu {data_element.tag}: {str(e)}")
-                logging.warning(f"Neplatná data v záznamu {data_element.tag}: {str(e)}")
-                continue
-            
-        if not shots:
-            fault_handler.log_fault(f"Žádná validní data nebyla nalezena: {filepath}")
-            logging.warning(f"Žádná validní data nebyla nalezena: {filepath}")
-            return None
-                
-        logging.debug(f"Data extrahována: {shots}")
-        return shots
-            
-    except ET.ParseError as e:
-        fault_handler.log_fault(f"Chyba při parsování XML souboru {filepath}: {str(e)}")
-        logging.error(f"Chyba při parsování XML souboru {filepath}: {str(e)}")
-        return None
-    except Exception as e:
-        fault_handler.log_fault(f"Neočekávaná chyba při zpracování souboru {filepath}: {str(e)}")
-        logging.error(f"Neočekávaná chyba při zpracování souboru {filepath}: {str(e)}")
-        return None
-
-def nahraj_data_do_cloudu(data, uzivatelske_id, heslo, filename):
-    """Nahrává data do cloudu."""
-    if not race_session.is_running:
-        return  # Don't send data if no race is running
-        
-    api_url = "http://localhost:3000/api/shots"
-    
-    # Get only the last shot (newest data)
-    if data and len(data) > 0:
-        last_shot = data[-1]  # Get the last shot from the data array
-        
-        # Prepare the payload (removed password)
-        payload = {
-            "user_id": uzivatelske_id,
-            "race_id": race_session.race_id,
-            "shot_data": {
-                "x": last_shot['x'],
-                "y": last_shot['y'],
-                "time": last_shot['time']
-            }
-        }
-        
-        try:
-            response = requests.post(api_url, json=payload)
-            if response.status_code == 200:
-                logging.debug(f"Data úspěšně odeslána: {payload}")
-            else:
-                logging.error(f"Chyba při odesílání dat: {response.status_code} - {response.text}")
-                fault_handler.log_fault(f"API Error: {response.status_code} - {response.text}")
-        except Exception as e:
-            logging.error(f"Chyba při komunikaci s API: {str(e)}")
-            fault_handler.log_fault(f"API Communication Error: {str(e)}")
-
-def find_usb_drive_config(filename="config.txt"):
-    """
-    Scans for connected USB drives and checks if the config file exists on any of them.
-    Returns the path to the config file if found, otherwise None.
-    """
-    logging.debug("Hledám USB disky...")
-    drives = []
-
-    if os.name == 'nt':  # Windows
-        # Improved Windows drive detection (requires pywin32)
-        try:
-            import win32api
-            drive_letters = [d for d in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' if win32api.GetDriveType(d + ":\\") == win32api.DRIVE_REMOVABLE]
-            drives = [d + ":\\" for d in drive_letters]
-        except ImportError:
-            logging.warning("pywin32 není nainstalováno. Používám základní detekci disků.")
-            drives = [d + ":\\" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(d + ":")]
-    else:  # macOS
-        volumes_path = "/Volumes"
-        if os.path.exists(volumes_path):
-            try:
-                # Get all items in /Volumes
-                items = os.listdir(volumes_path)
-                logging.debug(f"Nalezené položky v /Volumes: {items}")
-                
-                # Filter out system volumes and hidden items
-                volumes = [item for item in items 
-                         if not item.startswith('.') 
-                         and os.path.isdir(os.path.join(volumes_path, item))
-                         and item != "Macintosh HD"]  # Skip main system drive
-                
-                drives = [os.path.join(volumes_path, vol) for vol in volumes]
-                logging.debug(f"Filtrované disky: {drives}")
-            except OSError as e:
-                logging.error(f"Chyba při čtení /Volumes: {e}")
-                drives = []
-        else:
-            logging.warning("/Volumes neexistuje")
-            drives = []
-
-    logging.debug(f"Nalezené potenciální disky: {drives}")
-
-    for drive in drives:
-        config_path = os.path.join(drive, filename)
-        logging.debug(f"Kontroluji cestu: {config_path}")
-        if os.path.exists(config_path):
-            logging.debug(f"Konfigurační soubor nalezen na: {config_path}")
-            return config_path
-
-    logging.debug("Konfigurační soubor nenalezen na žádném USB disku.")
-    return None
-
+def vytvor_pipeline_zavodu(race_id):
+    """Vytvoří upload pipeline pro monitorovaný soubor aktuálního uživatele."""
+    return vytvor_pipeline(seta_adresar, uzivatelske_id, race_id, send_queue)
+
+def vypln_pole(klice=("seta_adresar", "uzivatelske_id", "heslo", "seta_path")):
+    """Převezme hodnoty z configu do globálních proměnných a vstupních polí."""
+    global seta_adresar, uzivatelske_id, heslo, seta_path
+    seta_adresar = config["seta_adresar"]
+    uzivatelske_id = config["uzivatelske_id"]
+    heslo = config["heslo"]
+    seta_path = config["seta_path"]
+
+    pole = {"seta_adresar": cesta_entry, "uzivatelske_id": id_entry,
+            "heslo": heslo_entry, "seta_path": seta_path_entry}
+    for klic in klice:
+        if klic in pole:
+            pole[klic].delete(0, tk.END)
+            pole[klic].insert(0, config[klic])
 
 def nacti_nastaveni():
     """Načte nastavení z config.txt, nejprve z USB, pokud existuje, jinak z lokálního adresáře."""
-    config_filepath = find_usb_drive_config()  # Check USB drives first
-
-    if not config_filepath:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        config_filepath = os.path.join(script_dir, "config.txt")  # Fallback to local config
-
     try:
-        if os.path.exists(config_filepath):
-            with open(config_filepath, 'r') as config_file:
-                config_data = json.load(config_file)
-                global seta_adresar, uzivatelske_id, heslo, seta_path
-                seta_adresar = config_data.get("seta_adresar", "")
-                uzivatelske_id = config_data.get("uzivatelske_id", "")
-                heslo = config_data.get("heslo", "")
-                seta_path = config_data.get("seta_path", "")
-
-                cesta_entry.delete(0, tk.END)
-                cesta_entry.insert(0, seta_adresar)
-                id_entry.delete(0, tk.END)
-                id_entry.insert(0, uzivatelske_id)
-                heslo_entry.delete(0, tk.END)
-                heslo_entry.insert(0, heslo)
-                seta_path_entry.delete(0, tk.END)
-                seta_path_entry.insert(0, seta_path)
-                
-                # Pouze na Windows spouštíme SETA.exe automaticky
-                if os.name == 'nt' and seta_path and os.path.isfile(seta_path):
-                    spust_seta(seta_path)
-                elif seta_path:
-                    messagebox.showinfo("Informace", "Prosím spusťte SETA aplikaci manuálně.")
+        if os.path.exists(config.cesta):  # USB disky mají přednost před lokálním configem
+            vypln_pole()
+
+            # Pouze na Windows spouštíme SETA.exe automaticky
+            if os.name == 'nt' and seta_path and os.path.isfile(seta_path):
+                spust_seta(seta_path)
+            elif seta_path:
+                messagebox.showinfo("Informace", "Prosím spusťte SETA aplikaci manuálně.")
         else:
             nastaveni_ulozeno_label.config(text="Config.txt nenalezen. Výchozí nastavení.")
     except Exception as e:
@@ -411,33 +174,33 @@ def vytvor_token():
     except Exception as e:
         messagebox.showerror("Chyba", f"Chyba při vytváření tokenu: {e}")
 
-# Add at the top level of the script, before the GUI initialization
-stop_monitoring = threading.Event()
-monitoring_thread = None
-
-class RaceSession:
-    def __init__(self):
-        self.race_id = None
-        self.start_time = None
-        self.is_running = False
-
-    def start(self):
-        """Starts a new race session with unique ID."""
-        self.race_id = f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
-        self.start_time = datetime.datetime.now()
-        self.is_running = True
-        return self.race_id
-
-    def stop(self):
-        """Stops current race session."""
-        self.is_running = False
-        self.race_id = None
-        self.start_time = None
+def sleduj_config():
+    """Po prvním hledání USB načte nastavení, pak v Tk vlákně aplikuje změny z hot-reloadu."""
+    global config_nacten, prihlaseni
+    if not config_nacten:
+        if config.prvni_hledani.is_set():
+            config_nacten = True
+            zmeny_configu.clear()
+            nacti_nastaveni()
+    elif zmeny_configu:
+        zmenene = set(zmeny_configu)
+        zmeny_configu.difference_update(zmenene)
+        vypln_pole(zmenene)
+        if "api_url" in zmenene:
+            zmen_api_url(send_queue, config.get("api_url", API_URL))
+        if (race_session.is_running and zmenene & {"seta_adresar", "uzivatelske_id"}
+                and os.path.isdir(seta_adresar) and uzivatelske_id):
+            prenastav_drahu(race_session.pipeline, seta_adresar, uzivatelske_id)
+        nastaveni_ulozeno_label.config(text="Nastavení znovu načteno z configu")
+    # Přihlášení se mění z USB configu, hot-reloadem i úpravou polí v okně
+    nove_prihlaseni = prihlaseni_z_configu(config)
+    if nove_prihlaseni != prihlaseni:
+        prihlaseni = nove_prihlaseni
+        zmen_prihlaseni(send_queue, prihlaseni)
+    root.after(500, sleduj_config)
 
 def start_recording():
     """Spustí nové nahrávání závodu."""
-    global race_session, monitoring_thread
-    
     if not all([seta_adresar, uzivatelske_id, heslo]):
         messagebox.showerror("Chyba", "Nejprve vyplňte všechna nastavení.")
         return
@@ -451,17 +214,9 @@ def start_recording():
         monitor_filepath = get_monitor_filename(seta_adresar, uzivatelske_id)
         smaz_existujici_soubor(monitor_filepath)
         
+        # Session spustí pipeline, která soubor monitoruje a nahrává rány
         race_id = race_session.start()
         
-        # Start monitoring if not already running
-        if not monitoring_thread or not monitoring_thread.is_alive():
-            stop_monitoring.clear()
-            monitoring_thread = threading.Thread(
-                target=lambda: monitoruj_a_nahravej(seta_adresar, uzivatelske_id, heslo, root),
-                daemon=True
-            )
-            monitoring_thread.start()
-        
         nastaveni_ulozeno_label.config(text=f"Nahrávání spuštěno (Závod ID: {race_id})")
         start_button.config(state=tk.DISABLED)
         stop_button.config(state=tk.NORMAL)
@@ -471,14 +226,12 @@ def start_recording():
 
 def stop_recording():
     """Zastaví nahrávání závodu."""
-    global race_session
-    
     if not race_session.is_running:
         messagebox.showwarning("Varování", "Žádné nahrávání neběží!")
         return
 
     try:
-        race_session.stop()
+        race_session.stop()  # Dozpracuje rozepsaná data a zastaví pipeline
         monitor_filepath = get_monitor_filename(seta_adresar, uzivatelske_id)
         smaz_existujici_soubor(monitor_filepath)
         
@@ -489,74 +242,125 @@ def stop_recording():
     except Exception as e:
         messagebox.showerror("Chyba", f"Chyba při zastavování nahrávání: {e}")
 
-# Add at the top level, before GUI initialization
-race_session = RaceSession()
-
-# GUI okno
-root = tk.Tk()
-root.title("SETA Data Uploader")
-
-seta_adresar = ""
-uzivatelske_id = ""
-heslo = ""
-seta_path = ""
-
-# Vytvoření a rozmístění GUI prvků
-cesta_label = tk.Label(root, text="Cesta k adresáři SETA:")
-cesta_label.grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
-cesta_entry = tk.Entry(root, width=50)
-cesta_entry.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
-vybrat_button = tk.Button(root, text="Vybrat adresář", command=vybrat_adresar)
-vybrat_button.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
-
-id_label = tk.Label(root, text="Uživatelské ID:")
-id_label.grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
-id_entry = tk.Entry(root, width=20)
-id_entry.grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
-id_entry.bind('<KeyRelease>', on_entry_change)
-
-heslo_label = tk.Label(root, text="Heslo:")
-heslo_label.grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
-heslo_entry = tk.Entry(root, width=20, show="*")
-heslo_entry.grid(row=2, column=1, padx=5, pady=5, sticky=tk.W)
-heslo_entry.bind('<KeyRelease>', on_entry_change)
-
-seta_path_label = tk.Label(root, text="Cesta k SETA.exe:")
-seta_path_label.grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
-seta_path_entry = tk.Entry(root, width=50)
-seta_path_entry.grid(row=3, column=1, padx=5, pady=5, sticky=tk.W)
-seta_path_button = tk.Button(root, text="Vybrat", command=vybrat_seta_exe)
-seta_path_button.grid(row=3, column=2, padx=5, pady=5, sticky=tk.W)
-
-# Frame pro tlačítka nahrávání
-button_frame = tk.Frame(root)
-button_frame.grid(row=4, column=0, columnspan=3, pady=10)
-
-start_button = tk.Button(button_frame, text="Start nahrávání", command=start_recording)
-start_button.pack(side=tk.LEFT, padx=5)
-
-stop_button = tk.Button(button_frame, text="Stop nahrávání", command=stop_recording, state=tk.DISABLED)
-stop_button.pack(side=tk.LEFT, padx=5)
-
-# Label pro status
-nastaveni_ulozeno_label = tk.Label(root, text="")
-nastaveni_ulozeno_label.grid(row=5, column=0, columnspan=3)
-
-# Token button
-vytvorit_token_button = tk.Button(root, text="Vytvořit osobní token", command=vytvor_token)
-vytvorit_token_button.grid(row=6, column=0, columnspan=3, pady=10)
-
-nacti_nastaveni() # Načtení nastavení při spuštění
-
-# Add before root.mainloop():
+def prepni_offline():
+    """Zapne nebo vypne offline režim - rány se ukládají do spoolu místo odesílání."""
+    synchronizace = send_queue.synchronizace
+    send_queue.spool = synchronizace.spool if offline_var.get() else None
+    if not offline_var.get():
+        synchronizace.probud()  # Zkusit nahrát spool hned po vypnutí offline režimu
+
+def aktualizuj_zpozdeni():
+    """Každou sekundu zobrazí ve stavovém labelu zpoždění poslední rány a průběh spoolu."""
+    global dalsi_souhrn
+    synchronizace = send_queue.synchronizace
+    if synchronizace.spool.cekajici() or synchronizace.odeslano:
+        spool_label.config(text=synchronizace.popis())
+    if race_session.is_running:
+        zpozdeni = send_queue.metriky.posledni_zpozdeni
+        cekajici = send_queue.outbox.pocet_cekajicich()
+        text = f"Nahrávání běží (Závod ID: {race_session.race_id})"
+        if zpozdeni is not None:
+            text += f" - zpoždění poslední rány {zpozdeni * 1000:.0f} ms"
+        if cekajici:
+            text += f", čeká {cekajici} ran"
+        nastaveni_ulozeno_label.config(text=text)
+        if time.monotonic() >= dalsi_souhrn:
+            logging.info(f"Zpoždění ran: {send_queue.metriky.souhrn()}")
+            dalsi_souhrn = time.monotonic() + 60
+    root.after(1000, aktualizuj_zpozdeni)
+
 def on_closing():
     """Handler for window closing event"""
-    if monitoring_thread and monitoring_thread.is_alive():
-        stop_monitoring.set()
-        monitoring_thread.join(timeout=1.0)
+    if race_session.is_running:
+        race_session.stop()
+    zastav_odesilani(send_queue)
+    config.zastav()
     root.destroy()
 
-# Add just before root.mainloop():
-root.protocol("WM_DELETE_WINDOW", on_closing)
-
-root.mainloop()
\ No newline at end of file
+if __name__ == '__main__':
+    # Configure basic logging
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Config čte hned jen lokální soubor, USB disky prohledává na pozadí
+    config = SetaConfig()
+    zmeny_configu = set()
+    config_nacten = False
+    config.na_zmenu(lambda nastaveni, zmenene: zmeny_configu.update(zmenene))
+    config.spust()
+
+    prihlaseni = prihlaseni_z_configu(config)
+    send_queue = spust_odesilani(config.get("api_url", API_URL), prihlaseni=prihlaseni)
+    race_session = RaceSession(vytvor_pipeline_zavodu)
+
+    # GUI okno
+    root = tk.Tk()
+    root.title("SETA Data Uploader")
+
+    seta_adresar = ""
+    uzivatelske_id = ""
+    heslo = ""
+    seta_path = ""
+
+    # Vytvoření a rozmístění GUI prvků
+    cesta_label = tk.Label(root, text="Cesta k adresáři SETA:")
+    cesta_label.grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+    cesta_entry = tk.Entry(root, width=50)
+    cesta_entry.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
+    vybrat_button = tk.Button(root, text="Vybrat adresář", command=vybrat_adresar)
+    vybrat_button.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+
+    id_label = tk.Label(root, text="Uživatelské ID:")
+    id_label.grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+    id_entry = tk.Entry(root, width=20)
+    id_entry.grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+    id_entry.bind('<KeyRelease>', on_entry_change)
+
+    heslo_label = tk.Label(root, text="Heslo:")
+    heslo_label.grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+    heslo_entry = tk.Entry(root, width=20, show="*")
+    heslo_entry.grid(row=2, column=1, padx=5, pady=5, sticky=tk.W)
+    heslo_entry.bind('<KeyRelease>', on_entry_change)
+
+    seta_path_label = tk.Label(root, text="Cesta k SETA.exe:")
+    seta_path_label.grid(row=3, column=0, padx=5, pady=5, sticky=tk.W)
+    seta_path_entry = tk.Entry(root, width=50)
+    seta_path_entry.grid(row=3, column=1, padx=5, pady=5, sticky=tk.W)
+    seta_path_button = tk.Button(root, text="Vybrat", command=vybrat_seta_exe)
+    seta_path_button.grid(row=3, column=2, padx=5, pady=5, sticky=tk.W)
+
+    # Frame pro tlačítka nahrávání
+    button_frame = tk.Frame(root)
+    button_frame.grid(row=4, column=0, columnspan=3, pady=10)
+
+    start_button = tk.Button(button_frame, text="Start nahrávání", command=start_recording)
+    start_button.pack(side=tk.LEFT, padx=5)
+
+    stop_button = tk.Button(button_frame, text="Stop nahrávání", command=stop_recording, state=tk.DISABLED)
+    stop_button.pack(side=tk.LEFT, padx=5)
+
+    # Label pro status
+    nastaveni_ulozeno_label = tk.Label(root, text="")
+    nastaveni_ulozeno_label.grid(row=5, column=0, columnspan=3)
+
+    # Offline režim a průběh synchronizace spoolu
+    offline_var = tk.BooleanVar(value=False)
+    offline_check = tk.Checkbutton(root, text="Offline režim (ukládat rány lokálně, nahrát později)",
+                                   variable=offline_var, command=prepni_offline)
+    offline_check.grid(row=7, column=0, columnspan=3, sticky=tk.W, padx=5)
+    spool_label = tk.Label(root, text="")
+    spool_label.grid(row=8, column=0, columnspan=3)
+
+    # Token button
+    vytvorit_token_button = tk.Button(root, text="Vytvořit osobní token", command=vytvor_token)
+    vytvorit_token_button.grid(row=6, column=0, columnspan=3, pady=10)
+
+    vypln_pole()  # Lokální nastavení hned, nacti_nastaveni() po prohledání USB disků
+    root.after(100, sleduj_config)
+
+    dalsi_souhrn = time.monotonic() + 60
+    root.after(1000, aktualizuj_zpozdeni)
+
+    # Add just before root.mainloop():
+    root.protocol("WM_DELETE_WINDOW", on_closing)
+
+    root.mainloop()
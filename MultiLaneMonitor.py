@@ -0,0 +1,94 @@
+import glob
+import logging
+import os
+import re
+import threading
+
+from RaceSession import RaceSession
+from UploadPipeline import UploadPipeline
+
+MATCH_VZOR = 'Match_*.tch'
+MATCH_JMENO = re.compile(r'^Match_(.+)\.tch$')
+
+
+class MultiLaneMonitor:
+    """Headless monitor všech Match_*.tch souborů v adresáři SETA.
+
+    Každý nalezený soubor je jedna dráha s vlastním inkrementálním parserem
+    a vlastní RaceSession; všechny dráhy sdílí jednu upload pipeline a jednu
+    odesílací frontu. Smazání souboru ukončí závod dané dráhy, nový soubor
+    založí nový závod. Soubor, který přečká restart monitoru, pokračuje ve
+    svém závodě (send_queue.zavody), takže se jeho rány nenahrají znovu.
+    """
+
+    def __init__(self, adresar, send_queue, fault_handler=None):
+        self.adresar = adresar
+        self.send_queue = send_queue
+        self.sessions = {}  # filepath -> RaceSession
+        self._lock = threading.Lock()
+        self.pipeline = UploadPipeline(adresar, MATCH_VZOR, send_queue, fault_handler,
+                                       nova_draha=self._nova_draha,
+                                       smazana_draha=self._smazana_draha)
+
+    def start(self):
+        """Najde existující soubory drah a spustí sdílenou pipeline."""
+        for filepath in sorted(glob.glob(os.path.join(glob.escape(self.adresar), MATCH_VZOR))):
+            self._nova_draha(filepath)
+        self.pipeline.start()
+        logging.info(f"Multi-lane monitoring spuštěn v {self.adresar}, drah: {len(self.sessions)}")
+
+    def stop(self, vyprazdnit=True):
+        """Zastaví pipeline a ukončí závody všech drah."""
+        self.pipeline.stop(vyprazdnit=vyprazdnit)
+        with self._lock:
+            for session in self.sessions.values():
+                session.stop()
+            self.sessions.clear()
+
+    def zmen_adresar(self, adresar):
+        """Přesune monitoring do jiného adresáře bez restartu pipeline, závody starých drah skončí."""
+        with self._lock:
+            sessions = self.sessions
+            self.sessions = {}
+        for filepath, session in sessions.items():
+            self.pipeline.odeber_drahu(filepath)
+            session.stop()
+        self.adresar = adresar
+        self.pipeline.presmeruj(adresar, MATCH_VZOR)
+        for filepath in sorted(glob.glob(os.path.join(glob.escape(adresar), MATCH_VZOR))):
+            self._nova_draha(filepath)
+        logging.info(f"Multi-lane monitoring přesunut do {adresar}, drah: {len(self.sessions)}")
+
+    def stav(self):
+        """Vrátí stav pipeline a seznam aktivních závodů podle uživatele."""
+        stav = self.pipeline.stav()
+        with self._lock:
+            stav['zavody'] = {self.pipeline.drahy[filepath].user_id: session.race_id
+                              for filepath, session in self.sessions.items()
+                              if filepath in self.pipeline.drahy}
+        return stav
+
+    def _nova_draha(self, filepath):
+        match = MATCH_JMENO.match(os.path.basename(filepath))
+        if not match:
+            return
+        with self._lock:
+            if filepath in self.sessions:
+                return
+            zavody = self.send_queue.zavody
+            session = RaceSession()
+            race_id = session.start(zavody.race_id(filepath) if zavody is not None else None)
+            self.sessions[filepath] = session
+        self.pipeline.pridej_drahu(filepath, match.group(1), race_id)
+        logging.info(f"Nová dráha {match.group(1)}: závod {race_id}")
+
+    def _smazana_draha(self, filepath):
+        self.pipeline.odeber_drahu(filepath)
+        with self._lock:
+            session = self.sessions.pop(filepath, None)
+        if self.send_queue.zavody is not None:
+            self.send_queue.zavody.zapomen(filepath)
+        if session:
+            logging.info(f"Soubor {filepath} smazán, závod {session.race_id} ukončen")
+            session.stop()
+
@@ -0,0 +1,126 @@
+import zlib
+
+# Standardní písma PDF (Helvetica) nemají češtinu v základním kódování, text se
+# proto kóduje v cp1250 a chybějící znaky se namapují na jména glyfů přes
+# /Differences. Znaky se stejným kódem v cp1250 i WinAnsi (á, é, š, ...) není
+# potřeba uvádět.
+ROZDILY_CP1250 = {
+    0x8D: 'Tcaron', 0x9D: 'tcaron', 0xC8: 'Ccaron', 0xCC: 'Ecaron', 0xCF: 'Dcaron', 0xD2: 'Ncaron',
+    0xD8: 'Rcaron', 0xD9: 'Uring', 0xE8: 'ccaron', 0xEC: 'ecaron', 0xEF: 'dcaron', 0xF2: 'ncaron',
+    0xF8: 'rcaron', 0xF9: 'uring',
+}
+PISMA = {False: b'F1', True: b'F2'}
+KAPPA = 0.5523  # Kontrolní body Bézierovy křivky pro čtvrtkruh
+
+
+def _cislo(hodnota):
+    return (f"{hodnota:.2f}".rstrip('0').rstrip('.') or '0').encode('ascii')
+
+
+def _text_pdf(text):
+    data = str(text).encode('cp1250', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class PdfDokument:
+    """Minimální zapisovač PDF (A4, Helvetica, čáry a kruhy) bez dalších závislostí.
+
+    Souřadnice jsou v bodech (1/72 palce), y se měří od horního okraje
+    stránky. Obsah stránek se komprimuje (FlateDecode).
+    """
+
+    SIRKA = 595.28
+    VYSKA = 841.89
+
+    def __init__(self, titulek=None):
+        self.titulek = titulek
+        self.stranky = []
+        self._obsah = None
+
+    def nova_stranka(self):
+        self._obsah = []
+        self.stranky.append(self._obsah)
+
+    def stranka(self, cislo):
+        """Další kreslení půjde na už založenou stránku cislo (od 1), např. pro zápatí."""
+        self._obsah = self.stranky[cislo - 1]
+
+    def _barva(self, barva, vypln=False):
+        r, g, b = barva
+        return b' '.join((_cislo(r), _cislo(g), _cislo(b), b'rg' if vypln else b'RG'))
+
+    def text(self, x, y, text, velikost=10, tucne=False, barva=(0, 0, 0)):
+        """Vypíše řádek textu, y je účaří."""
+        self._obsah.append(b'BT /%s %s Tf %s %s %s Td %s Tj ET' % (
+            PISMA[tucne], _cislo(velikost), self._barva(barva, vypln=True),
+            _cislo(x), _cislo(self.VYSKA - y), _text_pdf(text)))
+
+    def cara(self, x1, y1, x2, y2, sirka=0.5, barva=(0, 0, 0)):
+        self._obsah.append(b'%s %s w %s %s m %s %s l S' % (
+            self._barva(barva), _cislo(sirka), _cislo(x1), _cislo(self.VYSKA - y1),
+            _cislo(x2), _cislo(self.VYSKA - y2)))
+
+    def kruh(self, x, y, polomer, sirka=0.5, barva=(0, 0, 0), vypln=None):
+        """Nakreslí kružnici, s vypln=(r, g, b) vyplněný kruh."""
+        y = self.VYSKA - y
+        k = polomer * KAPPA
+        cesta = [
+            b'%s %s m' % (_cislo(x + polomer), _cislo(y)),
+            b'%s %s %s %s %s %s c' % (_cislo(x + polomer), _cislo(y + k), _cislo(x + k), _cislo(y + polomer),
+                                      _cislo(x), _cislo(y + polomer)),
+            b'%s %s %s %s %s %s c' % (_cislo(x - k), _cislo(y + polomer), _cislo(x - polomer), _cislo(y + k),
+                                      _cislo(x - polomer), _cislo(y)),
+            b'%s %s %s %s %s %s c' % (_cislo(x - polomer), _cislo(y - k), _cislo(x - k), _cislo(y - polomer),
+                                      _cislo(x), _cislo(y - polomer)),
+            b'%s %s %s %s %s %s c' % (_cislo(x + k), _cislo(y - polomer), _cislo(x + polomer), _cislo(y - k),
+                                      _cislo(x + polomer), _cislo(y)),
+        ]
+        if vypln is not None:
+            cesta.insert(0, self._barva(vypln, vypln=True))
+        self._obsah.append(b'%s %s w %s %s' % (self._barva(barva), _cislo(sirka), b' '.join(cesta),
+                                               b'B' if vypln is not None else b'S'))
+
+    def data(self):
+        """Vrátí celý dokument jako bajty."""
+        objekty = []
+
+        def pridej(obsah):
+            objekty.append(obsah)
+            return len(objekty)
+
+        rozdily = b' '.join(b'%d /%s' % (kod, jmeno.encode('ascii')) for kod, jmeno in ROZDILY_CP1250.items())
+        kodovani = pridej(b'<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [%s] >>' % rozdily)
+        pismo = pridej(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding %d 0 R >>' % kodovani)
+        tucne = pridej(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding %d 0 R >>' % kodovani)
+        zdroje = pridej(b'<< /Font << /F1 %d 0 R /F2 %d 0 R >> >>' % (pismo, tucne))
+        stromy = len(objekty) + 1  # Číslo objektu /Pages, přidá se až po stránkách
+        objekty.append(None)
+        stranky = []
+        for obsah in self.stranky:
+            proud = zlib.compress(b'\n'.join(obsah), 6)
+            cislo_obsahu = pridej(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream'
+                                  % (len(proud), proud))
+            stranky.append(pridej(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Resources %d 0 R '
+                                  b'/Contents %d 0 R >>' % (stromy, _cislo(self.SIRKA), _cislo(self.VYSKA),
+                                                            zdroje, cislo_obsahu)))
+        objekty[stromy - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % cislo for cislo in stranky), len(stranky))
+        katalog = pridej(b'<< /Type /Catalog /Pages %d 0 R >>' % stromy)
+        info = pridej(b'<< /Producer (SETA Live-target)%s >>' % (
+            b' /Title ' + _text_pdf(self.titulek) if self.titulek else b''))
+
+        vystup = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        pozice = []
+        for cislo, obsah in enumerate(objekty, 1):
+            pozice.append(len(vystup))
+            vystup += b'%d 0 obj\n%s\nendobj\n' % (cislo, obsah)
+        xref = len(vystup)
+        vystup += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objekty) + 1)
+        vystup += b''.join(b'%010d 00000 n \n' % offset for offset in pozice)
+        vystup += b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%EOF\n' % (
+            len(objekty) + 1, katalog, info, xref)
+        return bytes(vystup)
+
+    def uloz(self, cesta):
+        with open(cesta, 'wb') as file:
+            file.write(self.data())
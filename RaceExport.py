@@ -0,0 +1,383 @@
+import argparse
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from BulkImport import RACE_SOUBOR
+from PdfDokument import PdfDokument
+from SetaCore import API_URL
+from ShotScoring import BULLSEYE_RADIUS, TEN_RING_RADIUS, PrubezneStatistiky, np, skore, statistiky_zavodu
+from ShotStore import ShotStore
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None  # Parquet export vyžaduje pyarrow, CSV a PDF ne
+    pq = None
+
+# Export závodů pro analýzy a tisk:
+#
+#   python -m RaceExport VYSTUP [--store seta-web/data/shots] [--format csv|parquet] [--pdf] [--procesy 4]
+#
+# Závody se čtou postupně ze sloupcového úložiště serveru (nebo přes GET
+# /api/shots), u každého se spočítá skóre ran, součty po sériích a statistiky
+# skupiny. Do VYSTUP se zapíšou tabulky shots, series a races (CSV nebo
+# Parquet) a s --pdf i protokol každého závodu s terčem
+# (pdf/<user>/<race>.pdf), vykreslovaný v poolu procesů.
+
+SERIE = 10  # Ran v jedné sérii
+RADKU_NA_STRANKU = 52
+DAVKA_PARQUET = 65536  # Řádků v jedné row group
+
+# Sloupce tabulek a jejich typ (s = text, i = celé číslo, f = desetinné číslo)
+TABULKY = {
+    'shots': (('user_id', 's'), ('race_id', 's'), ('shot', 'i'), ('series', 'i'), ('index', 'i'),
+              ('time', 's'), ('x', 'f'), ('y', 'f'), ('score', 'f'), ('total', 'f')),
+    'series': (('user_id', 's'), ('race_id', 's'), ('series', 'i'), ('shots', 'i'), ('score', 'f')),
+    'races': (('user_id', 's'), ('race_id', 's'), ('shots', 'i'), ('series', 'i'), ('total', 'f'),
+              ('center_x', 'f'), ('center_y', 'f'), ('extreme_spread', 'f'), ('mean_radius', 'f')),
+}
+
+BARVY_SERII = ((0.12, 0.47, 0.71), (1.0, 0.5, 0.05), (0.17, 0.63, 0.17), (0.84, 0.15, 0.16),
+               (0.58, 0.4, 0.74), (0.55, 0.34, 0.29))
+
+
+def bezpecne_jmeno(text):
+    """Jméno souboru z user_id nebo race_id (bez oddělovačů cest)."""
+    return re.sub(r'[^\w.-]', '_', text) or '_'
+
+
+def _nacti_adresar_zavodu(adresar):
+    """Rány jednoho závodu z úložiště serveru, ve stejném pořadí jako loadRace v shotIngest.ts."""
+    strely = []
+    # Starší závody mají rány po jedné v JSON souborech
+    for jmeno in sorted(jmeno for jmeno in os.listdir(adresar) if jmeno.endswith('.json')):
+        try:
+            with open(os.path.join(adresar, jmeno), 'r', encoding='utf-8') as file:
+                strely.append(json.load(file)['shot_data'])
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ránu {jmeno} v {adresar} nelze načíst: {e}")
+    cesta = os.path.join(adresar, RACE_SOUBOR)
+    if os.path.exists(cesta):
+        store = ShotStore(cesta, jen_cist=True)
+        try:
+            strely.extend(store.strely())
+        finally:
+            store.zavri()
+    return strely
+
+
+def zavody_ze_store(adresar, uzivatele=None, zavody=None):
+    """Postupně vrací (user_id, race_id, rány) z úložiště data/shots/<user>/<race>/."""
+    for user_id in sorted(os.listdir(adresar)):
+        adresar_uzivatele = os.path.join(adresar, user_id)
+        if (uzivatele and user_id not in uzivatele) or not os.path.isdir(adresar_uzivatele):
+            continue
+        for race_id in sorted(os.listdir(adresar_uzivatele)):
+            adresar_zavodu = os.path.join(adresar_uzivatele, race_id)
+            if (zavody and race_id not in zavody) or not os.path.isdir(adresar_zavodu):
+                continue
+            strely = _nacti_adresar_zavodu(adresar_zavodu)
+            if strely:
+                yield user_id, race_id, strely
+
+
+def zavody_z_api(klient, uzivatele=None, zavody=None):
+    """Postupně vrací (user_id, race_id, rány) přes GET /api/shots (ShotApiClient)."""
+    for user_id in uzivatele or klient.strelci():
+        for race_id in klient.zavody(user_id):
+            if zavody and race_id not in zavody:
+                continue
+            strely, _ = klient.nacti_zavod(user_id, race_id)
+            if strely:
+                yield user_id, race_id, [strela.get('shot_data', strela) for strela in strely]
+
+
+def _statistiky_skupiny(x, y):
+    if np is not None:
+        return statistiky_zavodu(x, y)
+    statistiky = PrubezneStatistiky()
+    for bod_x, bod_y in zip(x, y):
+        statistiky.pridej(bod_x, bod_y)
+    return statistiky.stav()
+
+
+def analyzuj_zavod(user_id, race_id, strely, serie=SERIE):
+    """Spočítá skóre ran, součty po sériích a statistiky skupiny jednoho závodu."""
+    rany = []
+    souctu_serii = {}
+    prubezne = 0.0
+    for poradi, strela in enumerate(strely, 1):
+        x = float(strela['x'])
+        y = float(strela['y'])
+        # Uložené skóre má přednost, stejně jako shotScore na webu
+        score = strela['score'] if strela.get('score') is not None else skore(x, y)
+        prubezne = round(prubezne + score, 1)
+        cislo_serie = (poradi - 1) // serie + 1
+        pocet, soucet = souctu_serii.get(cislo_serie, (0, 0.0))
+        souctu_serii[cislo_serie] = (pocet + 1, soucet + score)
+        rany.append({
+            'shot': poradi,
+            'series': cislo_serie,
+            'index': int(strela.get('index') or 0),
+            'time': strela.get('time') or '',
+            'x': x,
+            'y': y,
+            'score': score,
+            'total': prubezne,
+        })
+    skupina = _statistiky_skupiny([rana['x'] for rana in rany], [rana['y'] for rana in rany])
+    return {
+        'user_id': user_id,
+        'race_id': race_id,
+        'rany': rany,
+        'serie': [{'series': cislo, 'shots': pocet, 'score': round(soucet, 1)}
+                  for cislo, (pocet, soucet) in sorted(souctu_serii.items())],
+        'celkem': prubezne,
+        'skupina': skupina,
+    }
+
+
+def radky_tabulek(analyza):
+    """Řádky všech tabulek pro jeden závod."""
+    klic = {'user_id': analyza['user_id'], 'race_id': analyza['race_id']}
+    skupina = analyza['skupina']
+    return {
+        'shots': [dict(klic, **rana) for rana in analyza['rany']],
+        'series': [dict(klic, **serie) for serie in analyza['serie']],
+        'races': [dict(klic, shots=len(analyza['rany']), series=len(analyza['serie']), total=analyza['celkem'],
+                       center_x=skupina.get('stred_x'), center_y=skupina.get('stred_y'),
+                       extreme_spread=skupina.get('extremni_rozptyl'),
+                       mean_radius=skupina.get('prumerny_polomer'))],
+    }
+
+
+class CsvTabulka:
+    def __init__(self, cesta, sloupce):
+        self._soubor = open(cesta, 'w', newline='', encoding='utf-8')
+        self._nazvy = [nazev for nazev, _ in sloupce]
+        self._writer = csv.DictWriter(self._soubor, self._nazvy)
+        self._writer.writeheader()
+
+    def zapis(self, radky):
+        self._writer.writerows(radky)
+
+    def zavri(self):
+        self._soubor.close()
+
+
+class ParquetTabulka:
+    """Zapisuje řádky do Parquet souboru po row groups, paměť drží jen jednu dávku."""
+
+    TYPY = {'s': 'string', 'i': 'int64', 'f': 'float64'}
+
+    def __init__(self, cesta, sloupce):
+        self._schema = pa.schema([(nazev, getattr(pa, self.TYPY[typ])()) for nazev, typ in sloupce])
+        self._writer = pq.ParquetWriter(cesta, self._schema, compression='zstd')
+        self._radky = []
+
+    def zapis(self, radky):
+        self._radky.extend(radky)
+        if len(self._radky) >= DAVKA_PARQUET:
+            self._zapis_davku()
+
+    def _zapis_davku(self):
+        if self._radky:
+            self._writer.write_table(pa.Table.from_pylist(self._radky, schema=self._schema))
+            self._radky = []
+
+    def zavri(self):
+        self._zapis_davku()
+        self._writer.close()
+
+
+def _terc(dokument, analyza, stred_x, stred_y, velikost):
+    """Vykreslí rány závodu na terč se středem (stred_x, stred_y) a šířkou velikost bodů."""
+    rany = analyza['rany']
+    polomer_mm = max([math.hypot(rana['x'], rana['y']) * 1000 for rana in rany] + [TEN_RING_RADIUS])
+    meritko = velikost / 2 / (polomer_mm * 1.15)  # Bodů na milimetr
+    # Pomocné kružnice po "hezkém" kroku, aby jich bylo nejvýš šest
+    krok = next(krok for krok in (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000) if polomer_mm / krok <= 6)
+    kruznice = krok
+    while kruznice <= polomer_mm * 1.15:
+        dokument.kruh(stred_x, stred_y, kruznice * meritko, sirka=0.3, barva=(0.75, 0.75, 0.75))
+        kruznice += krok
+    dokument.cara(stred_x - velikost / 2, stred_y, stred_x + velikost / 2, stred_y, sirka=0.3, barva=(0.75,) * 3)
+    dokument.cara(stred_x, stred_y - velikost / 2, stred_x, stred_y + velikost / 2, sirka=0.3, barva=(0.75,) * 3)
+    dokument.kruh(stred_x, stred_y, TEN_RING_RADIUS * meritko, sirka=0.8)
+    dokument.kruh(stred_x, stred_y, BULLSEYE_RADIUS * meritko, sirka=0.8, vypln=(0, 0, 0))
+    dokument.text(stred_x + velikost / 2 - 60, stred_y + velikost / 2 + 12, f"kružnice po {krok:g} mm", velikost=7)
+
+    polomer_rany = max(min(2.25 * meritko, 6), 2)  # Průměr diabolky 4,5 mm, ale čitelně
+    for rana in rany:
+        barva = BARVY_SERII[(rana['series'] - 1) % len(BARVY_SERII)]
+        dokument.kruh(stred_x + rana['x'] * 1000 * meritko, stred_y - rana['y'] * 1000 * meritko,
+                      polomer_rany, sirka=0.4, barva=(1, 1, 1), vypln=barva)
+    skupina = analyza['skupina']
+    if skupina.get('stred_x') is not None:
+        x = stred_x + skupina['stred_x'] * 1000 * meritko
+        y = stred_y - skupina['stred_y'] * 1000 * meritko
+        dokument.cara(x - 6, y, x + 6, y, sirka=1, barva=(0.85, 0, 0))
+        dokument.cara(x, y - 6, x, y + 6, sirka=1, barva=(0.85, 0, 0))
+
+
+def vykresli_pdf(analyza, cesta):
+    """Vykreslí protokol závodu (souhrn, terč, série a seznam ran) do PDF; běží v procesu poolu."""
+    dokument = PdfDokument(f"{analyza['user_id']} - {analyza['race_id']}")
+    skupina = analyza['skupina']
+    okraj = 50
+
+    dokument.nova_stranka()
+    dokument.text(okraj, 60, f"Střelec: {analyza['user_id']}", velikost=16, tucne=True)
+    dokument.text(okraj, 80, f"Závod: {analyza['race_id']}", velikost=11)
+    dokument.text(okraj, 98, f"Ran: {len(analyza['rany'])}    Celkové skóre: {analyza['celkem']:.1f}",
+                  velikost=11, tucne=True)
+    if skupina.get('stred_x') is not None:
+        dokument.text(okraj, 116, f"Střed skupiny: X={skupina['stred_x'] * 1000:.2f} mm, "
+                                  f"Y={skupina['stred_y'] * 1000:.2f} mm    "
+                                  f"Extrémní rozptyl: {skupina['extremni_rozptyl'] * 1000:.2f} mm    "
+                                  f"Průměrný poloměr: {skupina['prumerny_polomer'] * 1000:.2f} mm", velikost=9)
+    _terc(dokument, analyza, dokument.SIRKA / 2, 300, 320)
+
+    # Série pod terčem ve sloupcích, rány na dalších stránkách
+    y = 500
+    dokument.text(okraj, y, "Série", velikost=11, tucne=True)
+    for poradi, serie in enumerate(analyza['serie']):
+        sloupec, radek = divmod(poradi, 14)
+        if sloupec >= 4:
+            dokument.text(okraj, y + 16 * 15, f"... a dalších {len(analyza['serie']) - poradi} sérií", velikost=9)
+            break
+        barva = BARVY_SERII[(serie['series'] - 1) % len(BARVY_SERII)]
+        dokument.kruh(okraj + sloupec * 125 + 4, y + 16 * (radek + 1) - 3, 3.5, barva=barva, vypln=barva)
+        dokument.text(okraj + sloupec * 125 + 12, y + 16 * (radek + 1),
+                      f"{serie['series']}. ({serie['shots']} ran): {serie['score']:.1f}", velikost=9)
+
+    sloupce = ((okraj, "Rána"), (okraj + 45, "Série"), (okraj + 90, "Čas"), (okraj + 210, "X [mm]"),
+               (okraj + 280, "Y [mm]"), (okraj + 350, "Skóre"), (okraj + 410, "Průběžně"))
+    for zacatek in range(0, len(analyza['rany']), RADKU_NA_STRANKU):
+        dokument.nova_stranka()
+        for x, nadpis in sloupce:
+            dokument.text(x, 60, nadpis, velikost=9, tucne=True)
+        dokument.cara(okraj, 65, dokument.SIRKA - okraj, 65, sirka=0.5)
+        for radek, rana in enumerate(analyza['rany'][zacatek:zacatek + RADKU_NA_STRANKU]):
+            y = 80 + radek * 13.5
+            hodnoty = (rana['shot'], rana['series'], rana['time'], f"{rana['x'] * 1000:.2f}",
+                       f"{rana['y'] * 1000:.2f}", f"{rana['score']:.1f}", f"{rana['total']:.1f}")
+            for (x, _), hodnota in zip(sloupce, hodnoty):
+                dokument.text(x, y, hodnota, velikost=9)
+
+    for cislo in range(1, len(dokument.stranky) + 1):
+        dokument.stranka(cislo)
+        dokument.text(dokument.SIRKA - okraj - 60, dokument.VYSKA - 30, f"Strana {cislo}/{len(dokument.stranky)}",
+                      velikost=8, barva=(0.4, 0.4, 0.4))
+    os.makedirs(os.path.dirname(cesta), exist_ok=True)
+    dokument.uloz(cesta)
+    return cesta
+
+
+class RaceExport:
+    """Proudově zpracuje závody: tabulky zapisuje hned, PDF vykresluje pool procesů."""
+
+    def __init__(self, vystup, format='csv', pdf=False, serie=SERIE, procesy=None):
+        if format == 'parquet' and pa is None:
+            raise ImportError("Export do Parquet vyžaduje balíček pyarrow (pip install pyarrow)")
+        self.vystup = vystup
+        self.format = format
+        self.pdf = pdf
+        self.serie = serie
+        self.procesy = procesy or os.cpu_count() or 1
+        self.statistiky = {'zavody': 0, 'rany': 0, 'pdf': 0, 'chyby': 0}
+
+    def _otevri_tabulky(self):
+        trida = ParquetTabulka if self.format == 'parquet' else CsvTabulka
+        return {nazev: trida(os.path.join(self.vystup, f"{nazev}.{self.format}"), sloupce)
+                for nazev, sloupce in TABULKY.items()}
+
+    def spust(self, zavody):
+        """Exportuje závody (iterovatelné trojice user_id, race_id, rány) a vrátí statistiky běhu."""
+        os.makedirs(self.vystup, exist_ok=True)
+        start = time.perf_counter()
+        tabulky = self._otevri_tabulky()
+        pool = multiprocessing.Pool(self.procesy) if self.pdf else None
+        vykresleni = []
+        try:
+            for user_id, race_id, strely in zavody:
+                analyza = analyzuj_zavod(user_id, race_id, strely, self.serie)
+                for nazev, radky in radky_tabulek(analyza).items():
+                    tabulky[nazev].zapis(radky)
+                if pool:
+                    cesta = os.path.join(self.vystup, 'pdf', bezpecne_jmeno(user_id), f"{bezpecne_jmeno(race_id)}.pdf")
+                    vykresleni.append((race_id, pool.apply_async(vykresli_pdf, (analyza, cesta))))
+                self.statistiky['zavody'] += 1
+                self.statistiky['rany'] += len(strely)
+                logging.debug(f"{user_id}/{race_id}: {len(strely)} ran, {analyza['celkem']:.1f}")
+            for race_id, vysledek in vykresleni:
+                try:
+                    vysledek.get()
+                    self.statistiky['pdf'] += 1
+                except Exception as e:
+                    logging.error(f"PDF závodu {race_id} se nepodařilo vykreslit: {e}")
+                    self.statistiky['chyby'] += 1
+        finally:
+            for tabulka in tabulky.values():
+                tabulka.zavri()
+            if pool:
+                pool.close()
+                pool.join()
+        self.statistiky['cas'] = time.perf_counter() - start
+        return self.statistiky
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m RaceExport",
+                                     description="Export závodů do CSV/Parquet a PDF protokolů.")
+    parser.add_argument('vystup', help="adresář pro exportované soubory")
+    parser.add_argument('--store', help="číst přímo z úložiště serveru (např. seta-web/data/shots)")
+    parser.add_argument('--api-url', default=API_URL, help="URL endpointu /api/shots (bez --store)")
+    parser.add_argument('--user', action='append', help="exportovat jen tohoto střelce (lze opakovat)")
+    parser.add_argument('--race', action='append', help="exportovat jen tento závod (lze opakovat)")
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv', help="formát tabulek")
+    parser.add_argument('--pdf', action='store_true', help="vykreslit i PDF protokol každého závodu")
+    parser.add_argument('--serie', type=int, default=SERIE, help="ran v jedné sérii")
+    parser.add_argument('--procesy', type=int, help="počet procesů pro PDF (výchozí počet CPU)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="podrobné logování")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.store and not os.path.isdir(args.store):
+        logging.error(f"Adresář úložiště neexistuje: {args.store}")
+        return 2
+    try:
+        export = RaceExport(args.vystup, args.format, args.pdf, args.serie, args.procesy)
+    except ImportError as e:
+        logging.error(str(e))
+        return 2
+
+    klient = None
+    if args.store:
+        zavody = zavody_ze_store(args.store, args.user, args.race)
+    else:
+        from ShotApiClient import ShotApiClient
+        klient = ShotApiClient(args.api_url)
+        zavody = zavody_z_api(klient, args.user, args.race)
+    try:
+        statistiky = export.spust(zavody)
+    finally:
+        if klient:
+            klient.zavri()
+    cas = statistiky['cas']
+    logging.info(f"Export dokončen: {statistiky['zavody']} závodů, {statistiky['rany']} ran, "
+                 f"{statistiky['pdf']} PDF, chyb {statistiky['chyby']} za {cas:.2f} s do {args.vystup}")
+    return 1 if statistiky['chyby'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+
+KONEC_HLAVICKY = b'</Game_information>'
+MAX_HLAVICKA = 4096
+
+
+def nove_race_id():
+    """Vrátí nové unikátní ID závodu (čas spuštění + náhodná přípona)."""
+    return f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+
+
+def identita_souboru(filepath):
+    """Vrátí (inode, otisk hlavičky) souboru dráhy; None pro to, co zatím nejde zjistit."""
+    try:
+        with open(filepath, 'rb') as file:
+            inode = os.fstat(file.fileno()).st_ino
+            zacatek = file.read(MAX_HLAVICKA)
+    except OSError:
+        return None, None
+    konec = zacatek.find(KONEC_HLAVICKY)
+    if konec < 0:
+        return inode, None
+    return inode, hashlib.blake2b(zacatek[:konec], digest_size=8).hexdigest()
+
+
+class ZavodyDrah:
+    """Trvalé přiřazení souboru dráhy k race_id, aby restart nezaložil nový závod.
+
+    race_id je součástí otisku rány, takže nový závod po restartu by celý
+    soubor nahrál znovu. Soubor dráhy patří ke stejnému závodu, dokud má stejný
+    inode a stejnou hlavičku (SETA ho přepisuje na místě); smazaný nebo jiný
+    zápas dostane nové race_id. Přiřazení se ukládá do JSON souboru.
+    """
+
+    def __init__(self, cesta=None):
+        self.cesta = cesta
+        self._lock = threading.Lock()
+        self._zavody = {}  # abspath -> {"race_id", "inode", "hlavicka"}
+        if cesta:
+            self._nacti()
+
+    def _nacti(self):
+        try:
+            with open(self.cesta, 'r', encoding='utf-8') as file:
+                zavody = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Závody drah z {self.cesta} nelze načíst: {e}")
+            return
+        # Soubory smazané, když monitor neběžel, už ke svému závodu nepatří
+        self._zavody = {filepath: zavod for filepath, zavod in zavody.items()
+                        if zavod.get('inode') is None or os.path.exists(filepath)}
+
+    def _uloz(self):
+        if not self.cesta:
+            return
+        docasny = self.cesta + '.tmp'
+        try:
+            with open(docasny, 'w', encoding='utf-8') as file:
+                json.dump(self._zavody, file)
+            os.replace(docasny, self.cesta)
+        except OSError as e:
+            logging.warning(f"Závody drah nelze uložit do {self.cesta}: {e}")
+
+    def race_id(self, filepath):
+        """Vrátí race_id závodu v souboru dráhy, pro nový zápas založí nové."""
+        filepath = os.path.abspath(filepath)
+        inode, hlavicka = identita_souboru(filepath)
+        with self._lock:
+            zavod = self._zavody.get(filepath)
+            if zavod and self._stejny(zavod, inode, hlavicka):
+                if (zavod.get('inode'), zavod.get('hlavicka')) != (inode, hlavicka):
+                    # Soubor vznikl nebo se dopsala hlavička až po založení závodu
+                    zavod['inode'] = zavod.get('inode') or inode
+                    zavod['hlavicka'] = zavod.get('hlavicka') or hlavicka
+                    self._uloz()
+                return zavod['race_id']
+            zavod = {'race_id': nove_race_id(), 'inode': inode, 'hlavicka': hlavicka}
+            self._zavody[filepath] = zavod
+            self._uloz()
+            return zavod['race_id']
+
+    @staticmethod
+    def _stejny(zavod, inode, hlavicka):
+        for ulozeno, ted in ((zavod.get('inode'), inode), (zavod.get('hlavicka'), hlavicka)):
+            if ulozeno is not None and ted is not None and ulozeno != ted:
+                return False
+        return True
+
+    def zapomen(self, filepath):
+        """Soubor dráhy byl smazán, příští soubor na stejném místě je nový závod."""
+        with self._lock:
+            if self._zavody.pop(os.path.abspath(filepath), None) is not None:
+                self._uloz()
+
+
+class RaceSession:
+    """Jeden nahrávaný závod - drží jeho ID a životní cyklus upload pipeline.
+
+    vytvor_pipeline je volitelná funkce, která pro race_id vrátí nespuštěnou
+    pipeline; session ji spustí ve start() a zastaví ve stop().
+    """
+
+    def __init__(self, vytvor_pipeline=None):
+        self.race_id = None
+        self.start_time = None
+        self.is_running = False
+        self.pipeline = None
+        self._vytvor_pipeline = vytvor_pipeline
+
+    def start(self, race_id=None):
+        """Starts a new race session with unique ID, or resumes race_id of a kept lane file."""
+        self.race_id = race_id or nove_race_id()
+        self.start_time = datetime.datetime.now()
+        self.is_running = True
+        if self._vytvor_pipeline:
+            self.pipeline = self._vytvor_pipeline(self.race_id)
+            self.pipeline.start()
+        return self.race_id
+
+    def stop(self, vyprazdnit=True):
+        """Stops current race session, optionally draining the pipeline first."""
+        if self.pipeline:
+            self.pipeline.stop(vyprazdnit=vyprazdnit)
+            logging.info(f"Pipeline závodu {self.race_id} zastavena: {self.pipeline.stav()}")
+            self.pipeline = None
+        self.is_running = False
+        self.race_id = None
+        self.start_time = None
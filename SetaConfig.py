@@ -0,0 +1,178 @@
+import logging
+import os
+import threading
+import time
+
+from SetaCore import CONFIG_KLICE, find_usb_drive_config, lokalni_config_cesta, nacti_config, uloz_config_soubor
+
+
+def otisk_disku():
+    """Levný otisk připojených disků - mění se při připojení nebo odpojení média.
+
+    Na Windows je to bitová maska písmen disků, na macOS obsah /Volumes.
+    Drahé hledání config.txt na discích se spouští, jen když se otisk změní.
+    """
+    if os.name == 'nt':
+        try:
+            import ctypes
+            return ctypes.windll.kernel32.GetLogicalDrives()
+        except (ImportError, AttributeError, OSError):
+            return None
+    try:
+        return tuple(sorted(os.listdir("/Volumes")))
+    except OSError:
+        return None
+
+
+class SetaConfig:
+    """Nastavení uploaderu (config.txt) s odloženým zápisem a hot-reloadem.
+
+    Změny z GUI se zapisují až po zpozdeni_zapisu sekundách klidu, atomicky
+    přes dočasný soubor. Vlákno na pozadí hledá config na USB discích (jen
+    když se změní otisk_disku), sleduje aktivní config soubor a při změně
+    ho znovu načte a zavolá callbacky z na_zmenu(). Konstruktor čte jen
+    lokální soubor, start tedy nečeká na prohledávání disků.
+    """
+
+    def __init__(self, cesta=None, hledat_usb=True, zpozdeni_zapisu=1.0, interval_kontroly=1.0):
+        self.lokalni = cesta or lokalni_config_cesta()  # Sem se zapisují změny
+        self.cesta = self.lokalni  # Aktivní config, ze kterého se čte (může být na USB)
+        self.hledat_usb = hledat_usb and cesta is None
+        self.zpozdeni_zapisu = zpozdeni_zapisu
+        self.interval_kontroly = interval_kontroly
+        self.data = {klic: "" for klic in CONFIG_KLICE}
+        self.prvni_hledani = threading.Event()  # Nastaví se po prvním prohledání USB disků
+        self._lock = threading.Lock()
+        self._posluchaci = []
+        self._zapsat_v = None  # time.monotonic(), kdy zapsat odložené změny
+        self._podpis = None  # (mtime, velikost) aktivního souboru při posledním čtení/zápisu
+        self._otisk = None
+        self._signal = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        if not self.hledat_usb:
+            self.prvni_hledani.set()
+        self._nacti()
+
+    def get(self, klic, vychozi=""):
+        with self._lock:
+            return self.data.get(klic) or vychozi
+
+    def __getitem__(self, klic):
+        with self._lock:
+            return self.data[klic]
+
+    def na_zmenu(self, callback):
+        """Zaregistruje callback(nastaveni, zmenene_klice), volá se z vlákna configu."""
+        self._posluchaci.append(callback)
+
+    @staticmethod
+    def _podpis_souboru(cesta):
+        try:
+            stat = os.stat(cesta)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _nacti(self):
+        """Načte aktivní config soubor a vrátí množinu změněných klíčů."""
+        podpis = self._podpis_souboru(self.cesta)
+        nova = {klic: "" for klic in CONFIG_KLICE}
+        if podpis is not None:
+            try:
+                nova = nacti_config(self.cesta)
+            except (OSError, ValueError) as e:
+                # Soubor se může právě zapisovat, zkusí se znovu při další kontrole
+                logging.warning(f"Config {self.cesta} nelze načíst: {e}")
+                return set()
+        with self._lock:
+            self._podpis = podpis
+            zmenene = {klic for klic in CONFIG_KLICE if nova.get(klic, "") != self.data.get(klic, "")}
+            self.data.update(nova)
+        return zmenene
+
+    def nastav(self, **zmeny):
+        """Změní nastavení a naplánuje odložený zápis (opakované změny se sloučí)."""
+        with self._lock:
+            zmenene = {klic for klic, hodnota in zmeny.items() if self.data.get(klic) != hodnota}
+            if not zmenene:
+                return
+            self.data.update(zmeny)
+            self._zapsat_v = time.monotonic() + self.zpozdeni_zapisu
+        self._signal.set()
+
+    def uloz(self):
+        """Hned zapíše nastavení do lokálního config.txt."""
+        with self._lock:
+            data = dict(self.data)
+            self._zapsat_v = None
+        uloz_config_soubor(data, self.lokalni)
+        if self.cesta == self.lokalni:
+            with self._lock:
+                self._podpis = self._podpis_souboru(self.cesta)  # Vlastní zápis není změna zvenku
+
+    def spust(self):
+        """Spustí vlákno pro odložené zápisy, hledání USB a hot-reload."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._smycka, name='config', daemon=True)
+        self._thread.start()
+
+    def zastav(self, timeout=2.0):
+        """Zastaví vlákno a zapíše ještě nezapsané změny."""
+        self._stop.set()
+        self._signal.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._zapsat_v is not None:
+            self.uloz()
+
+    def _smycka(self):
+        while not self._stop.is_set():
+            try:
+                if self.hledat_usb:
+                    self._zkontroluj_usb()
+                self.prvni_hledani.set()
+                if self._zapsat_v is not None and time.monotonic() >= self._zapsat_v:
+                    self.uloz()
+                self._zkontroluj_soubor()
+            except Exception as e:
+                logging.error(f"Chyba při obsluze configu: {e}")
+            cekani = self.interval_kontroly
+            if self._zapsat_v is not None:
+                cekani = min(cekani, max(self._zapsat_v - time.monotonic(), 0))
+            self._signal.wait(cekani)
+            self._signal.clear()
+
+    def _zkontroluj_usb(self):
+        otisk = otisk_disku()
+        if otisk == self._otisk and self.prvni_hledani.is_set():
+            return
+        self._otisk = otisk
+        cesta = find_usb_drive_config() or self.lokalni
+        if cesta != self.cesta:
+            logging.info(f"Aktivní config: {cesta}")
+            self.cesta = cesta
+            self._oznam(self._nacti())
+
+    def _zkontroluj_soubor(self):
+        if self._zapsat_v is not None:
+            return  # Rozepsané změny mají přednost před obsahem souboru
+        if self._podpis_souboru(self.cesta) != self._podpis:
+            zmenene = self._nacti()
+            if zmenene:
+                logging.info(f"Config {self.cesta} změněn: {', '.join(sorted(zmenene))}")
+            self._oznam(zmenene)
+
+    def _oznam(self, zmenene):
+        if not zmenene:
+            return
+        with self._lock:
+            nastaveni = dict(self.data)
+        for callback in self._posluchaci:
+            try:
+                callback(nastaveni, zmenene)
+            except Exception as e:
+                logging.error(f"Chyba při aplikaci změny configu: {e}")
@@ -0,0 +1,279 @@
+import glob
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+
+from RaceSession import ZavodyDrah
+from SetaFaultHandler import SetaFaultHandler
+from ShotFingerprints import ShotFingerprintStore
+from ShotMetrics import ShotMetrics
+from ShotOutbox import ShotOutbox
+from ShotSendQueue import ShotSendQueue
+from ShotSocketUploader import ShotSocketUploader
+from ShotSpool import ShotSpool, SpoolSync
+from ShotTransport import ShotTransport
+from ShotUploader import ShotUploader
+from UploadPipeline import UploadPipeline
+
+# Jádro uploaderu bez GUI - parsování, konfigurace a odesílání ran.
+# Import nemá vedlejší efekty kromě vytvoření adresáře logs/ (soubor chyb a jeho
+# zapisovací vlákno se spustí až s první chybou), takže ho lze použít z GUI
+# (LiveSender.py), z daemonu (SetaDaemon.py) i z testů.
+
+API_URL = "http://localhost:3000/api/shots"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = os.path.join(SCRIPT_DIR, 'logs')
+# api_url je volitelný, prázdná hodnota znamená API_URL
+CONFIG_KLICE = ("seta_adresar", "uzivatelske_id", "heslo", "seta_path", "api_url")
+
+# Opakované chyby stejného souboru se slučují, zápis běží mimo monitorovací vlákna
+fault_handler = SetaFaultHandler(log_file="faults.jsonl", json_lines=True)
+
+def get_monitor_filename(adresar, uzivatelske_id):
+    """Vytvoří celou cestu k monitorovanému souboru."""
+    filename = f"Match_{uzivatelske_id}.tch"
+    return os.path.join(adresar, filename)
+
+def smaz_existujici_soubor(filepath):
+    """Smaže existující soubor pokud existuje."""
+    try:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            logging.info(f"Existující soubor smazán: {filepath}")
+    except Exception as e:
+        logging.error(f"Chyba při mazání souboru: {e}")
+
+def parsuj_tch_soubor(filepath):
+    """Parsuje .tch soubor a extrahuje data."""
+    logging.debug(f"Parsování TCH souboru: {filepath}")
+    try:
+        # Check if file is empty or too small to be valid XML
+        if os.path.getsize(filepath) < 50:  # Increased minimum size for valid SETA XML
+            fault_handler.log_fault(f"Soubor je příliš malý nebo prázdný: {filepath}")
+            logging.warning(f"Soubor je příliš malý: {filepath}")
+            return None
+
+        tree = ET.parse(filepath)
+        root = tree.getroot()
+        
+        # Validate root structure and required elements
+        game_info = root.find('Game_information')
+        if game_info is None:
+            fault_handler.log_fault(f"Chybí Game_information element: {filepath}")
+            logging.warning(f"Chybí Game_information element: {filepath}")
+            return None
+            
+        # Check if user_name is present and not empty
+        user_name = game_info.find('user_name')
+        if user_name is None or not user_name.text:
+            fault_handler.log_fault(f"Prázdné nebo chybějící user_name: {filepath}")
+            logging.warning(f"Prázdné nebo chybějící user_name: {filepath}")
+            return None
+
+        game_data = root.find('GameData')
+        if game_data is None or len(game_data) == 0:
+            fault_handler.log_fault(f"Prázdný nebo chybějící GameData element: {filepath}")
+            logging.warning(f"Prázdný nebo chybějící GameData element: {filepath}")
+            return None
+            
+        shots = []
+        # index je pořadí záznamu v GameData včetně vadných, stejně jako u TchStreamParser
+        for index, data_element in enumerate(game_data):
+            try:
+                shot_data = {
+                    'index': index,
+                    'x': float(data_element.find('x_data').text),
+                    'y': float(data_element.find('y_data').text),
+                    'time': data_element.find('time_stamp').text
+                }
+                shots.append(shot_data)
+            except (ValueError, AttributeError) as e:
+                fault_handler.log_fault(f"Neplatná data v záznamu {data_element.tag}: {str(e)}")
+                logging.warning(f"Neplatná data v záznamu {data_element.tag}: {str(e)}")
+                continue
+            
+        if not shots:
+            fault_handler.log_fault(f"Žádná validní data nebyla nalezena: {filepath}")
+            logging.warning(f"Žádná validní data nebyla nalezena: {filepath}")
+            return None
+                
+        logging.debug(f"Data extrahována: {shots}")
+        return shots
+            
+    except ET.ParseError as e:
+        fault_handler.log_fault(f"Chyba při parsování XML souboru {filepath}: {str(e)}")
+        logging.error(f"Chyba při parsování XML souboru {filepath}: {str(e)}")
+        return None
+    except Exception as e:
+        fault_handler.log_fault(f"Neočekávaná chyba při zpracování souboru {filepath}: {str(e)}")
+        logging.error(f"Neočekávaná chyba při zpracování souboru {filepath}: {str(e)}")
+        return None
+
+def find_usb_drive_config(filename="config.txt"):
+    """
+    Scans for connected USB drives and checks if the config file exists on any of them.
+    Returns the path to the config file if found, otherwise None.
+    """
+    logging.debug("Hledám USB disky...")
+    drives = []
+
+    if os.name == 'nt':  # Windows
+        # Improved Windows drive detection (requires pywin32)
+        try:
+            import win32api
+            drive_letters = [d for d in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' if win32api.GetDriveType(d + ":\\") == win32api.DRIVE_REMOVABLE]
+            drives = [d + ":\\" for d in drive_letters]
+        except ImportError:
+            logging.warning("pywin32 není nainstalováno. Používám základní detekci disků.")
+            drives = [d + ":\\" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(d + ":")]
+    else:  # macOS
+        volumes_path = "/Volumes"
+        if os.path.exists(volumes_path):
+            try:
+                # Get all items in /Volumes
+                items = os.listdir(volumes_path)
+                logging.debug(f"Nalezené položky v /Volumes: {items}")
+                
+                # Filter out system volumes and hidden items
+                volumes = [item for item in items 
+                         if not item.startswith('.') 
+                         and os.path.isdir(os.path.join(volumes_path, item))
+                         and item != "Macintosh HD"]  # Skip main system drive
+                
+                drives = [os.path.join(volumes_path, vol) for vol in volumes]
+                logging.debug(f"Filtrované disky: {drives}")
+            except OSError as e:
+                logging.error(f"Chyba při čtení /Volumes: {e}")
+                drives = []
+        else:
+            logging.warning("/Volumes neexistuje")
+            drives = []
+
+    logging.debug(f"Nalezené potenciální disky: {drives}")
+
+    for drive in drives:
+        config_path = os.path.join(drive, filename)
+        logging.debug(f"Kontroluji cestu: {config_path}")
+        if os.path.exists(config_path):
+            logging.debug(f"Konfigurační soubor nalezen na: {config_path}")
+            return config_path
+
+    logging.debug("Konfigurační soubor nenalezen na žádném USB disku.")
+    return None
+
+
+def lokalni_config_cesta():
+    """Vrátí cestu ke config.txt vedle skriptu."""
+    return os.path.join(SCRIPT_DIR, "config.txt")
+
+def najdi_config():
+    """Vrátí cestu ke config.txt, nejprve na USB, jinak lokální (i když neexistuje)."""
+    return find_usb_drive_config() or lokalni_config_cesta()
+
+def nacti_config(config_filepath):
+    """Načte config soubor a vrátí slovník se všemi klíči nastavení."""
+    with open(config_filepath, 'r') as config_file:
+        config_data = json.load(config_file)
+    return {klic: config_data.get(klic, "") for klic in CONFIG_KLICE}
+
+def uloz_config_soubor(config_data, config_filepath=None):
+    """Atomicky zapíše nastavení do config souboru (přes dočasný soubor)."""
+    config_filepath = config_filepath or lokalni_config_cesta()
+    docasny = config_filepath + '.tmp'
+    with open(docasny, 'w') as config_file:
+        json.dump(config_data, config_file)
+        config_file.flush()
+        os.fsync(config_file.fileno())
+    os.replace(docasny, config_filepath)
+
+def spust_odesilani(api_url=API_URL, log_dir=LOG_DIR, push_kanal=True, offline=False, adaptivni=False,
+                    prihlaseni=None):
+    """Vytvoří uploader, outbox a odesílací frontu a spustí odesílací vlákno.
+
+    prihlaseni=(uzivatelske_id, heslo) se posílá s každou dávkou, vyžaduje ho ingest brána.
+    """
+    # Push kanál (socket.io) s HTTP jako zálohou, nebo jen HTTP
+    uploader = (ShotSocketUploader(api_url, prihlaseni=prihlaseni) if push_kanal
+                else ShotUploader(api_url, prihlaseni=prihlaseni))
+    if adaptivni:
+        # Na pomalé lince (hotspot) mikrodávky a kompaktní binární formát
+        uploader = ShotTransport(uploader)
+    # Rány čekají v journalu v logs/, dokud je server nepotvrdí
+    outbox = ShotOutbox(os.path.join(log_dir, 'outbox.jsonl'))
+    # Otisky už zařazených ran přežijí restart, duplicity se neodešlou znovu
+    otisky = ShotFingerprintStore(os.path.join(log_dir, 'fingerprints.bin'))
+    # Offline režim ukládá rány do spoolu, synchronizace ho nahraje po obnovení spojení
+    spool = ShotSpool(os.path.join(log_dir, 'spool'))
+    send_queue = ShotSendQueue(uploader, fault_handler, outbox=outbox, otisky=otisky,
+                               metriky=ShotMetrics(), spool=spool if offline else None,
+                               karantena=os.path.join(log_dir, 'quarantine.jsonl'))
+    send_queue.synchronizace = SpoolSync(spool, ShotUploader(api_url, gzip_body=True, prihlaseni=prihlaseni),
+                                         send_queue, fault_handler, karantena=send_queue.karantena)
+    # race_id souborů drah, aby restart se zachovaným souborem nezaložil nový závod
+    send_queue.zavody = ZavodyDrah(os.path.join(log_dir, 'races.json'))
+    send_queue.spust()
+    send_queue.synchronizace.spust()
+    return send_queue
+
+def zmen_api_url(send_queue, api_url):
+    """Přepne odesílání i synchronizaci spoolu na jiný endpoint bez restartu."""
+    send_queue.uploader.nastav_url(api_url)
+    send_queue.synchronizace.uploader.nastav_url(api_url)
+    logging.info(f"Endpoint změněn na {api_url}")
+
+def prihlaseni_z_configu(nastaveni):
+    """Vrátí (uzivatelske_id, heslo) z configu pro ingest bránu, None pokud některé chybí."""
+    if nastaveni.get('uzivatelske_id') and nastaveni.get('heslo'):
+        return nastaveni.get('uzivatelske_id'), nastaveni.get('heslo')
+    return None
+
+def prihlaseni_ze_souboru(config_filepath=None):
+    """Přihlášení z config souboru (výchozí najdi_config()) pro nástroje příkazové řádky."""
+    config_filepath = config_filepath or najdi_config()
+    try:
+        return prihlaseni_z_configu(nacti_config(config_filepath))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Přihlášení z configu {config_filepath} nelze načíst: {e}")
+        return None
+
+def zmen_prihlaseni(send_queue, prihlaseni):
+    """Přepne přihlášení odesílání i synchronizace spoolu bez restartu."""
+    send_queue.uploader.nastav_prihlaseni(prihlaseni)
+    send_queue.synchronizace.uploader.nastav_prihlaseni(prihlaseni)
+    logging.info(f"Přihlášení změněno na uživatele {prihlaseni[0] if prihlaseni else None!r}")
+
+def zastav_odesilani(send_queue):
+    """Zastaví odesílací vlákno, uloží outbox a zavře spojení."""
+    send_queue.zastav()
+    send_queue.synchronizace.zastav()
+    send_queue.synchronizace.uploader.zavri()
+    send_queue.synchronizace.spool.zavri()
+    send_queue.outbox.zavri()
+    send_queue.otisky.zavri()
+    logging.info(f"Metriky uploaderu: {send_queue.uploader.metriky()}")
+    logging.info(f"Zpoždění ran: {send_queue.metriky.souhrn()}")
+    logging.info(f"Offline {send_queue.synchronizace.popis()}")
+    send_queue.uploader.zavri()
+
+def vytvor_pipeline(adresar, uzivatelske_id, race_id, send_queue):
+    """Vytvoří upload pipeline pro monitorovaný soubor jednoho uživatele."""
+    monitor_filepath = get_monitor_filename(adresar, uzivatelske_id)
+    logging.info(f"Monitoruji soubor: {monitor_filepath}")
+    pipeline = UploadPipeline(adresar, glob.escape(os.path.basename(monitor_filepath)),
+                              send_queue, fault_handler)
+    pipeline.pridej_drahu(monitor_filepath, uzivatelske_id, race_id)
+    return pipeline
+
+def prenastav_drahu(pipeline, adresar, uzivatelske_id):
+    """Přesměruje běžící pipeline jedné dráhy na jiný adresář nebo uživatele, závod pokračuje."""
+    monitor_filepath = get_monitor_filename(adresar, uzivatelske_id)
+    if monitor_filepath in pipeline.drahy:
+        return
+    race_id = None
+    for filepath, draha in list(pipeline.drahy.items()):
+        race_id = draha.race_id
+        pipeline.odeber_drahu(filepath)
+    logging.info(f"Monitoruji soubor: {monitor_filepath}")
+    pipeline.presmeruj(adresar, glob.escape(os.path.basename(monitor_filepath)))
+    pipeline.pridej_drahu(monitor_filepath, uzivatelske_id, race_id)
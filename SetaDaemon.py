@@ -0,0 +1,161 @@
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from MultiLaneMonitor import MultiLaneMonitor
+from RaceSession import RaceSession
+from ShotMetrics import MetrikyServer
+from SetaConfig import SetaConfig
+from SetaCore import (API_URL, fault_handler, get_monitor_filename, smaz_existujici_soubor, spust_odesilani,
+                      zastav_odesilani, vytvor_pipeline, prenastav_drahu, zmen_api_url,
+                      prihlaseni_z_configu, zmen_prihlaseni)
+
+# Headless daemon bez Tkinter: python -m SetaDaemon [--multi-lane] ...
+
+
+def parsuj_argumenty(argv=None):
+    """Zpracuje argumenty příkazové řádky."""
+    parser = argparse.ArgumentParser(prog="python -m SetaDaemon",
+                                     description="Headless uploader ran ze SETA.")
+    parser.add_argument('--adresar', help="adresář SETA se soubory Match_*.tch (jinak z configu)")
+    parser.add_argument('--user-id', help="uživatelské ID monitorované dráhy (jinak z configu)")
+    parser.add_argument('--api-url', help=f"URL endpointu /api/shots (jinak z configu, výchozí {API_URL})")
+    parser.add_argument('--config', help="cesta ke config.txt")
+    parser.add_argument('--no-usb', action='store_true', help="nehledat config na USB discích")
+    parser.add_argument('--multi-lane', action='store_true',
+                        help="monitorovat všechny Match_*.tch soubory v adresáři")
+    parser.add_argument('--keep-existing', action='store_true',
+                        help="nemazat existující Match soubor před startem závodu")
+    parser.add_argument('--status-interval', type=float, default=60.0,
+                        help="jak často logovat stav pipeline a zpoždění ran (s), 0 = nikdy")
+    parser.add_argument('--no-push', action='store_true',
+                        help="posílat rány jen přes HTTP, bez trvalého socket.io spojení")
+    parser.add_argument('--offline', action='store_true',
+                        help="offline režim: rány ukládat do logs/spool/ a nahrát je po obnovení spojení")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="adaptivní přenos pro pomalé linky: mikrodávky do 100 ms a kompaktní binární formát")
+    parser.add_argument('--metrics-port', type=int, default=9464,
+                        help="port lokálního endpointu /metrics pro Prometheus, 0 = vypnuto")
+    parser.add_argument('-v', '--verbose', action='store_true', help="podrobné logování")
+    return parser.parse_args(argv)
+
+
+def nacti_nastaveni(args, config):
+    """Sloučí config s argumenty příkazové řádky (argumenty mají přednost)."""
+    nastaveni = dict(config.data)
+    if args.adresar:
+        nastaveni['seta_adresar'] = args.adresar
+    if args.user_id:
+        nastaveni['uzivatelske_id'] = args.user_id
+    if args.api_url:
+        nastaveni['api_url'] = args.api_url
+    nastaveni['api_url'] = nastaveni.get('api_url') or API_URL
+    return nastaveni
+
+
+def main(argv=None):
+    args = parsuj_argumenty(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    start = time.perf_counter()
+
+    # Config se hledá na USB discích na pozadí; čeká se jen, když lokálně chybí nastavení
+    config = SetaConfig(args.config) if args.config else SetaConfig(hledat_usb=not args.no_usb)
+    config.spust()
+    nastaveni = nacti_nastaveni(args, config)
+    if not nastaveni.get('seta_adresar') or not (args.multi_lane or nastaveni.get('uzivatelske_id')):
+        config.prvni_hledani.wait(timeout=10)
+        nastaveni = nacti_nastaveni(args, config)
+    adresar = nastaveni.get('seta_adresar')
+    uzivatelske_id = nastaveni.get('uzivatelske_id')
+    if not adresar or not os.path.isdir(adresar):
+        logging.error(f"Adresář SETA neexistuje nebo není zadán: {adresar!r}")
+        config.zastav()
+        return 2
+    if not args.multi_lane and not uzivatelske_id:
+        logging.error("Chybí uživatelské ID (--user-id nebo config), nebo použijte --multi-lane")
+        config.zastav()
+        return 2
+
+    stop = threading.Event()
+
+    def ukonci(signum, frame):
+        logging.info(f"Přijat signál {signum}, ukončuji...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, ukonci)
+    signal.signal(signal.SIGTERM, ukonci)
+    if hasattr(signal, 'SIGBREAK'):
+        signal.signal(signal.SIGBREAK, ukonci)  # Ctrl+Break na Windows
+
+    # Přihlášení z configu (uzivatelske_id a heslo) vyžaduje ingest brána, web ho ignoruje
+    send_queue = spust_odesilani(nastaveni['api_url'], push_kanal=not args.no_push, offline=args.offline,
+                                 adaptivni=args.adaptive, prihlaseni=prihlaseni_z_configu(nastaveni))
+    metriky_server = None
+    if args.metrics_port:
+        try:
+            metriky_server = MetrikyServer(send_queue.metriky, send_queue, args.metrics_port)
+            metriky_server.spust()
+        except OSError as e:
+            logging.warning(f"Endpoint metrik nelze spustit na portu {args.metrics_port}: {e}")
+    if args.multi_lane:
+        monitor = MultiLaneMonitor(adresar, send_queue, fault_handler)
+        monitor.start()
+        stav = monitor.stav
+    else:
+        monitor_filepath = get_monitor_filename(adresar, uzivatelske_id)
+        if not args.keep_existing:
+            smaz_existujici_soubor(monitor_filepath)
+            send_queue.zavody.zapomen(monitor_filepath)
+        monitor = RaceSession(lambda race_id: vytvor_pipeline(adresar, uzivatelske_id, race_id, send_queue))
+        # Zachovaný soubor pokračuje ve svém závodě, jeho rány se nenahrají znovu
+        race_id = monitor.start(send_queue.zavody.race_id(monitor_filepath))
+        logging.info(f"Nahrávání spuštěno (Závod ID: {race_id})")
+        stav = monitor.pipeline.stav
+
+    def aplikuj_zmenu(zmenene_nastaveni, zmenene):
+        """Hot-reload configu - endpoint, přihlášení a dráhu změní bez restartu monitoringu."""
+        nove = nacti_nastaveni(args, config)
+        if 'api_url' in zmenene and not args.api_url:
+            zmen_api_url(send_queue, nove['api_url'])
+        if zmenene & {'uzivatelske_id', 'heslo'}:
+            zmen_prihlaseni(send_queue, prihlaseni_z_configu(nove))
+        if not zmenene & {'seta_adresar', 'uzivatelske_id'}:
+            return
+        if not os.path.isdir(nove['seta_adresar']):
+            logging.warning(f"Adresář SETA z configu neexistuje: {nove['seta_adresar']!r}")
+        elif args.multi_lane:
+            if nove['seta_adresar'] != monitor.adresar:
+                monitor.zmen_adresar(nove['seta_adresar'])
+        elif nove['uzivatelske_id']:
+            prenastav_drahu(monitor.pipeline, nove['seta_adresar'], nove['uzivatelske_id'])
+
+    config.na_zmenu(aplikuj_zmenu)
+    # Config z USB se mohl načíst ještě před registrací posluchače
+    aktualni = nacti_nastaveni(args, config)
+    aplikuj_zmenu(aktualni, {klic for klic in aktualni if aktualni[klic] != nastaveni.get(klic)})
+    logging.info(f"Monitoring běží ({(time.perf_counter() - start) * 1000:.0f} ms od startu)")
+    try:
+        dalsi_stav = time.monotonic() + args.status_interval
+        # Krátký timeout, aby signál zastavil daemon i na Windows
+        while not stop.wait(0.5):
+            if args.status_interval and time.monotonic() >= dalsi_stav:
+                logging.info(f"Stav pipeline: {stav()}")
+                logging.info(f"Zpoždění ran: {send_queue.metriky.souhrn()}")
+                logging.info(f"Offline {send_queue.synchronizace.popis()}")
+                dalsi_stav = time.monotonic() + args.status_interval
+    finally:
+        config.zastav()
+        monitor.stop()
+        if metriky_server:
+            metriky_server.zastav()
+        zastav_odesilani(send_queue)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
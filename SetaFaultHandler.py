@@ -1,25 +1,153 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formátuje záznam jako jeden JSON objekt na řádek."""
+
+    def format(self, record):
+        zaznam = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'repeated', None):
+            zaznam['repeated'] = record.repeated
+        return json.dumps(zaznam, ensure_ascii=False)
+
+
 class SetaFaultHandler:  # Renamed class
-    def __init__(self, log_file="faults.log"):
+    """Zapisuje chyby do logs/ bez blokování volajícího vlákna.
+
+    Zápis na disk běží přes QueueHandler/QueueListener ve vlastním vlákně,
+    soubor se rotuje podle velikosti (rotace='velikost') nebo denně
+    (rotace='cas'). Stejná chyba se v okně potlaceni sekund zapíše jen
+    jednou, opakování se pak shrnou do jednoho řádku s počtem. Soubor i
+    vlákno se otevřou až s první chybou, vytvoření handleru jen založí logs/.
+    """
+
+    def __init__(self, log_file="faults.log", json_lines=False, rotace='velikost',
+                 max_bytes=1024 * 1024, backup_count=5, potlaceni=60.0):
         log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        log_path = os.path.join(log_dir, log_file)
+        self.log_path = os.path.join(log_dir, log_file)
+        self.json_lines = json_lines
+        self.rotace = rotace
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
 
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.ERROR)
+        self.potlaceni = potlaceni
+        self._lock = threading.Lock()
+        self._opakovani = {}  # zpráva -> [čas prvního zápisu, počet potlačených]
+        self._posledni_uklid = time.monotonic()
+        self._queue_handler = None
+        self._listener = None
 
-        file_handler = logging.FileHandler(log_path)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
+    def _spust(self):
+        """Otevře log soubor a spustí zapisovací vlákno (při první chybě)."""
+        with self._lock:
+            if self._queue_handler is not None:
+                return
+            if self.rotace == 'cas':
+                file_handler = logging.handlers.TimedRotatingFileHandler(
+                    self.log_path, when='midnight', backupCount=self.backup_count, encoding='utf-8')
+            else:
+                file_handler = logging.handlers.RotatingFileHandler(
+                    self.log_path, maxBytes=self.max_bytes, backupCount=self.backup_count, encoding='utf-8')
+            if self.json_lines:
+                formatter = JsonLinesFormatter()
+            else:
+                formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            file_handler.setFormatter(formatter)
 
-        self.logger.addHandler(file_handler)
+            # Zápis na disk dělá vlákno listeneru, log_fault jen vloží záznam do fronty
+            fronta = queue.SimpleQueue()
+            self._queue_handler = logging.handlers.QueueHandler(fronta)
+            self._listener = logging.handlers.QueueListener(fronta, file_handler)
+            self._listener.start()
+            self.logger.addHandler(self._queue_handler)
+            atexit.register(self.zavri)
 
     def log_fault(self, message):
-        self.logger.error(message)
+        """Zaloguje chybu; opakování stejné zprávy v okně potlačení jen spočítá."""
+        ted = time.monotonic()
+        with self._lock:
+            stav = self._opakovani.get(message)
+            if stav and ted - stav[0] < self.potlaceni:
+                stav[1] += 1
+                souhrny = self._uklid(ted)
+            else:
+                self._opakovani[message] = [ted, 0]
+                souhrny = self._uklid(ted)
+                if stav and stav[1]:
+                    souhrny.append((message, stav[1]))  # Souhrn za minulé okno
+                souhrny.append((message, 0))
+
+        for zprava, opakovano in souhrny:
+            self._zapis(zprava, opakovano)
+
+    def _uklid(self, ted):
+        """Vrátí souhrny za zprávy, jejichž okno potlačení vypršelo (nejvýše jednou za sekundu)."""
+        if ted - self._posledni_uklid < 1.0:
+            return []
+        self._posledni_uklid = ted
+        souhrny = []
+        for zprava, (prvni, pocet) in list(self._opakovani.items()):
+            if ted - prvni >= self.potlaceni:
+                del self._opakovani[zprava]
+                if pocet:
+                    souhrny.append((zprava, pocet))
+        return souhrny
+
+    def _zapis(self, message, opakovano=0):
+        self._spust()
+        if opakovano:
+            self.logger.error(f"{message} (opakováno {opakovano}×)", extra={'repeated': opakovano})
+        else:
+            self.logger.error(message)
+
+    def zavri(self):
+        """Zapíše čekající souhrny opakování a zastaví zapisovací vlákno."""
+        with self._lock:
+            souhrny = [(zprava, pocet) for zprava, (_, pocet) in self._opakovani.items() if pocet]
+            self._opakovani.clear()
+        for zprava, pocet in souhrny:
+            self._zapis(zprava, pocet)
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+            self.logger.removeHandler(self._queue_handler)
+            self._queue_handler = None
+
+    def do_fronty(self, fronta):
+        """V podprocesu: chyby vkládá do fronty rodiče (prijimej), soubor rotuje jen jeden proces."""
+        with self._lock:
+            if self._queue_handler is not None:
+                self.logger.removeHandler(self._queue_handler)
+            # Vlákno listeneru zůstalo v rodiči (fork), tady se jen zapomene
+            self._listener = None
+            self._queue_handler = logging.handlers.QueueHandler(fronta)
+            self.logger.addHandler(self._queue_handler)
+
+    def prijimej(self, fronta):
+        """Zapisuje chyby, které do fronty (multiprocessing.Queue) vkládají podprocesy.
+
+        Vrátí QueueListener, po skončení podprocesů se zastaví přes stop().
+        """
+        self._spust()
+        listener = logging.handlers.QueueListener(fronta, self._queue_handler)
+        listener.start()
+        return listener
 
 if __name__ == '__main__':
     # Example Usage
@@ -0,0 +1,58 @@
+import logging
+
+import requests
+
+from SetaCore import API_URL
+
+
+class ShotApiClient:
+    """Čtecí klient pro GET /api/shots s kurzorem, pro export a analýzy.
+
+    Server vrací k ranám kurzor (počet uložených ran do konce odpovědi),
+    takže opakované čtení závodu stáhne jen rány přidané od minula.
+    """
+
+    def __init__(self, api_url=API_URL, timeout=(3.05, 30), limit=5000):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.limit = limit  # Ran na jednu stránku odpovědi
+        self.session = requests.Session()
+        self.kurzory = {}  # (user_id, race_id) -> kurzor po posledním čtení
+
+    def _get(self, **parametry):
+        response = self.session.get(self.api_url, params=parametry, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def strelci(self):
+        """Seznam user_id všech střelců."""
+        return self._get().get('shooters', [])
+
+    def zavody(self, user_id):
+        """Seznam race_id závodů střelce."""
+        return self._get(user_id=user_id).get('races', [])
+
+    def nacti_zavod(self, user_id, race_id, since=0):
+        """Stáhne rány závodu od kurzoru since po stránkách a vrátí (rány, nový kurzor)."""
+        strely = []
+        kurzor = since
+        while True:
+            data = self._get(user_id=user_id, race_id=race_id, since=kurzor, limit=self.limit)
+            stranka = data.get('shots', [])
+            strely.extend(stranka)
+            kurzor = data.get('cursor', kurzor + len(stranka))
+            if not stranka or kurzor >= data.get('total', kurzor):
+                return strely, kurzor
+
+    def nove_rany(self, user_id, race_id):
+        """Rány závodu přidané od posledního volání (poprvé celý závod)."""
+        klic = (user_id, race_id)
+        strely, kurzor = self.nacti_zavod(user_id, race_id, self.kurzory.get(klic, 0))
+        if kurzor < self.kurzory.get(klic, 0):
+            logging.warning(f"Závod {race_id} má méně ran než minule, čtu ho znovu celý")
+            strely, kurzor = self.nacti_zavod(user_id, race_id)
+        self.kurzory[klic] = kurzor
+        return strely
+
+    def zavri(self):
+        self.session.close()
@@ -0,0 +1,153 @@
+import gzip
+import zlib
+
+# Kompaktní binární formát dávky ran, stejný dekóduje seta-web (src/lib/shotCodec.ts).
+#
+# Rámec: 'SETB' | u8 verze | u8 příznaky (bit 0 = tělo je gzip) | tělo
+# Tělo:  řetězec user_id | řetězec race_id | varint počet ran | rány
+# Rána:  varint příznaky (bit 0 = id, bit 1 = score)
+#        | zigzag dx | zigzag dy   rozdíl proti předchozí ráně v mikrometrech
+#        | zigzag rozdíl indexu proti předchozí ráně | řetězec time
+#        | [id u64 big-endian] | [varint score * 10]
+# Řetězec je varint délka a UTF-8 bajty. Souřadnice ze SETA mají 6 desetinných
+# míst v metrech, kvantování na mikrometry je tedy bezeztrátové. Průběžné
+# statistiky (stats) se v kompaktním formátu neposílají.
+
+MAGIC = b'SETB'
+VERZE = 1
+GZIP = 0x01
+TYP_OBSAHU = 'application/x-seta-shots'
+KVANTUM = 1e6  # Metry -> mikrometry
+MIN_KOMPRESE = 128  # Kratší tělo se gzipem nezmenší
+MAX_ROZBALENO = 8 * 1024 * 1024  # Nejvíc bajtů, na které se smí rozbalit gzip tělo
+
+
+class PrilisVelkeTelo(ValueError):
+    """Gzip tělo by se rozbalilo na víc než povolený počet bajtů."""
+
+
+def rozbal_gzip(data, max_velikost=MAX_ROZBALENO):
+    """Rozbalí gzip data nejvýše na max_velikost bajtů (ochrana před gzip bombou)."""
+    rozbalovac = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        vysledek = rozbalovac.decompress(data, max_velikost)
+    except zlib.error as e:
+        raise ValueError(f"Neplatná gzip data: {e}") from None
+    if not rozbalovac.eof:
+        if len(vysledek) >= max_velikost:
+            raise PrilisVelkeTelo(f"Rozbalené tělo je větší než {max_velikost} B")
+        raise ValueError("Neúplná gzip data")
+    return vysledek
+
+
+def _varint(hodnota, vystup):
+    while hodnota > 0x7f:
+        vystup.append((hodnota & 0x7f) | 0x80)
+        hodnota >>= 7
+    vystup.append(hodnota)
+
+
+def _zigzag(hodnota, vystup):
+    _varint(hodnota * 2 if hodnota >= 0 else -hodnota * 2 - 1, vystup)
+
+
+def _retezec(text, vystup):
+    data = str(text or '').encode('utf-8')
+    _varint(len(data), vystup)
+    vystup += data
+
+
+def _je_id(id_strely):
+    return isinstance(id_strely, str) and len(id_strely) == 16 and all(c in '0123456789abcdef' for c in id_strely)
+
+
+def zakoduj_davku(payload, komprimovat=True):
+    """Zakóduje payload {user_id, race_id, shots} do rámce, nebo vrátí None.
+
+    None znamená, že dávku nelze zakódovat bez ztráty (např. id, které není
+    16místný hex otisk) a má se poslat jako JSON.
+    """
+    telo = bytearray()
+    _retezec(payload['user_id'], telo)
+    _retezec(payload['race_id'], telo)
+    strely = payload['shots']
+    _varint(len(strely), telo)
+    x = y = index = 0
+    for strela in strely:
+        id_strely = strela.get('id')
+        score = strela.get('score')
+        if id_strely is not None and not _je_id(id_strely):
+            return None
+        priznaky = (1 if id_strely else 0) | (2 if score is not None else 0)
+        _varint(priznaky, telo)
+        nove_x = round(float(strela['x']) * KVANTUM)
+        nove_y = round(float(strela['y']) * KVANTUM)
+        nove_index = int(strela.get('index') or 0)
+        _zigzag(nove_x - x, telo)
+        _zigzag(nove_y - y, telo)
+        _zigzag(nove_index - index, telo)
+        x, y, index = nove_x, nove_y, nove_index
+        _retezec(strela.get('time'), telo)
+        if id_strely:
+            telo += bytes.fromhex(id_strely)
+        if score is not None:
+            _varint(round(score * 10), telo)
+
+    priznaky = 0
+    if komprimovat and len(telo) >= MIN_KOMPRESE:
+        telo = gzip.compress(bytes(telo), compresslevel=6, mtime=0)
+        priznaky |= GZIP
+    return MAGIC + bytes((VERZE, priznaky)) + bytes(telo)
+
+
+def dekoduj_davku(data, max_velikost=MAX_ROZBALENO):
+    """Dekóduje rámec zpět na payload.
+
+    Dekóduje i rámce ze sítě (IngestGateway), gzip tělo se proto rozbalí
+    nejvýše na max_velikost bajtů, jinak vyhodí PrilisVelkeTelo.
+    """
+    if data[:4] != MAGIC or data[4] != VERZE:
+        raise ValueError("Neplatný rámec dávky ran")
+    telo = data[6:]
+    if data[5] & GZIP:
+        telo = rozbal_gzip(telo, max_velikost)
+    pozice = 0
+
+    def varint():
+        nonlocal pozice
+        hodnota = posun = 0
+        while True:
+            bajt = telo[pozice]
+            pozice += 1
+            hodnota |= (bajt & 0x7f) << posun
+            if bajt < 0x80:
+                return hodnota
+            posun += 7
+
+    def zigzag():
+        hodnota = varint()
+        return hodnota >> 1 if not hodnota & 1 else -(hodnota >> 1) - 1
+
+    def retezec():
+        nonlocal pozice
+        delka = varint()
+        pozice += delka
+        return telo[pozice - delka:pozice].decode('utf-8')
+
+    payload = {'user_id': retezec(), 'race_id': retezec(), 'shots': []}
+    x = y = index = 0
+    for _ in range(varint()):
+        priznaky = varint()
+        x += zigzag()
+        y += zigzag()
+        index += zigzag()
+        strela = {'x': x / KVANTUM, 'y': y / KVANTUM, 'time': retezec(), 'index': index,
+                  'id': None, 'score': None}
+        if priznaky & 1:
+            strela['id'] = telo[pozice:pozice + 8].hex()
+            pozice += 8
+        if priznaky & 2:
+            strela['score'] = varint() / 10
+        payload['shots'].append(strela)
+    return payload
+
@@ -0,0 +1,85 @@
+import hashlib
+import logging
+import os
+import threading
+
+VELIKOST_OTISKU = 8
+
+
+def otisk_strely(race_id, strela):
+    """Vrátí 8bajtový otisk rány z (race_id, index, time_stamp, x, y) jako int."""
+    data = f"{race_id}|{strela['index']}|{strela['time']}|{strela['x']!r}|{strela['y']!r}"
+    digest = hashlib.blake2b(data.encode('utf-8'), digest_size=VELIKOST_OTISKU).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def klic_strely(otisk):
+    """Převede otisk na idempotency klíč posílaný serveru."""
+    return f"{otisk:016x}"
+
+
+class ShotFingerprintStore:
+    """Množina otisků již zařazených ran, uložená v binárním souboru.
+
+    Každý otisk zabírá v souboru 8 bajtů; soubor se jen připisuje a při
+    načtení se zkrátí na posledních max_pocet otisků.
+    """
+
+    def __init__(self, cesta=None, max_pocet=1000000):
+        self.cesta = cesta
+        self.max_pocet = max_pocet
+        self._lock = threading.Lock()
+        self._otisky = set()
+        self._soubor = None
+        if cesta:
+            self._nacti()
+            self._soubor = open(cesta, 'ab')
+
+    def _nacti(self):
+        if not os.path.exists(self.cesta):
+            return
+        with open(self.cesta, 'rb') as file:
+            data = file.read()
+        data = data[:len(data) - len(data) % VELIKOST_OTISKU]  # Neúplný poslední zápis
+        zaznamy = len(data) // VELIKOST_OTISKU
+        if zaznamy > self.max_pocet:
+            data = data[(zaznamy - self.max_pocet) * VELIKOST_OTISKU:]
+            docasny = self.cesta + '.tmp'
+            with open(docasny, 'wb') as file:
+                file.write(data)
+            os.replace(docasny, self.cesta)
+        self._otisky = {int.from_bytes(data[i:i + VELIKOST_OTISKU], 'big')
+                        for i in range(0, len(data), VELIKOST_OTISKU)}
+        logging.debug(f"Načteno {len(self._otisky)} otisků ran z {self.cesta}")
+
+    def __contains__(self, otisk):
+        with self._lock:
+            return otisk in self._otisky
+
+    def __len__(self):
+        with self._lock:
+            return len(self._otisky)
+
+    def nove(self, otisky):
+        """Vrátí otisky, které v množině ještě nejsou, bez jejich přidání."""
+        with self._lock:
+            return [otisk for otisk in otisky if otisk not in self._otisky]
+
+    def pridej_nove(self, otisky):
+        """Přidá otisky do množiny a vrátí seznam těch, které v ní ještě nebyly."""
+        with self._lock:
+            nove = []
+            for otisk in otisky:
+                if otisk not in self._otisky:
+                    self._otisky.add(otisk)
+                    nove.append(otisk)
+            if nove and self._soubor:
+                self._soubor.write(b''.join(otisk.to_bytes(VELIKOST_OTISKU, 'big') for otisk in nove))
+                self._soubor.flush()
+            return nove
+
+    def zavri(self):
+        with self._lock:
+            if self._soubor:
+                self._soubor.close()
+                self._soubor = None
@@ -0,0 +1,200 @@
+import bisect
+import collections
+import datetime
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Úseky cesty jedné rány, každý je rozdíl dvou časových značek:
+#   seta   - time_stamp z XML -> detekce změny souboru (jen pokud jde time_stamp přečíst)
+#   parse  - detekce -> rozparsováno
+#   fronta - rozparsováno -> odeslání POST (outbox, dávkování, backoff)
+#   sit    - odeslání POST -> potvrzení serverem
+#   celkem - detekce -> potvrzení
+USEKY = ('seta', 'parse', 'fronta', 'sit', 'celkem')
+HRANICE = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def cas_seta(time_stamp, ted=None):
+    """Převede time_stamp z .tch na unixový čas, nebo vrátí None.
+
+    Zvládá unixový čas v sekundách i milisekundách, ISO datum s časem
+    a samotný čas dne (HH:MM:SS[.fff]), který se vztáhne k dnešku.
+    """
+    if not time_stamp:
+        return None
+    text = str(time_stamp).strip()
+    try:
+        hodnota = float(text)
+        return hodnota / 1000 if hodnota > 1e11 else hodnota
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        pass
+    try:
+        cas = datetime.time.fromisoformat(text)
+    except ValueError:
+        return None
+    ted = ted if ted is not None else time.time()
+    vysledek = datetime.datetime.combine(datetime.date.fromtimestamp(ted), cas).timestamp()
+    return vysledek - 86400 if vysledek - ted > 3600 else vysledek  # Rána těsně před půlnocí
+
+
+def oznac_strely(strely, detekce, parsovano):
+    """Uloží k ranám časy detekce a rozparsování (unixový čas)."""
+    for strela in strely:
+        strela['_casy'] = {'detekce': detekce, 'parsovano': parsovano}
+
+
+class Histogram:
+    """Kumulativní histogram ve stylu Promethea."""
+
+    def __init__(self, hranice=HRANICE):
+        self.hranice = hranice
+        self.pocty = [0] * (len(hranice) + 1)
+        self.soucet = 0.0
+        self.pocet = 0
+
+    def pridej(self, hodnota):
+        self.pocty[bisect.bisect_left(self.hranice, hodnota)] += 1
+        self.soucet += hodnota
+        self.pocet += 1
+
+    def kumulativni(self):
+        vysledek = []
+        celkem = 0
+        for hranice, pocet in zip(self.hranice + (float('inf'),), self.pocty):
+            celkem += pocet
+            vysledek.append((hranice, celkem))
+        return vysledek
+
+
+class ShotMetrics:
+    """Sbírá zpoždění ran po úsecích, histogramy pro /metrics a souhrn do logu."""
+
+    def __init__(self, max_vzorku=1024):
+        self._lock = threading.Lock()
+        self.histogramy = {usek: Histogram() for usek in USEKY}
+        self._vzorky = {usek: collections.deque(maxlen=max_vzorku) for usek in USEKY}
+        self.posledni_zpozdeni = None  # Detekce -> potvrzení poslední potvrzené rány (s)
+        self.posledni_potvrzeni = None
+
+    def zaznamenej(self, strely, odeslano, potvrzeno):
+        """Zaznamená úseky potvrzených ran; odeslano a potvrzeno jsou unixové časy."""
+        with self._lock:
+            for strela in strely:
+                casy = strela.get('_casy')
+                if not casy:
+                    continue
+                seta = cas_seta(strela.get('time'), casy['detekce'])
+                if seta is not None and seta <= casy['detekce']:
+                    self._pridej('seta', casy['detekce'] - seta)
+                self._pridej('parse', casy['parsovano'] - casy['detekce'])
+                self._pridej('fronta', odeslano - casy['parsovano'])
+                self._pridej('sit', potvrzeno - odeslano)
+                self._pridej('celkem', potvrzeno - casy['detekce'])
+                self.posledni_zpozdeni = potvrzeno - casy['detekce']
+            self.posledni_potvrzeni = potvrzeno
+
+    def _pridej(self, usek, hodnota):
+        hodnota = max(hodnota, 0.0)  # Posun systémových hodin
+        self.histogramy[usek].pridej(hodnota)
+        self._vzorky[usek].append(hodnota)
+
+    def percentily(self, usek):
+        with self._lock:
+            vzorky = sorted(self._vzorky[usek])
+        if not vzorky:
+            return None
+        return {f"p{p}": round(vzorky[min(len(vzorky) - 1, int(len(vzorky) * p / 100))] * 1000, 1)
+                for p in (50, 90, 99)}
+
+    def souhrn(self):
+        """Jednořádkový souhrn posledních zpoždění pro periodický log."""
+        casti = []
+        for usek in USEKY:
+            percentily = self.percentily(usek)
+            if percentily:
+                casti.append(f"{usek} p50={percentily['p50']} p90={percentily['p90']} "
+                             f"p99={percentily['p99']} ms")
+        return " | ".join(casti) if casti else "zatím žádné potvrzené rány"
+
+    def prometheus(self, send_queue=None):
+        """Vrátí metriky v textovém formátu Promethea."""
+        radky = [
+            "# HELP seta_shot_latency_seconds Zpoždění rány v jednotlivých úsecích cesty.",
+            "# TYPE seta_shot_latency_seconds histogram",
+        ]
+        with self._lock:
+            for usek in USEKY:
+                histogram = self.histogramy[usek]
+                for hranice, pocet in histogram.kumulativni():
+                    le = '+Inf' if hranice == float('inf') else repr(hranice)
+                    radky.append(f'seta_shot_latency_seconds_bucket{{stage="{usek}",le="{le}"}} {pocet}')
+                radky.append(f'seta_shot_latency_seconds_sum{{stage="{usek}"}} {histogram.soucet}')
+                radky.append(f'seta_shot_latency_seconds_count{{stage="{usek}"}} {histogram.pocet}')
+            if self.posledni_zpozdeni is not None:
+                radky.append("# TYPE seta_last_shot_lag_seconds gauge")
+                radky.append(f"seta_last_shot_lag_seconds {self.posledni_zpozdeni}")
+        if send_queue is not None:
+            metriky = send_queue.uploader.metriky()
+            radky += [
+                "# TYPE seta_outbox_pending gauge",
+                f"seta_outbox_pending {send_queue.outbox.pocet_cekajicich()}",
+                "# TYPE seta_upload_requests_total counter",
+                f"seta_upload_requests_total {metriky['pocet_pozadavku']}",
+                "# TYPE seta_upload_errors_total counter",
+                f"seta_upload_errors_total {metriky['pocet_chyb']}",
+            ]
+            if metriky.get('transport_rtt_ms') is not None:
+                radky += [
+                    "# TYPE seta_link_rtt_seconds gauge",
+                    f"seta_link_rtt_seconds {metriky['transport_rtt_ms'] / 1000}",
+                    "# TYPE seta_link_microbatching gauge",
+                    f"seta_link_microbatching {int(metriky['transport_mikrodavky'])}",
+                ]
+            if send_queue.synchronizace is not None:
+                radky += [
+                    "# TYPE seta_spool_pending gauge",
+                    f"seta_spool_pending {send_queue.synchronizace.spool.pocet_cekajicich()}",
+                ]
+        return "\n".join(radky) + "\n"
+
+
+class MetrikyHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        telo = self.server.metriky.prometheus(self.server.send_queue).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(telo)))
+        self.end_headers()
+        self.wfile.write(telo)
+
+    def log_message(self, format, *args):
+        logging.debug(f"Metriky: {format % args}")
+
+
+class MetrikyServer(ThreadingHTTPServer):
+    """Lokální HTTP endpoint /metrics pro Prometheus, běží ve vlastním vlákně."""
+
+    daemon_threads = True
+
+    def __init__(self, metriky, send_queue=None, port=9464, adresa='127.0.0.1'):
+        super().__init__((adresa, port), MetrikyHandler)
+        self.metriky = metriky
+        self.send_queue = send_queue
+        self._thread = threading.Thread(target=self.serve_forever, name='metriky-http', daemon=True)
+
+    def spust(self):
+        self._thread.start()
+        logging.info(f"Metriky na http://{self.server_address[0]}:{self.server_address[1]}/metrics")
+
+    def zastav(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,134 @@
+import collections
+import json
+import logging
+import os
+import threading
+
+
+class ShotOutbox:
+    """Trvalá fronta neodeslaných ran (write-ahead journal v adresáři logs/).
+
+    Každá rána se do journalu zapíše před odesláním a z fronty zmizí až po
+    potvrzení serverem. Zápisy jdou hned do OS bufferu, fsync běží na pozadí
+    nejvýše jednou za fsync_interval (group commit), takže trvanlivost
+    nezdržuje monitorovací vlákno. Bez cesty funguje fronta jen v paměti.
+    """
+
+    def __init__(self, cesta=None, fsync_interval=0.05, max_velikost_journalu=1024 * 1024):
+        self.cesta = cesta
+        self.fsync_interval = fsync_interval
+        self.max_velikost_journalu = max_velikost_journalu
+        self._lock = threading.Lock()
+        self._cekajici = collections.OrderedDict()  # id -> (klic, strela)
+        self._dalsi_id = 0
+        self._soubor = None
+        self._neulozeno = False
+        self._stop = threading.Event()
+        self._fsync_thread = None
+
+        if cesta:
+            self._obnov()
+            self._soubor = open(cesta, 'ab')
+            self._fsync_thread = threading.Thread(target=self._fsync_smycka, daemon=True)
+            self._fsync_thread.start()
+
+    def _obnov(self):
+        """Načte journal po restartu a přepíše ho jen s neodeslanými ranami."""
+        if os.path.exists(self.cesta):
+            with open(self.cesta, 'rb') as file:
+                for radek in file:
+                    try:
+                        zaznam = json.loads(radek)
+                    except ValueError:
+                        continue  # Neúplný poslední řádek po pádu
+                    if zaznam.get('op') == 'add':
+                        klic = (zaznam['user_id'], zaznam['race_id'])
+                        self._cekajici[zaznam['id']] = (klic, zaznam['shot'])
+                        self._dalsi_id = max(self._dalsi_id, zaznam['id'] + 1)
+                    elif zaznam.get('op') == 'ack':
+                        for id_zaznamu in zaznam['ids']:
+                            self._cekajici.pop(id_zaznamu, None)
+
+        if self._cekajici:
+            logging.info(f"Outbox obsahuje {len(self._cekajici)} neodeslaných ran z minula")
+
+        docasny = self.cesta + '.tmp'
+        with open(docasny, 'wb') as file:
+            for id_zaznamu, (klic, strela) in self._cekajici.items():
+                file.write(self._radek_pridani(id_zaznamu, klic, strela))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(docasny, self.cesta)
+
+    @staticmethod
+    def _radek_pridani(id_zaznamu, klic, strela):
+        zaznam = {'op': 'add', 'id': id_zaznamu, 'user_id': klic[0], 'race_id': klic[1], 'shot': strela}
+        return json.dumps(zaznam).encode('utf-8') + b'\n'
+
+    def _zapis(self, data):
+        if self._soubor:
+            self._soubor.write(data)
+            self._soubor.flush()  # Data jsou v OS, fsync udělá vlákno na pozadí
+            self._neulozeno = True
+
+    def pridej(self, user_id, race_id, strely):
+        """Zapíše rány do journalu a zařadí je k odeslání."""
+        klic = (user_id, race_id)
+        with self._lock:
+            radky = []
+            for strela in strely:
+                self._cekajici[self._dalsi_id] = (klic, strela)
+                radky.append(self._radek_pridani(self._dalsi_id, klic, strela))
+                self._dalsi_id += 1
+            self._zapis(b''.join(radky))
+
+    def potvrd(self, ids):
+        """Odebere potvrzené rány z fronty."""
+        with self._lock:
+            for id_zaznamu in ids:
+                self._cekajici.pop(id_zaznamu, None)
+            self._zapis(json.dumps({'op': 'ack', 'ids': list(ids)}).encode('utf-8') + b'\n')
+            if not self._cekajici and self._soubor and self._soubor.tell() > self.max_velikost_journalu:
+                # Vše je potvrzeno, journal můžeme zahodit
+                self._soubor.truncate(0)
+                self._soubor.seek(0)
+
+    def cekajici(self, limit=None):
+        """Vrátí seznam (id, klic, strela) čekajících ran v pořadí zápisu."""
+        with self._lock:
+            polozky = []
+            for id_zaznamu, (klic, strela) in self._cekajici.items():
+                if limit is not None and len(polozky) >= limit:
+                    break
+                polozky.append((id_zaznamu, klic, strela))
+            return polozky
+
+    def pocet_cekajicich(self):
+        with self._lock:
+            return len(self._cekajici)
+
+    def _fsync(self):
+        with self._lock:
+            if not self._neulozeno or not self._soubor:
+                return
+            self._neulozeno = False
+            fd = self._soubor.fileno()
+        os.fsync(fd)
+
+    def _fsync_smycka(self):
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                self._fsync()
+            except (OSError, ValueError) as e:
+                logging.error(f"Chyba při ukládání outboxu: {e}")
+
+    def zavri(self):
+        """Uloží journal na disk a zavře ho."""
+        self._stop.set()
+        if self._fsync_thread:
+            self._fsync_thread.join(timeout=1.0)
+        if self._soubor:
+            self._fsync()
+            with self._lock:
+                self._soubor.close()
+                self._soubor = None
@@ -0,0 +1,168 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Dávkové výpočty vyžadují numpy, průběžné statistiky ne
+
+# Konstanty a vzorec odpovídají calculateScore v seta-web ([raceId]/page.tsx),
+# aby skóre v Pythonu a na webu bylo stejné. Souřadnice ran jsou v metrech.
+BULLSEYE_RADIUS = 0.2      # Perfect shot radius in mm
+TEN_RING_RADIUS = 2.482    # 10.0 score radius in mm
+MAX_SCORE = 10.9           # Maximum possible score
+SCORE_DECREASE = 0.394     # Score decrease constant (0.9 / 2.282)
+
+
+def skore(x, y):
+    """Vrátí desetinné skóre jedné rány (zaokrouhlené na desetiny)."""
+    radius = math.hypot(x * 1000, y * 1000)
+    if radius <= BULLSEYE_RADIUS:
+        score = MAX_SCORE
+    elif radius <= TEN_RING_RADIUS:
+        score = MAX_SCORE - SCORE_DECREASE * (radius - BULLSEYE_RADIUS)
+    else:
+        # Stejně jako na webu zatím bez vnějších kruhů
+        score = 10.0
+    # Stejné zaokrouhlení jako Math.round(score * 10) / 10 (round() zaokrouhluje k sudé)
+    return math.floor(score * 10 + 0.5) / 10
+
+
+def _vyzaduj_numpy():
+    if np is None:
+        raise ImportError("Dávkové statistiky vyžadují balíček numpy (pip install numpy)")
+
+
+def skore_pole(x, y):
+    """Vektorově spočítá skóre pro pole souřadnic x, y."""
+    _vyzaduj_numpy()
+    radius = np.hypot(np.asarray(x, dtype=np.float64) * 1000, np.asarray(y, dtype=np.float64) * 1000)
+    score = np.where(radius <= BULLSEYE_RADIUS, MAX_SCORE,
+                     np.where(radius <= TEN_RING_RADIUS,
+                              MAX_SCORE - SCORE_DECREASE * (radius - BULLSEYE_RADIUS), 10.0))
+    return np.floor(score * 10 + 0.5) / 10
+
+
+def extremni_rozptyl(x, y):
+    """Největší vzdálenost mezi dvěma ranami skupiny (v metrech)."""
+    _vyzaduj_numpy()
+    body = np.column_stack((np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)))
+    if len(body) < 2:
+        return 0.0
+    nejvetsi = 0.0
+    # Po blocích, aby matice vzdáleností nezabrala příliš paměti u dlouhých závodů
+    for zacatek in range(0, len(body), 1024):
+        blok = body[zacatek:zacatek + 1024]
+        rozdil = blok[:, None, :] - body[None, :, :]
+        nejvetsi = max(nejvetsi, float(np.sqrt((rozdil ** 2).sum(axis=2)).max()))
+    return nejvetsi
+
+
+def statistiky_zavodu(x, y):
+    """Spočítá skóre, průběžné součty a statistiky skupiny jednoho závodu."""
+    _vyzaduj_numpy()
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) == 0:
+        return {'pocet': 0, 'skore': [], 'prubezne': [], 'celkem': 0.0, 'stred_x': None,
+                'stred_y': None, 'extremni_rozptyl': 0.0, 'prumerny_polomer': 0.0}
+    score = skore_pole(x, y)
+    prubezne = np.cumsum(score)
+    stred_x = float(x.mean())
+    stred_y = float(y.mean())
+    return {
+        'pocet': int(len(x)),
+        'skore': score.tolist(),
+        'prubezne': np.round(prubezne, 1).tolist(),
+        'celkem': round(float(prubezne[-1]), 1),
+        'stred_x': stred_x,
+        'stred_y': stred_y,
+        'extremni_rozptyl': extremni_rozptyl(x, y),
+        'prumerny_polomer': float(np.hypot(x - stred_x, y - stred_y).mean()),
+    }
+
+
+def statistiky_davky(zavody):
+    """Statistiky pro mnoho závodů najednou (např. celá sezóna).
+
+    zavody je seznam dvojic (x, y). Skóre, středy a průměrné poloměry se
+    počítají jedním vektorovým průchodem přes všechny rány, po závodech
+    se iteruje jen kvůli extrémnímu rozptylu.
+    """
+    _vyzaduj_numpy()
+    zavody = [(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)) for x, y in zavody]
+    delky = np.array([len(x) for x, _ in zavody], dtype=np.int64)
+    neprazdne = delky > 0
+    if not neprazdne.any():
+        return [statistiky_zavodu([], []) for _ in zavody]
+
+    vse_x = np.concatenate([x for x, _ in zavody])
+    vse_y = np.concatenate([y for _, y in zavody])
+    zacatky = np.concatenate(([0], np.cumsum(delky)[:-1]))[neprazdne]
+    delky_neprazdne = delky[neprazdne]
+
+    score = skore_pole(vse_x, vse_y)
+    celkem = np.add.reduceat(score, zacatky)
+    stred_x = np.add.reduceat(vse_x, zacatky) / delky_neprazdne
+    stred_y = np.add.reduceat(vse_y, zacatky) / delky_neprazdne
+    index_zavodu = np.repeat(np.arange(len(zacatky)), delky_neprazdne)
+    polomery = np.hypot(vse_x - stred_x[index_zavodu], vse_y - stred_y[index_zavodu])
+    prumerny_polomer = np.add.reduceat(polomery, zacatky) / delky_neprazdne
+
+    vysledky = []
+    poradi = 0
+    for (x, y), neprazdny in zip(zavody, neprazdne):
+        if not neprazdny:
+            vysledky.append(statistiky_zavodu(x, y))
+            continue
+        vysledky.append({
+            'pocet': int(len(x)),
+            'celkem': round(float(celkem[poradi]), 1),
+            'stred_x': float(stred_x[poradi]),
+            'stred_y': float(stred_y[poradi]),
+            'extremni_rozptyl': extremni_rozptyl(x, y),
+            'prumerny_polomer': float(prumerny_polomer[poradi]),
+        })
+        poradi += 1
+    return vysledky
+
+
+class PrubezneStatistiky:
+    """Průběžné statistiky závodu aktualizované po každé ráně (bez numpy).
+
+    Součty a extrémní rozptyl se aktualizují inkrementálně, průměrný poloměr
+    se přepočítá z uložených souřadnic (lineárně v počtu ran).
+    """
+
+    def __init__(self):
+        self.body = []
+        self.celkem = 0.0
+        self.extremni_rozptyl = 0.0
+        self._suma_x = 0.0
+        self._suma_y = 0.0
+
+    def pridej(self, x, y):
+        """Přidá ránu a vrátí její skóre a aktuální statistiky závodu."""
+        score = skore(x, y)
+        for bod_x, bod_y in self.body:
+            self.extremni_rozptyl = max(self.extremni_rozptyl, math.hypot(x - bod_x, y - bod_y))
+        self.body.append((x, y))
+        self.celkem = round(self.celkem + score, 1)
+        self._suma_x += x
+        self._suma_y += y
+        return score, self.stav()
+
+    def stav(self):
+        pocet = len(self.body)
+        if not pocet:
+            return {'pocet': 0, 'celkem': 0.0}
+        stred_x = self._suma_x / pocet
+        stred_y = self._suma_y / pocet
+        prumerny_polomer = sum(math.hypot(x - stred_x, y - stred_y) for x, y in self.body) / pocet
+        return {
+            'pocet': pocet,
+            'celkem': self.celkem,
+            'stred_x': stred_x,
+            'stred_y': stred_y,
+            'extremni_rozptyl': self.extremni_rozptyl,
+            'prumerny_polomer': prumerny_polomer,
+        }
@@ -0,0 +1,256 @@
+import json
+import logging
+import random
+import threading
+import time
+
+from ShotFingerprints import ShotFingerprintStore, klic_strely, otisk_strely
+from ShotOutbox import ShotOutbox
+from ShotScoring import PrubezneStatistiky
+
+
+def trvale_odmitnuto(status_code):
+    """True pro odpovědi, které opakovaný pokus nezmění (4xx kromě 408 a 429)."""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+def retry_after(response, vychozi=1.0):
+    """Vrátí čekání v sekundách z hlavičky Retry-After odpovědi 429."""
+    try:
+        return float(response.headers.get('Retry-After', vychozi))
+    except (TypeError, ValueError):
+        return vychozi
+
+
+def do_karanteny(cesta, payload, response):
+    """Připíše trvale odmítnutou dávku do karantény (JSONL), vrátí popis pro log."""
+    if not cesta:
+        return " zahozeno"
+    try:
+        with open(cesta, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({"cas": time.time(), "status": response.status_code,
+                                   "odpoved": response.text, "payload": payload}) + '\n')
+        return f" přesunuto do {cesta}"
+    except OSError as e:
+        return f" zahozeno, karanténu nelze zapsat: {e}"
+
+
+class ShotSendQueue:
+    """Fronta ran čekajících na odeslání, odesílá je na /api/shots po dávkách.
+
+    Každá rána se zařadí jen jednou - rozhoduje otisk (race_id, index, čas, x, y)
+    v ShotFingerprintStore. Otisk se posílá serveru jako idempotency klíč, takže
+    opakované odeslání nevytvoří duplicitu. Čekající rány drží ShotOutbox, takže
+    přežijí výpadek sítě i restart. Vlákno spuštěné přes spust() je odesílá na
+    pozadí a při chybě opakuje pokusy s exponenciálním čekáním a jitterem.
+    Ke každé nové ráně se při zařazení dopočítá skóre a průběžné statistiky
+    závodu (ShotScoring), které se odešlou spolu s ní. V offline režimu
+    (nastavený spool) se rány místo outboxu ukládají do ShotSpool a na
+    server je nahraje až SpoolSync. Pokud uploader nabízí cekani()
+    (ShotTransport), vlákno na pomalé lince chvíli sbírá rány do mikrodávek.
+    Dávku, kterou server trvale odmítne (4xx kromě 408 a 429), fronta
+    neopakuje - přesune ji do karantény (JSONL soubor), aby neblokovala
+    ostatní závody.
+    """
+
+    def __init__(self, uploader, fault_handler=None, max_davka=50, outbox=None,
+                 otisky=None, zakladni_backoff=0.5, max_backoff=60.0, metriky=None, spool=None,
+                 karantena=None):
+        self.uploader = uploader
+        self.fault_handler = fault_handler
+        self.max_davka = max_davka
+        self.outbox = outbox if outbox is not None else ShotOutbox()
+        self.otisky = otisky if otisky is not None else ShotFingerprintStore()
+        self.zakladni_backoff = zakladni_backoff
+        self.max_backoff = max_backoff
+        self.metriky = metriky  # Volitelný ShotMetrics pro zpoždění ran
+        self.spool = spool  # ShotSpool v offline režimu, jinak None
+        self.karantena = karantena  # Cesta k souboru trvale odmítnutých dávek, None = jen log
+        self.odmitnuto = 0  # Ran trvale odmítnutých serverem
+        self.synchronizace = None  # SpoolSync, pokud ho spustil SetaCore.spust_odesilani
+        self.zavody = None  # ZavodyDrah (race_id souborů drah), pokud ho vytvořil SetaCore.spust_odesilani
+        self.nedostupny = False  # Server neodpovídá, chyby se do fault logu zapíšou jen jednou
+        self.odlozeno = 0.0  # Retry-After z poslední odpovědi 429 (přetížený server), s
+        self.potvrzeno = {}  # (user_id, race_id) -> počet potvrzených ran
+        self.statistiky = {}  # (user_id, race_id) -> PrubezneStatistiky
+        self._nejstarsi = None  # time.monotonic() zařazení nejstarší čekající rány
+        self._zarazeni = threading.Lock()
+        self._signal = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def pridej(self, user_id, race_id, strely):
+        """Zařadí rány, jejichž otisk ještě nebyl zařazen.
+
+        Otisky se uloží až po zápisu ran do outboxu nebo spoolu - pád mezi
+        oběma zápisy tak ránu pošle nejvýš dvakrát (server ji podle id
+        zahodí), nikdy ji neztratí.
+        """
+        podle_otisku = {otisk_strely(race_id, strela): strela for strela in strely}
+        with self._zarazeni:
+            nove_otisky = self.otisky.nove(podle_otisku)
+            if not nove_otisky:
+                return
+            nove = [dict(podle_otisku[otisk], id=klic_strely(otisk)) for otisk in nove_otisky]
+            statistiky = self.statistiky.setdefault((user_id, race_id), PrubezneStatistiky())
+            for strela in nove:
+                strela['score'], strela['stats'] = statistiky.pridej(strela['x'], strela['y'])
+            spool = self.spool
+            if spool is not None:
+                spool.pridej(user_id, race_id, nove)
+            else:
+                if self._nejstarsi is None:
+                    self._nejstarsi = time.monotonic()
+                self.outbox.pridej(user_id, race_id, nove)
+            self.otisky.pridej_nove(nove_otisky)
+        if spool is None:
+            self._signal.set()
+
+    def odesli(self):
+        """Odešle čekající rány po dávkách, vrátí True pokud je fronta prázdná."""
+        while True:
+            # Okno přes několik dávek, aby se prokládané rány více drah nedrobily
+            polozky = self.outbox.cekajici(limit=self.max_davka * 8)
+            if not polozky:
+                self._nejstarsi = None
+                return True
+            klic, ids, davka = self._dalsi_davka(polozky)
+            vysledek = self._odesli_davku(klic, davka)
+            if vysledek is False:
+                return False  # Zbytek zůstává v outboxu a zkusí se znovu
+            # Přijatá i trvale odmítnutá (v karanténě) dávka z outboxu zmizí
+            self.outbox.potvrd(ids)
+            if vysledek:
+                self.potvrzeno[klic] = self.potvrzeno.get(klic, 0) + len(davka)
+
+    def _dalsi_davka(self, polozky):
+        """Vrátí dávku ran závodu nejstarší čekající rány (v pořadí zařazení)."""
+        klic = polozky[0][1]
+        ids = []
+        davka = []
+        for id_zaznamu, klic_polozky, strela in polozky:
+            if klic_polozky != klic:
+                continue
+            ids.append(id_zaznamu)
+            davka.append(strela)
+            if len(davka) >= self.max_davka:
+                break
+        return klic, ids, davka
+
+    def _pockej_na_davku(self):
+        """Na pomalé lince sbírá rány, dokud nevyprší rozpočet nebo není plná dávka."""
+        cekani = getattr(self.uploader, 'cekani', None)
+        if cekani is None:
+            return
+        while not self._stop.is_set():
+            nejstarsi = self._nejstarsi
+            if nejstarsi is None or self.outbox.pocet_cekajicich() >= self.max_davka:
+                return
+            zbyva = cekani(time.monotonic() - nejstarsi)
+            if zbyva <= 0:
+                return
+            self._stop.wait(min(zbyva, 0.01))
+
+    def _odesli_davku(self, klic, davka):
+        """Vrátí True při úspěchu, None pro dávku v karanténě a False, pokud se má opakovat."""
+        user_id, race_id = klic
+        payload = {
+            "user_id": user_id,
+            "race_id": race_id,
+            "shots": [
+                {
+                    "x": strela['x'],
+                    "y": strela['y'],
+                    "time": strela['time'],
+                    "index": strela['index'],
+                    "id": strela.get('id'),
+                    "score": strela.get('score'),
+                    "stats": strela.get('stats')
+                }
+                for strela in davka
+            ]
+        }
+
+        try:
+            odeslano = time.time()
+            response = self.uploader.odesli(payload)
+            if response.status_code == 200:
+                if self.nedostupny:
+                    logging.info("Server je opět dostupný")
+                    self.nedostupny = False
+                if self.metriky:
+                    self.metriky.zaznamenej(davka, odeslano, time.time())
+                logging.debug(f"Dávka {len(davka)} ran úspěšně odeslána: {payload}")
+                return True
+            if response.status_code == 429:
+                # Přetížený server není chyba, jen se počká, kolik si řekne
+                self.odlozeno = retry_after(response)
+                logging.info(f"Server je přetížený, další pokus za {self.odlozeno:g} s")
+                return False
+            if trvale_odmitnuto(response.status_code):
+                self._do_karanteny(payload, response)
+                return None
+            logging.error(f"Chyba při odesílání dat: {response.status_code} - {response.text}")
+            self._chyba(f"API Error: {response.status_code} - {response.text}")
+        except Exception as e:
+            if self.nedostupny:
+                # Výpadek už je zalogovaný, každý další pokus by jen zahltil fault log
+                logging.debug(f"Server stále nedostupný: {str(e)}")
+                return False
+            self.nedostupny = True
+            logging.error(f"Chyba při komunikaci s API: {str(e)}")
+            self._chyba(f"API Communication Error: {str(e)}")
+        return False
+
+    def _do_karanteny(self, payload, response):
+        """Odloží trvale odmítnutou dávku stranou, další pokus by dopadl stejně."""
+        self.odmitnuto += len(payload['shots'])
+        zprava = (f"Server dávku trvale odmítl ({response.status_code} - {response.text}), "
+                  f"{len(payload['shots'])} ran závodu {payload['race_id']}")
+        zprava += do_karanteny(self.karantena, payload, response)
+        logging.error(zprava)
+        self._chyba(f"API Rejected: {zprava}")
+
+    def spust(self):
+        """Spustí odesílací vlákno na pozadí (odešle i rány čekající z minula)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._signal.set()
+        self._thread = threading.Thread(target=self._odesilaci_smycka, daemon=True)
+        self._thread.start()
+
+    def zastav(self, timeout=2.0):
+        """Zastaví odesílací vlákno, neodeslané rány zůstanou v outboxu."""
+        self._stop.set()
+        self._signal.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _odesilaci_smycka(self):
+        pokus = 0
+        while not self._stop.is_set():
+            self._signal.wait()
+            self._signal.clear()
+            if self._stop.is_set():
+                break
+            self._pockej_na_davku()
+            if self.odesli():
+                pokus = 0
+                continue
+
+            # Exponenciální čekání s jitterem, aby se pruhy nesynchronizovaly
+            pokus += 1
+            cekani = min(self.max_backoff, self.zakladni_backoff * 2 ** (pokus - 1))
+            cekani = cekani / 2 + random.uniform(0, cekani / 2)
+            if self.odlozeno:
+                cekani = max(cekani, self.odlozeno)
+                self.odlozeno = 0.0
+            logging.debug(f"Odeslání selhalo, další pokus za {cekani:.2f} s")
+            self._stop.wait(cekani)
+            self._signal.set()
+
+    def _chyba(self, zprava):
+        if self.fault_handler:
+            self.fault_handler.log_fault(zprava)
@@ -0,0 +1,163 @@
+import collections
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ShotUploader import ShotUploader
+
+try:
+    import socketio  # pip install "python-socketio[client]"
+except ImportError:
+    socketio = None  # Bez knihovny se posílá jen přes HTTP
+
+SOCKET_PATH = '/api/socket'  # Stejná cesta jako Server v seta-web/src/app/api/socket/route.ts
+
+
+class OdpovedKanalu:
+    """Potvrzení ze socket.io kanálu ve stejném tvaru jako requests.Response."""
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+        self.text = json.dumps(data, ensure_ascii=False)
+        self.headers = {'Retry-After': str(data['retry_after'])} if 'retry_after' in data else {}
+
+
+class ShotSocketUploader:
+    """Posílá dávky ran jedním trvalým socket.io spojením, jinak přes HTTP.
+
+    Každá dávka je jedna zpráva 'ingestShots' a server ji potvrdí ackem,
+    takže odpadá HTTP požadavek na dávku. Spojení se navazuje na pozadí;
+    dokud neběží (nebo chybí python-socketio), posílá se přes záložní
+    ShotUploader. Rozhraní je stejné jako u ShotUploader.
+    """
+
+    def __init__(self, api_url, zalozni=None, timeout=10.0, interval_pripojeni=15.0,
+                 socket_path=SOCKET_PATH, max_vzorku=1024, prihlaseni=None):
+        casti = urlsplit(api_url)
+        self.server_url = f"{casti.scheme}://{casti.netloc}"
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.interval_pripojeni = interval_pripojeni
+        self.zalozni = zalozni if zalozni is not None else ShotUploader(api_url, prihlaseni=prihlaseni)
+        # Ingest brána ověřuje spojení stejným uzivatelske_id a heslem jako HTTP
+        self.auth = {'user_id': prihlaseni[0], 'heslo': prihlaseni[1]} if prihlaseni else None
+
+        self._lock = threading.Lock()
+        self._latence = collections.deque(maxlen=max_vzorku)
+        self.pocet_zprav = 0
+        self.pocet_chyb_kanalu = 0
+        self._dalsi_pokus = 0.0
+        self._pripojuje_se = False
+        self._zavreno = False
+        self._sio = None
+        if socketio is None:
+            logging.info("python-socketio není nainstalováno, rány se posílají přes HTTP")
+        else:
+            self._sio = socketio.Client(reconnection=True, reconnection_delay_max=interval_pripojeni)
+            self._sio.on('connect', lambda: logging.info(f"Push kanál připojen k {self.server_url}"))
+            self._sio.on('disconnect', lambda *args: logging.info("Push kanál odpojen, posílám přes HTTP"))
+
+    @property
+    def pripojeno(self):
+        return self._sio is not None and self._sio.connected
+
+    def _pripoj_na_pozadi(self):
+        """Spustí pokus o spojení ve vlákně, aby odesílání nečekalo na connect."""
+        with self._lock:
+            if (self._sio is None or self._zavreno or self._pripojuje_se
+                    or time.monotonic() < self._dalsi_pokus):
+                return
+            self._pripojuje_se = True
+            self._dalsi_pokus = time.monotonic() + self.interval_pripojeni
+        threading.Thread(target=self._pripoj, name='push-kanal', daemon=True).start()
+
+    def _pripoj(self):
+        try:
+            self._sio.connect(self.server_url, socketio_path=self.socket_path,
+                              transports=['websocket'], wait_timeout=5, auth=self.auth)
+        except Exception as e:
+            logging.debug(f"Push kanál se nepřipojil ({e}), další pokus za {self.interval_pripojeni:.0f} s")
+        finally:
+            with self._lock:
+                self._pripojuje_se = False
+
+    def nastav_url(self, api_url):
+        """Přepne kanál i záložní HTTP na jiný server, kanál se připojí znovu."""
+        casti = urlsplit(api_url)
+        self.server_url = f"{casti.scheme}://{casti.netloc}"
+        self.zalozni.nastav_url(api_url)
+        with self._lock:
+            self._dalsi_pokus = 0.0
+        if self._sio is not None and self._sio.connected:
+            self._sio.disconnect()
+
+    def nastav_prihlaseni(self, prihlaseni):
+        """Změní přihlášení kanálu i záložního HTTP, kanál se připojí znovu."""
+        auth = {'user_id': prihlaseni[0], 'heslo': prihlaseni[1]} if prihlaseni else None
+        self.zalozni.nastav_prihlaseni(prihlaseni)
+        if auth == self.auth:
+            return
+        self.auth = auth
+        with self._lock:
+            self._dalsi_pokus = 0.0
+        if self._sio is not None and self._sio.connected:
+            self._sio.disconnect()
+
+    def odesli(self, payload):
+        """Odešle dávku kanálem a vrátí potvrzení; bez spojení použije HTTP."""
+        return self._posli(payload, self.zalozni.odesli)
+
+    def odesli_kompaktne(self, ramec):
+        """Odešle binární rámec ShotCodec kanálem, bez spojení přes HTTP."""
+        return self._posli(ramec, self.zalozni.odesli_kompaktne)
+
+    def _posli(self, data, zalozni_odeslani):
+        if not self.pripojeno:
+            self._pripoj_na_pozadi()
+            return zalozni_odeslani(data)
+
+        start = time.perf_counter()
+        try:
+            ack = self._sio.call('ingestShots', data, timeout=self.timeout)
+        except Exception as e:
+            with self._lock:
+                self.pocet_zprav += 1
+                self.pocet_chyb_kanalu += 1
+            logging.warning(f"Push kanál selhal ({e}), dávku posílám přes HTTP")
+            return zalozni_odeslani(data)
+
+        ack = ack if isinstance(ack, dict) else {}
+        status = ack.get('status', 200 if ack.get('success') else 500)
+        with self._lock:
+            self._latence.append(time.perf_counter() - start)
+            self.pocet_zprav += 1
+            if status != 200:
+                self.pocet_chyb_kanalu += 1
+        return OdpovedKanalu(status, ack)
+
+    def metriky(self):
+        """Metriky záložního HTTP uploaderu doplněné o push kanál."""
+        metriky = self.zalozni.metriky()
+        with self._lock:
+            latence = sorted(self._latence)
+            metriky['pocet_pozadavku'] += self.pocet_zprav
+            metriky['pocet_chyb'] += self.pocet_chyb_kanalu
+            metriky['kanal_pripojen'] = self.pripojeno
+            metriky['kanal_zprav'] = self.pocet_zprav
+        for percentil in (50, 90, 99):
+            if latence:
+                index = min(len(latence) - 1, int(len(latence) * percentil / 100))
+                metriky[f'kanal_latence_p{percentil}_ms'] = round(latence[index] * 1000, 2)
+            else:
+                metriky[f'kanal_latence_p{percentil}_ms'] = None
+        return metriky
+
+    def zavri(self):
+        """Odpojí kanál a zavře HTTP spojení."""
+        self._zavreno = True
+        if self._sio is not None and self._sio.connected:
+            self._sio.disconnect()
+        self.zalozni.zavri()
@@ -0,0 +1,345 @@
+import argparse
+import collections
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+
+from ShotSendQueue import do_karanteny, retry_after, trvale_odmitnuto
+from ShotStore import ShotStore
+
+# Offline režim pro střelnice bez připojení:
+#
+#   python -m SetaDaemon --offline ...        rány se ukládají jen do logs/spool/
+#   python -m ShotSpool [--spool logs/spool]  ruční synchronizace s průběhem
+#
+# Rány se během závodu zapisují do sloupcového ShotStore bez síťového
+# provozu. SpoolSync je po obnovení spojení nahraje po závodech velkými
+# dávkami komprimovanými gzipem.
+
+RACE_SOUBOR = 'race.shots'  # Stejné jméno jako v seta-web/src/lib/shotIngest.ts
+
+
+class ShotSpool:
+    """Lokální úložiště ran pro offline režim, jeden ShotStore na závod.
+
+    Pořadí závodů a počet už nahraných ran drží journal spool.jsonl, takže
+    synchronizace po restartu pokračuje tam, kde skončila. Plně nahrané
+    závody se při dalším otevření spoolu smažou.
+    """
+
+    def __init__(self, adresar):
+        self.adresar = adresar
+        self.journal = os.path.join(adresar, 'spool.jsonl')
+        self._lock = threading.Lock()
+        self._zavody = collections.OrderedDict()  # (user_id, race_id) -> [uloženo, odesláno]
+        self._story = {}
+        os.makedirs(adresar, exist_ok=True)
+        self._obnov()
+        self._soubor = open(self.journal, 'a', encoding='utf-8')
+
+    def _cesta(self, klic):
+        return os.path.join(self.adresar, klic[0], klic[1], RACE_SOUBOR)
+
+    def _obnov(self):
+        """Načte journal, smaže nahrané závody a journal přepíše jen s nedokončenými."""
+        odeslano = collections.OrderedDict()
+        if os.path.exists(self.journal):
+            with open(self.journal, 'r', encoding='utf-8') as file:
+                for radek in file:
+                    try:
+                        zaznam = json.loads(radek)
+                        klic = (zaznam['user_id'], zaznam['race_id'])
+                    except (ValueError, KeyError):
+                        continue  # Neúplný poslední řádek po pádu
+                    odeslano[klic] = max(odeslano.get(klic, 0), zaznam.get('odeslano', 0))
+
+        for klic, pocet_odeslano in odeslano.items():
+            cesta = self._cesta(klic)
+            if not os.path.exists(cesta):
+                continue
+            store = ShotStore(cesta)
+            ulozeno = len(store)
+            store.zavri()
+            if pocet_odeslano >= ulozeno:
+                shutil.rmtree(os.path.dirname(cesta), ignore_errors=True)
+                try:
+                    os.rmdir(os.path.join(self.adresar, klic[0]))  # Jen pokud je prázdný
+                except OSError:
+                    pass
+            else:
+                self._zavody[klic] = [ulozeno, pocet_odeslano]
+
+        if self._zavody:
+            logging.info(f"Spool obsahuje {self.pocet_cekajicich()} nenahraných ran "
+                         f"z {len(self._zavody)} závodů")
+        docasny = self.journal + '.tmp'
+        with open(docasny, 'w', encoding='utf-8') as file:
+            for klic, (_, pocet_odeslano) in self._zavody.items():
+                file.write(self._radek(klic, pocet_odeslano))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(docasny, self.journal)
+
+    @staticmethod
+    def _radek(klic, odeslano):
+        return json.dumps({'user_id': klic[0], 'race_id': klic[1], 'odeslano': odeslano}) + '\n'
+
+    def _store(self, klic):
+        store = self._story.get(klic)
+        if store is None:
+            os.makedirs(os.path.dirname(self._cesta(klic)), exist_ok=True)
+            store = self._story[klic] = ShotStore(self._cesta(klic))
+            if klic not in self._zavody:
+                self._zavody[klic] = [len(store), 0]
+                self._soubor.write(self._radek(klic, 0))
+                self._soubor.flush()
+        return store
+
+    def pridej(self, user_id, race_id, strely):
+        """Připíše rány závodu jako jeden blok (stejné rozhraní jako ShotOutbox.pridej)."""
+        klic = (user_id, race_id)
+        with self._lock:
+            self._store(klic).pripoj(strely)
+            self._zavody[klic][0] += len(strely)
+
+    def cekajici(self):
+        """Vrátí [(klic, uloženo, odesláno)] závodů s nenahranými ranami v pořadí vzniku."""
+        with self._lock:
+            return [(klic, ulozeno, odeslano) for klic, (ulozeno, odeslano) in self._zavody.items()
+                    if odeslano < ulozeno]
+
+    def pocet_cekajicich(self):
+        return sum(ulozeno - odeslano for _, ulozeno, odeslano in self.cekajici())
+
+    def strely(self, klic, od=0):
+        """Rány závodu od pořadí od (načtené jedním čtením souboru)."""
+        with self._lock:
+            store = self._story.get(klic)
+        if store is not None:
+            return store.strely()[od:]
+        store = ShotStore(self._cesta(klic))
+        try:
+            return store.strely()[od:]
+        finally:
+            store.zavri()
+
+    def potvrd(self, klic, pocet):
+        """Zaznamená, že dalších pocet ran závodu server potvrdil."""
+        with self._lock:
+            self._zavody[klic][1] += pocet
+            self._soubor.write(self._radek(klic, self._zavody[klic][1]))
+            self._soubor.flush()
+
+    def zavri(self):
+        with self._lock:
+            for store in self._story.values():
+                store.zavri()
+            self._story.clear()
+            if self._soubor:
+                self._soubor.close()
+                self._soubor = None
+
+
+class SpoolSync:
+    """Nahrává rány ze spoolu na pozadí, jakmile je server dostupný.
+
+    Závody jdou v pořadí, v jakém vznikly, po dávkách o davka ranách
+    (uploader s gzipem). Aby synchronizace nebrala linku živým drahám,
+    počká, dokud má odesílací fronta čekající rány, a mezi dávkami
+    odpočívá tak, aby zabrala nejvýše podil času. Dávku, kterou server
+    trvale odmítne (4xx kromě 408 a 429), přesune do karantény a pokračuje
+    dál, aby jeden vadný závod nezastavil nahrávání ostatních; na 429 počká,
+    kolik si server řekne v Retry-After.
+    """
+
+    def __init__(self, spool, uploader, send_queue=None, fault_handler=None, davka=1000,
+                 podil=0.5, interval=15.0, karantena=None):
+        self.spool = spool
+        self.uploader = uploader
+        self.send_queue = send_queue
+        self.fault_handler = fault_handler
+        self.davka = davka
+        self.podil = podil
+        self.interval = interval
+        self.karantena = karantena  # Cesta k souboru trvale odmítnutých dávek, None = jen log
+        self.online = None  # None = zatím nezkoušeno
+        self.odeslano = 0  # Ran nahraných v tomto běhu
+        self.odmitnuto = 0  # Ran trvale odmítnutých serverem
+        self._cas_odesilani = 0.0
+        self._signal = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def stav(self):
+        """Průběh synchronizace pro GUI a CLI."""
+        cekajici = self.spool.cekajici()
+        return {
+            'online': self.online,
+            'zavody': len(cekajici),
+            'cekajici': sum(ulozeno - odeslano for _, ulozeno, odeslano in cekajici),
+            'odeslano': self.odeslano,
+            'odmitnuto': self.odmitnuto,
+            'ran_za_s': round(self.odeslano / self._cas_odesilani) if self._cas_odesilani else None,
+        }
+
+    def popis(self):
+        """Jednořádkový popis průběhu synchronizace."""
+        stav = self.stav()
+        if not stav['cekajici']:
+            return f"spool synchronizován ({stav['odeslano']} ran nahráno)"
+        text = f"spool: čeká {stav['cekajici']} ran z {stav['zavody']} závodů, nahráno {stav['odeslano']}"
+        if stav['ran_za_s']:
+            text += f" ({stav['ran_za_s']} ran/s)"
+        if stav['odmitnuto']:
+            text += f", {stav['odmitnuto']} ran odmítnuto"
+        if stav['online'] is False:
+            text += ", server nedostupný"
+        return text
+
+    def synchronizuj(self, stop=None):
+        """Nahraje všechny čekající závody, vrátí True pokud je spool celý nahraný."""
+        stop = stop or self._stop
+        for klic, _, odeslano in self.spool.cekajici():
+            strely = self.spool.strely(klic, odeslano)
+            for zacatek in range(0, len(strely), self.davka):
+                if stop.is_set():
+                    return False
+                self._pockej_na_zive_drahy(stop)
+                davka = strely[zacatek:zacatek + self.davka]
+                start = time.perf_counter()
+                vysledek = self._odesli(klic, davka, stop)
+                if vysledek is False:
+                    return False
+                trvani = time.perf_counter() - start
+                # Přijatá i trvale odmítnutá (v karanténě) dávka se potvrdí
+                self.spool.potvrd(klic, len(davka))
+                if vysledek is None:
+                    continue
+                self.odeslano += len(davka)
+                self._cas_odesilani += trvani
+                logging.debug(f"Spool: {klic[1]} +{len(davka)} ran, {self.popis()}")
+                if self.podil < 1:
+                    stop.wait(trvani * (1 / self.podil - 1))
+        return not self.spool.cekajici()
+
+    def _pockej_na_zive_drahy(self, stop):
+        if self.send_queue is None:
+            return
+        while self.send_queue.outbox.pocet_cekajicich() and not stop.wait(0.2):
+            pass
+
+    def _odesli(self, klic, davka, stop):
+        """Vrátí True při úspěchu, None pro dávku v karanténě a False, pokud se má opakovat."""
+        payload = {"user_id": klic[0], "race_id": klic[1], "shots": davka}
+        while True:
+            try:
+                response = self.uploader.odesli(payload)
+            except Exception as e:
+                if self.online is not False:
+                    logging.info(f"Server nedostupný ({e}), spool počká na připojení")
+                self.online = False
+                return False
+            if response.status_code != 429:
+                break
+            # Přetížený server není chyba, dávka se zkusí znovu po Retry-After
+            cekani = retry_after(response)
+            logging.info(f"Server je přetížený, spool pokračuje za {cekani:g} s")
+            if stop.wait(cekani):
+                return False
+        if trvale_odmitnuto(response.status_code):
+            self.odmitnuto += len(davka)
+            zprava = (f"Server dávku spoolu trvale odmítl ({response.status_code} - {response.text}), "
+                      f"{len(davka)} ran závodu {klic[1]}")
+            zprava += do_karanteny(self.karantena, payload, response)
+            logging.error(zprava)
+            if self.fault_handler:
+                self.fault_handler.log_fault(f"Spool API Rejected: {zprava}")
+            return None
+        if response.status_code != 200:
+            logging.error(f"Synchronizace spoolu selhala: {response.status_code} - {response.text}")
+            if self.fault_handler:
+                self.fault_handler.log_fault(f"Spool API Error: {response.status_code} - {response.text}")
+            return False
+        if self.online is False:
+            logging.info("Server je opět dostupný, nahrávám spool")
+        self.online = True
+        return True
+
+    def probud(self):
+        self._signal.set()
+
+    def spust(self):
+        """Spustí synchronizační vlákno na pozadí."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._signal.set()
+        self._thread = threading.Thread(target=self._smycka, name='spool-sync', daemon=True)
+        self._thread.start()
+
+    def zastav(self, timeout=2.0):
+        self._stop.set()
+        self._signal.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _smycka(self):
+        while not self._stop.is_set():
+            self._signal.wait(self.interval)
+            self._signal.clear()
+            if self._stop.is_set():
+                break
+            if self.spool.cekajici():
+                self.synchronizuj()
+
+
+def main(argv=None):
+    from SetaCore import API_URL, LOG_DIR, prihlaseni_ze_souboru
+    from ShotUploader import ShotUploader
+
+    parser = argparse.ArgumentParser(prog="python -m ShotSpool",
+                                     description="Nahraje rány uložené v offline režimu.")
+    parser.add_argument('--spool', default=os.path.join(LOG_DIR, 'spool'), help="adresář spoolu")
+    parser.add_argument('--api-url', default=API_URL, help="URL endpointu /api/shots")
+    parser.add_argument('--davka', type=int, default=1000, help="ran v jednom požadavku")
+    parser.add_argument('--config', help="config.txt s přihlášením (uzivatelske_id, heslo), výchozí z USB nebo lokální")
+    parser.add_argument('--podil', type=float, default=1.0,
+                        help="nejvyšší podíl času stráveného odesíláním (0-1], méně šetří linku")
+    parser.add_argument('--stav', action='store_true', help="jen vypsat stav spoolu")
+    parser.add_argument('-v', '--verbose', action='store_true', help="podrobné logování")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    spool = ShotSpool(args.spool)
+    uploader = ShotUploader(args.api_url, gzip_body=True, prihlaseni=prihlaseni_ze_souboru(args.config))
+    sync = SpoolSync(spool, uploader, davka=args.davka, podil=args.podil,
+                     karantena=os.path.join(LOG_DIR, 'quarantine.jsonl'))
+    try:
+        for (user_id, race_id), ulozeno, odeslano in spool.cekajici():
+            logging.info(f"{user_id}/{race_id}: nahráno {odeslano} z {ulozeno} ran")
+        if args.stav:
+            return 0
+        stop = threading.Event()
+        vlakno = threading.Thread(target=lambda: sync.synchronizuj(stop), daemon=True)
+        vlakno.start()
+        try:
+            while vlakno.is_alive():
+                vlakno.join(1.0)
+                logging.info(sync.popis())
+        except KeyboardInterrupt:
+            stop.set()
+            vlakno.join()
+    finally:
+        uploader.zavri()
+        spool.zavri()
+    return 0 if not spool.cekajici() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import array
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Sloupcový formát závodu (.shots), stejný čte i zapisuje seta-web (src/lib/shotStore.ts).
+#
+# Hlavička (32 B, little-endian):
+#   magic 'SETASHOT' | u16 verze | u16 velikost hlavičky | u16 šířka času
+#   | u16 rezerva | u64 počet potvrzených ran | u64 rezerva
+# Za ní následují bloky, jeden na každé připsání:
+#   u32 počet ran n | u32 rezerva
+#   x f64[n] | y f64[n] | score f64[n] | prijato f64[n] | id u64[n] | index i32[n]
+#   | time bytes[SIRKA_CASU * n] | zarovnání na 8 B
+# Počet v hlavičce se zapíše až po bloku, takže nedokončený blok se při čtení
+# ignoruje. Chybějící score je NaN, chybějící id 0.
+
+MAGIC = b'SETASHOT'
+VERZE = 1
+HLAVICKA = struct.Struct('<8sHHHHQQ')
+BLOK = struct.Struct('<II')
+SIRKA_CASU = 32
+POZICE_POCTU = 16
+
+SLOUPCE_F64 = ('x', 'y', 'score', 'prijato')
+
+
+def velikost_bloku(pocet):
+    """Velikost bloku s pocet ranami včetně zarovnání."""
+    velikost = BLOK.size + pocet * (8 * len(SLOUPCE_F64) + 8 + 4 + SIRKA_CASU)
+    return velikost + (-velikost % 8)
+
+
+def _pole(typ, hodnoty):
+    pole = array.array(typ, hodnoty)
+    if sys.byteorder == 'big':
+        pole.byteswap()
+    return pole.tobytes()
+
+
+class ShotStore:
+    """Append-only sloupcové úložiště ran jednoho závodu.
+
+    Celý závod se načte jedním sekvenčním čtením (nebo namapuje přes mmap);
+    s numpy vrací nacti() pohledy do namapovaného souboru bez kopírování.
+    S jen_cist=True soubor nic nemění, takže jde číst i závod, do kterého
+    právě zapisuje server (nedokončený blok se jen přeskočí).
+    """
+
+    def __init__(self, cesta, jen_cist=False):
+        self.cesta = cesta
+        self.jen_cist = jen_cist
+        self._lock = threading.Lock()
+        novy = not os.path.exists(cesta) or os.path.getsize(cesta) == 0
+        if jen_cist:
+            self._soubor = open(cesta, 'rb')
+        else:
+            self._soubor = open(cesta, 'w+b' if novy else 'r+b')
+        if novy:
+            if not jen_cist:
+                self._soubor.write(HLAVICKA.pack(MAGIC, VERZE, HLAVICKA.size, SIRKA_CASU, 0, 0, 0))
+                self._soubor.flush()
+            self.pocet = 0
+            self._konec = HLAVICKA.size
+        else:
+            self.pocet, self._konec = self._over_hlavicku()
+            if not jen_cist:
+                self._soubor.truncate(self._konec)  # Zbytek nedokončeného zápisu
+
+    def _over_hlavicku(self):
+        self._soubor.seek(0)
+        magic, verze, velikost, sirka, _, pocet, _ = HLAVICKA.unpack(self._soubor.read(HLAVICKA.size))
+        if magic != MAGIC or verze != VERZE or sirka != SIRKA_CASU:
+            raise ValueError(f"Neplatný soubor závodu: {self.cesta}")
+        # Konec posledního potvrzeného bloku, za ním může být nedokončený zápis
+        konec = velikost
+        zbyva = pocet
+        while zbyva > 0:
+            self._soubor.seek(konec)
+            n, _ = BLOK.unpack(self._soubor.read(BLOK.size))
+            konec += velikost_bloku(n)
+            zbyva -= n
+        return pocet, konec
+
+    def __len__(self):
+        return self.pocet
+
+    def pripoj(self, strely, prijato=None):
+        """Připíše rány jako jeden blok; strely jsou dicty z parseru nebo ShotSendQueue."""
+        if not strely:
+            return
+        prijato = time.time() * 1000 if prijato is None else prijato
+        n = len(strely)
+        casy = b''.join(str(strela.get('time') or '').encode('utf-8')[:SIRKA_CASU].ljust(SIRKA_CASU, b'\0')
+                        for strela in strely)
+        casti = [
+            BLOK.pack(n, 0),
+            _pole('d', (float(strela['x']) for strela in strely)),
+            _pole('d', (float(strela['y']) for strela in strely)),
+            _pole('d', (float('nan') if strela.get('score') is None else strela['score'] for strela in strely)),
+            _pole('d', [prijato] * n),
+            _pole('Q', (int(strela['id'], 16) if strela.get('id') else 0 for strela in strely)),
+            _pole('i', (int(strela.get('index', 0)) for strela in strely)),
+            casy,
+        ]
+        blok = b''.join(casti)
+        blok += b'\0' * (velikost_bloku(n) - len(blok))
+
+        with self._lock:
+            self._soubor.seek(self._konec)
+            self._soubor.write(blok)
+            self._soubor.flush()
+            self._konec += len(blok)
+            self.pocet += n
+            self._soubor.seek(POZICE_POCTU)
+            self._soubor.write(struct.pack('<Q', self.pocet))
+            self._soubor.flush()
+
+    def nacti(self):
+        """Vrátí sloupce závodu jako dict polí (numpy, jinak array.array) a seznam časů."""
+        with self._lock:
+            pocet = self.pocet
+            if pocet == 0:
+                data = b''
+            elif np is not None:
+                data = mmap.mmap(self._soubor.fileno(), self._konec, access=mmap.ACCESS_READ)
+            else:
+                self._soubor.seek(0)
+                data = self._soubor.read(self._konec)
+        sloupce = {nazev: [] for nazev in SLOUPCE_F64 + ('id', 'index')}
+        casy = []
+        pozice = HLAVICKA.size
+        zbyva = pocet
+        while zbyva > 0:
+            n, _ = BLOK.unpack_from(data, pozice)
+            zacatek = pozice + BLOK.size
+            for typ, nazvy, sirka in (('d', SLOUPCE_F64, 8), ('Q', ('id',), 8), ('i', ('index',), 4)):
+                for nazev in nazvy:
+                    sloupce[nazev].append(self._sloupec(data, typ, zacatek, n))
+                    zacatek += n * sirka
+            casy.extend(bytes(data[zacatek + i * SIRKA_CASU:zacatek + (i + 1) * SIRKA_CASU])
+                        .rstrip(b'\0').decode('utf-8', 'replace') for i in range(n))
+            pozice += velikost_bloku(n)
+            zbyva -= n
+        vysledek = {nazev: self._spoj('d', sloupce[nazev]) for nazev in SLOUPCE_F64}
+        vysledek['id'] = self._spoj('Q', sloupce['id'])
+        vysledek['index'] = self._spoj('i', sloupce['index'])
+        vysledek['time'] = casy
+        return vysledek
+
+    @staticmethod
+    def _sloupec(data, typ, zacatek, n):
+        if np is not None:
+            return np.frombuffer(data, dtype='<' + {'d': 'f8', 'Q': 'u8', 'i': 'i4'}[typ], count=n, offset=zacatek)
+        pole = array.array(typ)
+        pole.frombytes(data[zacatek:zacatek + n * pole.itemsize])
+        if sys.byteorder == 'big':
+            pole.byteswap()
+        return pole
+
+    @staticmethod
+    def _spoj(typ, casti):
+        if np is not None:
+            if len(casti) == 1:
+                return casti[0]  # Jediný blok zůstane pohledem do mmap
+            return np.concatenate(casti) if casti else np.empty(0, dtype={'d': 'f8', 'Q': 'u8', 'i': 'i4'}[typ])
+        vysledek = array.array(typ)
+        for cast in casti:
+            vysledek.extend(cast)
+        return vysledek
+
+    def strely(self):
+        """Vrátí rány jako seznam dictů ve stejném tvaru, jaký posílá uploader."""
+        sloupce = self.nacti()
+        vysledek = []
+        for i in range(len(sloupce['time'])):
+            score = float(sloupce['score'][i])
+            id_strely = int(sloupce['id'][i])
+            vysledek.append({
+                'x': float(sloupce['x'][i]),
+                'y': float(sloupce['y'][i]),
+                'time': sloupce['time'][i],
+                'index': int(sloupce['index'][i]),
+                'id': f"{id_strely:016x}" if id_strely else None,
+                'score': None if score != score else score,
+            })
+        return vysledek
+
+    def zavri(self):
+        with self._lock:
+            if self._soubor:
+                self._soubor.close()
+                self._soubor = None
+
+
+if __name__ == '__main__':
+    # Převod .tch souboru do sloupcového formátu: python -m ShotStore Match_1.tch zavod.shots
+    from SetaCore import parsuj_tch_soubor
+    from ShotScoring import skore
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if len(sys.argv) != 3:
+        print("Použití: python -m ShotStore <soubor.tch> <cil.shots>")
+        sys.exit(2)
+    strely = parsuj_tch_soubor(sys.argv[1]) or []
+    # index z parseru počítá i vadné záznamy, takže sedí s živým odesíláním
+    for strela in strely:
+        strela['score'] = skore(strela['x'], strela['y'])
+    store = ShotStore(sys.argv[2])
+    store.pripoj(strely)
+    logging.info(f"Zapsáno {len(strely)} ran, celkem {len(store)} v {sys.argv[2]}")
+    store.zavri()
@@ -0,0 +1,135 @@
+import collections
+import json
+import logging
+import threading
+import time
+
+from ShotCodec import zakoduj_davku
+
+MIN_VZOREK = 1024  # Nejmenší tělo (B), ze kterého se odhaduje propustnost
+# Chyba 400 serveru, který binární tělo vůbec neumí přečíst (starší seta-web
+# i brána čekají JSON); jiná 400 je vadná dávka, ne neznámý formát
+NEZNAMY_FORMAT = ('Invalid request body',)
+
+
+def format_nerozpoznan(response):
+    """True, pokud server odmítl rámec proto, že formát ShotCodec nezná."""
+    if response.status_code == 415:
+        return True
+    if response.status_code != 400:
+        return False
+    try:
+        return json.loads(response.text).get('error') in NEZNAMY_FORMAT
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+class ShotTransport:
+    """Adaptivní přenos dávek pro pomalé linky (mobilní hotspot).
+
+    Obaluje ShotUploader nebo ShotSocketUploader a měří RTT (nejkratší
+    nedávná odezva) a propustnost linky. Na rychlé lince se každá rána
+    posílá hned, na pomalé ShotSendQueue podle cekani() sbírá rány do
+    mikrodávek, nejdéle rozpocet sekund od zařazení nejstarší z nich.
+    Dávky se posílají v kompaktním formátu ShotCodec (delta a varint,
+    gzip); pokud ho server nezná, přenos se vrátí k JSON. Rozhraní je
+    stejné jako u ShotUploader.
+    """
+
+    def __init__(self, uploader, rozpocet=0.1, prah_rtt=0.03, prah_propustnosti=256 * 1024,
+                 kompaktni=True, vzorku_rtt=32, alfa=0.2):
+        self.uploader = uploader
+        self.rozpocet = rozpocet
+        self.prah_rtt = prah_rtt
+        self.prah_propustnosti = prah_propustnosti  # B/s, pod ní se vždy dávkuje
+        self.kompaktni = kompaktni
+        self.alfa = alfa
+        self._lock = threading.Lock()
+        self._odezvy = collections.deque(maxlen=vzorku_rtt)
+        self._overeno = False  # Server už kompaktní rámec přijal
+        self.rtt = None
+        self.propustnost = None  # B/s, klouzavý průměr
+        self.bajtu = 0
+        self.bajtu_json = 0  # Kolik by stejné dávky měly jako JSON
+
+    def mikrodavky(self):
+        """True, pokud je linka pomalá a vyplatí se rány sbírat do dávek."""
+        with self._lock:
+            if self.rtt is not None and self.rtt > self.prah_rtt:
+                return True
+            return self.propustnost is not None and self.propustnost < self.prah_propustnosti
+
+    def cekani(self, vek_nejstarsi):
+        """Jak dlouho ještě sbírat rány, když nejstarší čeká vek_nejstarsi sekund."""
+        if not self.mikrodavky():
+            return 0.0
+        return max(self.rozpocet - vek_nejstarsi, 0.0)
+
+    def _zmer(self, bajtu, trvani):
+        with self._lock:
+            self._odezvy.append(trvani)
+            self.rtt = min(self._odezvy)
+            prenos = trvani - self.rtt
+            # U malých těl a krátkých přenosů by odhad měřil jen šum, ne linku
+            if bajtu >= MIN_VZOREK and prenos > 0.002:
+                vzorek = bajtu / prenos
+                self.propustnost = vzorek if self.propustnost is None else (
+                    self.alfa * vzorek + (1 - self.alfa) * self.propustnost)
+
+    def odesli(self, payload):
+        """Odešle dávku, kompaktně pokud to jde, a změří odezvu."""
+        if self.kompaktni:
+            ramec = zakoduj_davku(payload)
+            if ramec is not None:
+                start = time.perf_counter()
+                response = self.uploader.odesli_kompaktne(ramec)
+                self._zmer(len(ramec), time.perf_counter() - start)
+                if response.status_code == 200:
+                    self._overeno = True
+                    with self._lock:
+                        self.bajtu += len(ramec)
+                        self.bajtu_json += len(json.dumps(payload))
+                    return response
+                if self._overeno or not format_nerozpoznan(response):
+                    return response
+                # Starší server rámci nerozumí, dál se posílá JSON
+                logging.warning(f"Server nepřijal kompaktní formát ({response.status_code}), posílám JSON")
+                self.kompaktni = False
+
+        telo = len(json.dumps(payload))
+        start = time.perf_counter()
+        response = self.uploader.odesli(payload)
+        self._zmer(telo, time.perf_counter() - start)
+        if response.status_code == 200:
+            with self._lock:
+                self.bajtu += telo
+                self.bajtu_json += telo
+        return response
+
+    def nastav_url(self, api_url):
+        self.uploader.nastav_url(api_url)
+        self._overeno = False
+        self.kompaktni = True  # Nový server se ověří znovu
+        with self._lock:
+            self._odezvy.clear()
+            self.rtt = None
+            self.propustnost = None
+
+    def nastav_prihlaseni(self, prihlaseni):
+        self.uploader.nastav_prihlaseni(prihlaseni)
+
+    def metriky(self):
+        """Metriky obaleného uploaderu doplněné o stav linky."""
+        metriky = self.uploader.metriky()
+        mikrodavky = self.mikrodavky()
+        with self._lock:
+            metriky['transport_rtt_ms'] = round(self.rtt * 1000, 2) if self.rtt is not None else None
+            metriky['transport_propustnost_kb_s'] = (round(self.propustnost / 1024, 1)
+                                                     if self.propustnost is not None else None)
+            metriky['transport_mikrodavky'] = mikrodavky
+            metriky['transport_kompaktni'] = self.kompaktni
+            metriky['transport_uspora'] = round(1 - self.bajtu / self.bajtu_json, 3) if self.bajtu_json else None
+        return metriky
+
+    def zavri(self):
+        self.uploader.zavri()
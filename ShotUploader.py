@@ -0,0 +1,113 @@
+import collections
+import gzip
+import json
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ShotCodec import TYP_OBSAHU
+
+
+class ShotUploader:
+    """Dlouhodobě žijící HTTP klient pro /api/shots se sdíleným poolem spojení.
+
+    Udržuje keep-alive spojení přes requests.Session, volitelně komprimuje
+    těla požadavků gzipem a sbírá jednoduché metriky (latence, znovupoužitá
+    spojení). S prihlaseni=(uzivatelske_id, heslo) posílá HTTP Basic
+    přihlášení, které vyžaduje ingest brána (IngestGateway).
+    """
+
+    def __init__(self, api_url, timeout=(3.05, 10), pool_size=4, gzip_body=False,
+                 gzip_min_size=1024, max_vzorku=1024, prihlaseni=None):
+        self.api_url = api_url
+        self.timeout = timeout
+        self.gzip_body = gzip_body
+        self.gzip_min_size = gzip_min_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+        self.session.auth = prihlaseni
+        self._adapter = adapter
+
+        self._lock = threading.Lock()
+        self._latence = collections.deque(maxlen=max_vzorku)
+        self.pocet_pozadavku = 0
+        self.pocet_chyb = 0
+
+    def odesli(self, payload):
+        """Odešle JSON payload na API a vrátí response (výjimky propouští dál)."""
+        telo = json.dumps(payload).encode('utf-8')
+        hlavicky = {'Content-Type': 'application/json'}
+        if self.gzip_body and len(telo) >= self.gzip_min_size:
+            telo = gzip.compress(telo, compresslevel=5)
+            hlavicky['Content-Encoding'] = 'gzip'
+        return self._posli(telo, hlavicky)
+
+    def odesli_kompaktne(self, ramec):
+        """Odešle dávku zakódovanou přes ShotCodec (komprese je součástí rámce)."""
+        return self._posli(ramec, {'Content-Type': TYP_OBSAHU})
+
+    def _posli(self, telo, hlavicky):
+        start = time.perf_counter()
+        try:
+            response = self.session.post(self.api_url, data=telo, headers=hlavicky, timeout=self.timeout)
+        except requests.RequestException:
+            with self._lock:
+                self.pocet_pozadavku += 1
+                self.pocet_chyb += 1
+            raise
+
+        with self._lock:
+            self._latence.append(time.perf_counter() - start)
+            self.pocet_pozadavku += 1
+            if response.status_code != 200:
+                self.pocet_chyb += 1
+        return response
+
+    def nastav_url(self, api_url):
+        """Další požadavky půjdou na jiný endpoint."""
+        self.api_url = api_url
+
+    def nastav_prihlaseni(self, prihlaseni):
+        """Další požadavky se přihlásí novým (uzivatelske_id, heslo), None = bez přihlášení."""
+        self.session.auth = prihlaseni
+
+    def znovupouzita_spojeni(self):
+        """Vrátí počet požadavků, které nepotřebovaly nové TCP spojení."""
+        pools = self._adapter.poolmanager.pools
+        znovupouzito = 0
+        try:
+            for klic in pools.keys():
+                pool = pools[klic]
+                znovupouzito += max(pool.num_requests - pool.num_connections, 0)
+        except (KeyError, AttributeError) as e:
+            logging.debug(f"Nelze zjistit stav poolu spojení: {e}")
+        return znovupouzito
+
+    def metriky(self):
+        """Vrátí slovník s metrikami uploaderu."""
+        with self._lock:
+            latence = sorted(self._latence)
+            metriky = {
+                'pocet_pozadavku': self.pocet_pozadavku,
+                'pocet_chyb': self.pocet_chyb,
+            }
+        metriky['znovupouzita_spojeni'] = self.znovupouzita_spojeni()
+        for percentil in (50, 90, 99):
+            klic = f'latence_p{percentil}_ms'
+            if latence:
+                index = min(len(latence) - 1, int(len(latence) * percentil / 100))
+                metriky[klic] = round(latence[index] * 1000, 2)
+            else:
+                metriky[klic] = None
+        return metriky
+
+    def zavri(self):
+        """Zavře všechna spojení v poolu."""
+        self.session.close()
@@ -0,0 +1,368 @@
+import bisect
+import hashlib
+import logging
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+
+# Konec GameData elementu - za touto hranicí SETA připisuje nové rány,
+# proto ji parseru nikdy nepředáváme.
+KONEC_GAME_DATA = re.compile(rb'</GameData|<GameData\s*/>')
+# Počáteční tag GameData - hlavička souboru končí za ním
+ZACATEK_GAME_DATA = re.compile(rb'<GameData(?:\s[^>]*)?>')
+PRVNI_ZAZNAM = re.compile(rb'<GameData(?:\s[^>]*)?>\s*<([^\s/>]+)')
+
+# Kolik bajtů před offsetem se při každém čtení porovná s tím, co už parser dostal
+KONTROLNI_OKNO = 64
+# Jak dlouho čekat, než zkrácený soubor se sedícím začátkem znovu naroste (přepis trvá ms)
+CEKANI_NA_PREPIS = 5.0
+
+
+class Checkpoint:
+    """Stav parseru na hranici záznamů, ze kterého lze pokračovat bez parsování od začátku.
+
+    offset ukazuje za poslední úplný záznam, hash je otisk souboru do offsetu
+    a hlavicka délka začátku souboru včetně tagu <GameData>.
+    """
+
+    def __init__(self, offset, pocet_zaznamu, hash_prefixu, hlavicka):
+        self.offset = offset
+        self.pocet_zaznamu = pocet_zaznamu
+        self.hash_prefixu = hash_prefixu
+        self.hlavicka = hlavicka
+
+    @property
+    def hash(self):
+        return self.hash_prefixu.hexdigest()
+
+
+class TchStreamParser:
+    """Inkrementální parser .tch souboru, který zpracovává jen nově připsané rány.
+
+    Pamatuje si bajtový offset a počet již zpracovaných záznamů v GameData,
+    takže každé volání nacti_nove() parsuje jen data připsaná od minula.
+    Neúplný poslední záznam (SETA soubor právě zapisuje) se dočte při dalším
+    volání. Po každém úplném záznamu se uloží checkpoint; když se soubor
+    zkrátí, přepíše nebo parser narazí na chybu, pokračuje se z checkpointu,
+    pokud se začátek souboru nezměnil, jinak se soubor řízeně přečte znovu.
+    SETA soubor přepisuje zkrácením a novým zápisem - dokud je kratší než
+    checkpoint a jeho zbylý začátek sedí, parser nejvýše CEKANI_NA_PREPIS
+    sekund jen čeká, až se dopíše.
+    """
+
+    def __init__(self, filepath, fault_handler=None):
+        self.filepath = filepath
+        self.fault_handler = fault_handler
+        self._tag_zaznamu = None  # Jméno elementu jednoho záznamu v GameData
+        self.reset()
+
+    def reset(self):
+        """Zahodí stav parseru, další čtení začne od začátku souboru."""
+        self.checkpoint = None
+        # Přečtená místa souboru a bajty těsně před nimi, pro kontrolu zkráceného souboru
+        self._prefixy = []
+        self._okna = []
+        self._ceka_od = None  # time.monotonic(), od kdy je soubor kratší než checkpoint
+        self._soubor_id = None
+        self._vydano = 0  # Rány s nižším indexem už byly vráceny
+        self._chyba_pri = None  # (offset checkpointu, velikost) při poslední chybě parsování
+        self._novy_parser(0)
+
+    def _novy_parser(self, pocet_zaznamu):
+        self.offset = 0
+        self.pocet_zaznamu = pocet_zaznamu
+        self.user_name = None
+        self._parser = ET.XMLPullParser(events=('start', 'end'))
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._posledni_bajty = b''
+        self._zacatek = b''  # Začátek souboru, dokud nenajdeme tag <GameData>
+        self._hlavicka = None
+        self._hloubka = 0
+        self._game_data = None
+        self._neplatny = False
+
+    def nacti_nove(self):
+        """Přečte nově připsaná data a vrátí seznam nových ran."""
+        try:
+            stat = os.stat(self.filepath)
+        except OSError:
+            if self.offset:
+                self.reset()  # Soubor byl smazán, nový začneme číst od začátku
+            return []
+
+        with open(self.filepath, 'rb') as file:
+            soubor_id = (stat.st_dev, stat.st_ino)
+            if self.offset and (stat.st_size < self.offset or soubor_id != self._soubor_id
+                                or not self._konec_sedi(file)):
+                if self._zotav(file, stat.st_size, "Soubor byl zkrácen nebo přepsán",
+                               prepis=soubor_id == self._soubor_id) == 'ceka':
+                    return []
+            self._ceka_od = None
+            self._soubor_id = soubor_id
+
+            if stat.st_size == self.offset or self._chyba_pri == (self.offset, stat.st_size):
+                return []  # Nic nového, nebo čekáme na další data za chybným místem
+
+            file.seek(self.offset)
+            blok = file.read(stat.st_size - self.offset)
+            konec = self._hranice_bloku(blok)
+            if konec == 0:
+                return []
+
+            self._parser.feed(blok[:konec])
+            self._prijato(blok[:konec])
+            strely, chyba = self._zpracuj_udalosti()
+            if chyba is None:
+                self._chyba_pri = None
+                self._uloz_checkpoint()
+            else:
+                vydano = self._vydano
+                zotaveni = self._zotav(file, stat.st_size, f"Chyba při parsování XML souboru {self.filepath}")
+                if zotaveni == 'zmena':
+                    return strely + self.nacti_nove()  # Začátek se změnil, čteme znovu hned
+                self._vydano = vydano  # Stejný obsah, už vrácené rány nevracíme znovu
+                self._soubor_id = soubor_id
+                strely += self._po_zaznamech(file, stat.st_size, chyba)
+
+        if strely:
+            logging.debug(f"Nové rány v {self.filepath}: {strely}")
+        return strely
+
+    def _prijato(self, data):
+        """Započítá data předaná parseru do offsetu a hashe prefixu."""
+        if self._hlavicka is None:
+            self._zacatek += data
+            match = ZACATEK_GAME_DATA.search(self._zacatek)
+            if match:
+                self._hlavicka = match.end()
+                # Hlavička (střelec, disciplína) se porovnává celá, další místa jen oknem
+                self._pridej_prefix(self._hlavicka, self._zacatek[:match.end()])
+                self._zacatek = b''
+        self.offset += len(data)
+        self._hash.update(data)
+        self._posledni_bajty = (self._posledni_bajty + data)[-KONTROLNI_OKNO:]
+        self._pridej_prefix(self.offset, self._posledni_bajty)
+
+    def _pridej_prefix(self, offset, okno):
+        if not self._prefixy or self._prefixy[-1] < offset:
+            self._prefixy.append(offset)
+            self._okna.append(okno)
+
+    def _konec_sedi(self, file):
+        """Ověří, že bajty těsně před offsetem jsou stále ty, které parser dostal."""
+        file.seek(self.offset - len(self._posledni_bajty))
+        return file.read(len(self._posledni_bajty)) == self._posledni_bajty
+
+    def _uloz_checkpoint(self):
+        # Jen na hranici záznamů uvnitř GameData, ne uprostřed rozepsaného záznamu
+        if self._hloubka == 2 and self._game_data is not None and self._hlavicka is not None:
+            self.checkpoint = Checkpoint(self.offset, self.pocet_zaznamu, self._hash.copy(), self._hlavicka)
+
+    def _zotav(self, file, velikost, duvod, prepis=False):
+        """Pokračuje z checkpointu, pokud začátek souboru sedí, jinak čte soubor znovu od začátku.
+
+        S prepis=True (stejný soubor zkrácený a zapisovaný znovu) se začátek
+        ověří jen oknem bajtů před checkpointem jako u běžného čtení, aby
+        přepis nestál čas úměrný délce souboru; jinak hashem celého začátku.
+
+        Vrátí 'checkpoint', 'ceka' (soubor je kratší než checkpoint, ale jeho
+        začátek sedí - SETA ho právě přepisuje), 'zmena' (začátek souboru je
+        jiný) nebo 'od_zacatku' (checkpoint zatím nebyl).
+        """
+        checkpoint = self.checkpoint
+        if checkpoint is None:
+            self.reset()
+            return 'od_zacatku'
+        if velikost < checkpoint.offset:
+            ted = time.monotonic()
+            if self._ceka_od is None:
+                self._ceka_od = ted
+            if ted - self._ceka_od < CEKANI_NA_PREPIS and self._zbytek_sedi(file, velikost):
+                # Stav i vrácené rány zůstávají, pokračuje se, až soubor naroste
+                logging.debug(f"{duvod}, soubor je kratší než checkpoint, čekám na dopsání: {self.filepath}")
+                return 'ceka'
+        elif (self._zbytek_sedi(file, checkpoint.offset) if prepis
+              else self._hash_prefixu(file, checkpoint.offset) == checkpoint.hash):
+            logging.info(f"{duvod}, pokračuji od checkpointu ({checkpoint.pocet_zaznamu} záznamů): {self.filepath}")
+            self._obnov(file, checkpoint)
+            return 'checkpoint'
+        logging.info(f"{duvod}, začátek souboru se změnil, čtu znovu od začátku: {self.filepath}")
+        self.reset()
+        return 'zmena'
+
+    def _zbytek_sedi(self, file, velikost):
+        """Sedí bajty před nejbližším přečteným místem do velikost s tím, co parser dostal?"""
+        poradi = bisect.bisect_right(self._prefixy, velikost) - 1
+        if poradi < 0:
+            return True  # Soubor je kratší než hlavička, není s čím porovnat
+        offset, okno = self._prefixy[poradi], self._okna[poradi]
+        file.seek(offset - len(okno))
+        return file.read(len(okno)) == okno
+
+    @staticmethod
+    def _hash_prefixu(file, delka):
+        hash_prefixu = hashlib.blake2b(digest_size=16)
+        file.seek(0)
+        zbyva = delka
+        while zbyva > 0:
+            data = file.read(min(zbyva, 1024 * 1024))
+            if not data:
+                break
+            hash_prefixu.update(data)
+            zbyva -= len(data)
+        return hash_prefixu.hexdigest()
+
+    def _obnov(self, file, checkpoint):
+        """Postaví nový parser z hlavičky souboru a posune ho na offset checkpointu."""
+        self._novy_parser(checkpoint.pocet_zaznamu)
+        file.seek(0)
+        hlavicka = file.read(checkpoint.hlavicka)
+        self._parser.feed(hlavicka)
+        self._zpracuj_udalosti()  # Jen hlavička, záznamy v ní nejsou
+        file.seek(checkpoint.offset - KONTROLNI_OKNO if checkpoint.offset > KONTROLNI_OKNO else 0)
+        self._posledni_bajty = file.read(min(checkpoint.offset, KONTROLNI_OKNO))
+        self.offset = checkpoint.offset
+        self.pocet_zaznamu = checkpoint.pocet_zaznamu
+        self._hash = checkpoint.hash_prefixu.copy()
+        self._hlavicka = checkpoint.hlavicka
+        self.checkpoint = checkpoint
+        poradi = bisect.bisect_right(self._prefixy, checkpoint.offset)
+        del self._prefixy[poradi:], self._okna[poradi:]
+
+    def _po_zaznamech(self, file, velikost, chyba):
+        """Po chybě čte od checkpointu po jednotlivých záznamech.
+
+        Checkpoint se tak posune těsně před vadný záznam. Vadný záznam se
+        přeskočí, jakmile za ním SETA zapsala další úplný záznam; do té doby
+        se čeká na další data.
+        """
+        file.seek(self.offset)
+        data = file.read(velikost - self.offset)
+        data = data[:self._hranice_bloku(data)]
+        zacatek = 0
+        if self._hlavicka is None:
+            match = ZACATEK_GAME_DATA.search(data)
+            if not match:
+                return self._cekej_na_data(velikost, chyba)
+            zacatek = match.end()
+            self._parser.feed(data[:zacatek])
+            _, chyba_hlavicky = self._zpracuj_udalosti()
+            if chyba_hlavicky is not None:
+                self._novy_parser(0)
+                return self._cekej_na_data(velikost, chyba_hlavicky)  # Vadná hlavička souboru
+            self._prijato(data[:zacatek])
+            self._uloz_checkpoint()
+        tag = self._tag_zaznamu or self._najdi_tag(file)
+        if tag is None:
+            return self._cekej_na_data(velikost, chyba)
+
+        strely = []
+        tag = re.escape(tag.encode('utf-8'))
+        konce = [match.end() for match in re.finditer(rb'</' + tag + rb'\s*>', data) if match.start() >= zacatek]
+        zacatky = re.compile(rb'<' + tag + rb'[\s/>]')
+        poradi = 0
+        while poradi < len(konce):
+            konec = konce[poradi]
+            kus = data[zacatek:konec]
+            self._parser.feed(kus)
+            nove, chyba_kusu = self._zpracuj_udalosti()
+            strely += nove
+            if chyba_kusu is not None:
+                self._obnov(file, self.checkpoint)
+                # Poškozený koncový tag: kus obsahuje i začátek dalšího záznamu, vadný končí před ním
+                prvni = zacatky.search(data, zacatek, konec)
+                dalsi = zacatky.search(data, prvni.end(), konec) if prvni else None
+                if dalsi is None and poradi == len(konce) - 1:
+                    return strely + self._cekej_na_data(velikost, chyba_kusu)
+                # Za vadným záznamem už jsou další, SETA ho nedopíše - přeskočíme ho
+                self.pocet_zaznamu += 1
+                self._vydano = max(self._vydano, self.pocet_zaznamu)
+                self._chyba(f"Vadný záznam č. {self.pocet_zaznamu} v {self.filepath} přeskočen: {chyba_kusu}")
+                if dalsi is not None:
+                    # Přeskočí se jen vadný záznam, zbytek kusu se parseru předá znovu
+                    self._prijato(data[zacatek:dalsi.start()])
+                    self._uloz_checkpoint()
+                    zacatek = dalsi.start()
+                    continue
+            self._prijato(kus)
+            self._uloz_checkpoint()
+            zacatek = konec
+            poradi += 1
+        self._chyba_pri = None
+        return strely
+
+    def _cekej_na_data(self, velikost, chyba):
+        """Zaloguje chybu (jednou na checkpoint) a počká, až soubor naroste."""
+        if self._chyba_pri is None or self._chyba_pri[0] != self.offset:
+            self._chyba(f"Chyba při parsování XML souboru {self.filepath}: {chyba} "
+                        f"(čekám na další data od bajtu {self.offset})")
+        self._chyba_pri = (self.offset, velikost)
+        return []
+
+    def _najdi_tag(self, file):
+        file.seek(0)
+        match = PRVNI_ZAZNAM.search(file.read(64 * 1024))
+        if match:
+            self._tag_zaznamu = match.group(1).decode('utf-8', 'replace')
+        return self._tag_zaznamu
+
+    def _hranice_bloku(self, blok):
+        """Vrátí délku části bloku, kterou lze bezpečně předat parseru."""
+        match = KONEC_GAME_DATA.search(blok)
+        if match:
+            return match.start()
+        return blok.rfind(b'>') + 1
+
+    def _zpracuj_udalosti(self):
+        """Projde události pull parseru a vrátí nově dokončené rány a případnou chybu."""
+        strely = []
+        try:
+            for udalost, elem in self._parser.read_events():
+                if udalost == 'start':
+                    self._hloubka += 1
+                    if self._hloubka == 2 and elem.tag == 'GameData':
+                        self._game_data = elem
+                        if not self.user_name:
+                            self._neplatny = True
+                            self._chyba(f"Prázdné nebo chybějící user_name: {self.filepath}")
+                    continue
+
+                if self._hloubka == 3 and self._game_data is not None:
+                    self.pocet_zaznamu += 1
+                    # Po návratu ke checkpointu se už vrácené rány nevrací znovu
+                    if self._neplatny or self.pocet_zaznamu <= self._vydano:
+                        strela = None
+                    else:
+                        strela = self._strela(elem)
+                    self._game_data.remove(elem)  # Udržuje paměť konstantní
+                    self._tag_zaznamu = elem.tag
+                    if strela is not None:
+                        strely.append(strela)
+                    self._vydano = max(self._vydano, self.pocet_zaznamu)
+                elif self._hloubka == 3 and elem.tag == 'user_name':
+                    self.user_name = elem.text
+                elif self._hloubka == 2 and elem is self._game_data:
+                    self._game_data = None
+                self._hloubka -= 1
+        except ET.ParseError as e:
+            return strely, e
+        return strely, None
+
+    def _strela(self, data_element):
+        """Převede jeden záznam GameData na slovník rány."""
+        try:
+            return {
+                'index': self.pocet_zaznamu - 1,
+                'x': float(data_element.find('x_data').text),
+                'y': float(data_element.find('y_data').text),
+                'time': data_element.find('time_stamp').text
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            self._chyba(f"Neplatná data v záznamu {data_element.tag}: {str(e)}")
+            return None
+
+    def _chyba(self, zprava):
+        if self.fault_handler:
+            self.fault_handler.log_fault(zprava)
+        logging.warning(zprava)
@@ -0,0 +1,243 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from FileWatcher import vytvor_watcher
+from ShotMetrics import oznac_strely
+from TchStreamParser import TchStreamParser
+
+# Značka konce proudu, kterou si stupně předávají při zastavení
+KONEC = object()
+
+
+class Draha:
+    """Jeden monitorovaný Match_*.tch soubor (střelecké stanoviště)."""
+
+    def __init__(self, filepath, user_id, race_id, fault_handler=None):
+        self.filepath = filepath
+        self.user_id = user_id
+        self.race_id = race_id
+        self.parser = TchStreamParser(filepath, fault_handler)
+
+
+class MetrikyStupne:
+    """Počty a latence zpracování jednoho stupně pipeline."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.zpracovano = 0
+        self.celkova_latence = 0.0
+        self.max_latence = 0.0
+
+    def zaznamenej(self, latence):
+        with self._lock:
+            self.zpracovano += 1
+            self.celkova_latence += latence
+            self.max_latence = max(self.max_latence, latence)
+
+    def stav(self):
+        with self._lock:
+            prumer = self.celkova_latence / self.zpracovano if self.zpracovano else 0.0
+            return {
+                'zpracovano': self.zpracovano,
+                'prumerna_latence_ms': round(prumer * 1000, 2),
+                'max_latence_ms': round(self.max_latence * 1000, 2),
+            }
+
+
+class UploadPipeline:
+    """Vícestupňová pipeline watch -> parse -> dedupe -> send.
+
+    Každý stupeň běží ve vlastním vlákně a stupně jsou propojené omezenými
+    frontami, takže pomalý server nezdrží detekci změn v souborech a zahlcený
+    stupeň brzdí ty předchozí. Odesílání zajišťuje ShotSendQueue se svým
+    outboxem; dedupe stupeň čeká, dokud outbox nemá místo.
+
+    nova_draha a smazana_draha jsou volitelné callbacky volané z watch stupně,
+    když se objeví soubor odpovídající vzoru, který zatím není dráhou, nebo
+    když soubor registrované dráhy zmizí.
+    """
+
+    def __init__(self, adresar, vzor, send_queue, fault_handler=None, kapacita=64,
+                 max_cekajicich=10000, nova_draha=None, smazana_draha=None):
+        self.adresar = adresar
+        self.vzor = vzor
+        self.send_queue = send_queue
+        self.fault_handler = fault_handler
+        self.max_cekajicich = max_cekajicich
+        self.nova_draha = nova_draha
+        self.smazana_draha = smazana_draha
+        self.drahy = {}  # filepath -> Draha
+        self.metriky = {nazev: MetrikyStupne() for nazev in ('watch', 'parse', 'dedupe')}
+        self._parse_fronta = queue.Queue(kapacita)
+        self._dedupe_fronta = queue.Queue(kapacita)
+        self._ceka_na_parse = set()
+        self._lock = threading.Lock()
+        self._stop_watch = threading.Event()
+        self._zrusit = threading.Event()
+        self._vlakna = []
+
+    def pridej_drahu(self, filepath, user_id, race_id):
+        """Začne monitorovat soubor jedné dráhy."""
+        with self._lock:
+            self.drahy[filepath] = Draha(filepath, user_id, race_id, self.fault_handler)
+        if self._vlakna:
+            self._zarad_parse(filepath)
+
+    def odeber_drahu(self, filepath):
+        """Přestane monitorovat soubor dráhy."""
+        with self._lock:
+            self.drahy.pop(filepath, None)
+
+    def presmeruj(self, adresar, vzor):
+        """Změní sledovaný adresář a vzor; watch stupeň si watcher vymění bez restartu."""
+        with self._lock:
+            self.adresar = adresar
+            self.vzor = vzor
+
+    def start(self):
+        """Spustí vlákna všech stupňů."""
+        self._stop_watch.clear()
+        self._zrusit.clear()
+        self._vlakna = [
+            threading.Thread(target=self._watch_stupen, name='pipeline-watch', daemon=True),
+            threading.Thread(target=self._parse_stupen, name='pipeline-parse', daemon=True),
+            threading.Thread(target=self._dedupe_stupen, name='pipeline-dedupe', daemon=True),
+        ]
+        for vlakno in self._vlakna:
+            vlakno.start()
+        for filepath in list(self.drahy):
+            self._zarad_parse(filepath)  # Soubor mohl vzniknout ještě před startem
+
+    def stop(self, vyprazdnit=True, timeout=5.0):
+        """Zastaví pipeline; při vyprazdnit=True nejdřív zpracuje rozpracovaná data."""
+        self._stop_watch.set()
+        if not vyprazdnit:
+            self._zrusit.set()
+            self._vyprazdni_frontu(self._parse_fronta)
+            self._vyprazdni_frontu(self._dedupe_fronta)
+        konec = time.monotonic() + timeout
+        for vlakno in self._vlakna:
+            vlakno.join(timeout=max(konec - time.monotonic(), 0))
+        self._vlakna = []
+
+    def stav(self):
+        """Vrátí hloubky front a metriky jednotlivých stupňů."""
+        stav = {nazev: metriky.stav() for nazev, metriky in self.metriky.items()}
+        stav['watch']['drahy'] = len(self.drahy)
+        stav['parse']['hloubka_fronty'] = self._parse_fronta.qsize()
+        stav['dedupe']['hloubka_fronty'] = self._dedupe_fronta.qsize()
+        stav['send'] = {'hloubka_fronty': self.send_queue.outbox.pocet_cekajicich()}
+        return stav
+
+    def _vloz(self, fronta, polozka):
+        """Vloží položku do omezené fronty, čeká dokud není místo (backpressure)."""
+        while not self._zrusit.is_set():
+            try:
+                fronta.put(polozka, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _vezmi(self, fronta):
+        """Vezme položku z fronty, při zrušení pipeline vrátí KONEC."""
+        while not self._zrusit.is_set():
+            try:
+                return fronta.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return KONEC
+
+    @staticmethod
+    def _vyprazdni_frontu(fronta):
+        try:
+            while True:
+                fronta.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _zarad_parse(self, filepath):
+        # Na jeden soubor stačí jedna čekající událost, další se sloučí
+        with self._lock:
+            if filepath in self._ceka_na_parse:
+                return
+            self._ceka_na_parse.add(filepath)
+        if not self._vloz(self._parse_fronta, (filepath, time.perf_counter(), time.time())):
+            with self._lock:
+                self._ceka_na_parse.discard(filepath)
+
+    def _watch_stupen(self):
+        sledovano = (self.adresar, self.vzor)
+        watcher = vytvor_watcher(*sledovano)
+        try:
+            while not self._stop_watch.is_set():
+                if (self.adresar, self.vzor) != sledovano:
+                    watcher.zavri()
+                    sledovano = (self.adresar, self.vzor)
+                    watcher = vytvor_watcher(*sledovano)
+                    logging.info(f"Sleduji {os.path.join(*sledovano)}")
+                    for filepath in list(self.drahy):
+                        self._zarad_parse(filepath)  # Soubor v novém adresáři už může existovat
+                zmenene = watcher.cekej(timeout=0.5)
+                start = time.perf_counter()
+                for filepath in zmenene:
+                    self._zpracuj_zmenu(filepath)
+                if zmenene:
+                    self.metriky['watch'].zaznamenej(time.perf_counter() - start)
+        except Exception as e:
+            logging.error(f"Chyba při sledování adresáře {self.adresar}: {str(e)}")
+        finally:
+            watcher.zavri()
+            for filepath in list(self.drahy):
+                self._zarad_parse(filepath)  # Poslední průchod, ať se nic neztratí
+            self._vloz(self._parse_fronta, KONEC)
+
+    def _zpracuj_zmenu(self, filepath):
+        if filepath in self.drahy:
+            if self.smazana_draha and not os.path.exists(filepath):
+                self.smazana_draha(filepath)
+            else:
+                self._zarad_parse(filepath)
+        elif self.nova_draha and os.path.exists(filepath):
+            self.nova_draha(filepath)  # Callback zaregistruje dráhu přes pridej_drahu
+
+    def _parse_stupen(self):
+        while True:
+            polozka = self._vezmi(self._parse_fronta)
+            if polozka is KONEC:
+                self._vloz(self._dedupe_fronta, KONEC)
+                return
+            filepath, zarazeno, detekce = polozka
+            with self._lock:
+                self._ceka_na_parse.discard(filepath)
+                draha = self.drahy.get(filepath)
+            if draha is None:
+                continue
+            try:
+                nove_strely = draha.parser.nacti_nove()
+            except Exception as e:
+                logging.error(f"Chyba při monitorování souboru: {str(e)}")
+                continue
+            if nove_strely:
+                oznac_strely(nove_strely, detekce, time.time())
+                self._vloz(self._dedupe_fronta, (draha, nove_strely, time.perf_counter()))
+            self.metriky['parse'].zaznamenej(time.perf_counter() - zarazeno)
+
+    def _dedupe_stupen(self):
+        while True:
+            polozka = self._vezmi(self._dedupe_fronta)
+            if polozka is KONEC:
+                return
+            draha, strely, zarazeno = polozka
+            while (self.send_queue.outbox.pocet_cekajicich() >= self.max_cekajicich
+                   and not self._zrusit.is_set()):
+                time.sleep(0.05)  # Outbox je plný, počkáme na odesílání
+            try:
+                self.send_queue.pridej(draha.user_id, draha.race_id, strely)
+                logging.debug(f"Nová data z {draha.filepath} zařazena k odeslání")
+            except Exception as e:
+                logging.error(f"Chyba při zařazování ran z {draha.filepath}: {str(e)}")
+            self.metriky['dedupe'].zaznamenej(time.perf_counter() - zarazeno)
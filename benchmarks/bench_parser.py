@@ -0,0 +1,103 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.generuj_tch import PATICKA, generuj_zaznamy, sestav_dokument
+from benchmarks.spolecne import (percentil, pridej_spolecne_argumenty, spickova_rss_mb,
+                                 vyhodnot, ztlum_logovani)
+from SetaCore import parsuj_tch_soubor
+from TchStreamParser import TchStreamParser
+
+# Mikrobenchmark: náklad na jednu novou ránu při celém parsování (parsuj_tch_soubor)
+# a při inkrementálním parsování (TchStreamParser) pro různé délky zápasu.
+#
+#   python -m benchmarks.bench_parser [--velikosti 10 100 1000 10000]
+
+VYCHOZI_VELIKOSTI = (10, 100, 1000, 10000)
+
+
+def zapis(cesta, data):
+    with open(cesta, 'w', encoding='utf-8') as file:
+        file.write(data)
+
+
+def mer_cele_parsovani(cesta, zaznamy, opakovani):
+    """Čas parsuj_tch_soubor nad souborem se všemi ranami (tak to dělal starý monitor)."""
+    zapis(cesta, sestav_dokument(zaznamy))
+    casy = []
+    for _ in range(opakovani):
+        start = time.perf_counter()
+        parsuj_tch_soubor(cesta)
+        casy.append(time.perf_counter() - start)
+    return casy
+
+
+def mer_inkrementalni(cesta, zaznamy, opakovani, seed=0):
+    """Čas TchStreamParser.nacti_nove() pro jednu nově připsanou ránu na konci zápasu.
+
+    Soubor se zapisuje jako ze SETA: zkrátí se a zapíše znovu celý, ve dvou
+    částech (useknutí jako u generuj_tch), a parser ho čte po každé z nich.
+    Vrátí časy na ránu a počet ran vrácených víc než jednou.
+    """
+    rng = random.Random(seed)
+    zaklad = zaznamy[:-opakovani]
+    parser = TchStreamParser(cesta)
+    zapis(cesta, sestav_dokument(zaklad))
+    indexy = [strela['index'] for strela in parser.nacti_nove()]
+
+    casy = []
+    prefix = sestav_dokument(zaklad, uplny=False)
+    for zaznam in zaznamy[-opakovani:]:
+        prefix += zaznam
+        data = (prefix + PATICKA).encode('utf-8')
+        useknuti = int(len(data) * rng.random())
+        cas = 0.0
+        with open(cesta, 'wb') as file:
+            for cast in (data[:useknuti], data[useknuti:]):
+                file.write(cast)
+                file.flush()
+                start = time.perf_counter()
+                indexy += [strela['index'] for strela in parser.nacti_nove()]
+                cas += time.perf_counter() - start
+        casy.append(cas)
+    return casy, len(indexy) - len(set(indexy))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_parser")
+    parser.add_argument('--velikosti', type=int, nargs='+', default=VYCHOZI_VELIKOSTI)
+    parser.add_argument('--opakovani', type=int, default=50)
+    pridej_spolecne_argumenty(parser)
+    args = parser.parse_args(argv)
+    ztlum_logovani()
+
+    vysledky = {}
+    with tempfile.TemporaryDirectory() as adresar:
+        cesta = os.path.join(adresar, 'Match_BENCH.tch')
+        for velikost in args.velikosti:
+            zaznamy = generuj_zaznamy(velikost + args.opakovani)
+            cele = mer_cele_parsovani(cesta, zaznamy[:velikost], args.opakovani)
+            os.remove(cesta)
+            inkrementalni, znovu = mer_inkrementalni(cesta, zaznamy[:velikost + args.opakovani], args.opakovani)
+            os.remove(cesta)
+            vysledky[f'cele_{velikost}_p50_ms'] = round(percentil(cele, 50) * 1000, 3)
+            vysledky[f'inkrementalni_{velikost}_p50_ms'] = round(percentil(inkrementalni, 50) * 1000, 3)
+            vysledky['znovu_vracene_rany'] = vysledky.get('znovu_vracene_rany', 0) + znovu
+        # Zápas s 5 % poškozených záznamů - cesta přes ošetření chyb
+        zaznamy = generuj_zaznamy(1000 + args.opakovani, vadne=0.05, seed=1)
+        cele = mer_cele_parsovani(cesta, zaznamy[:1000], args.opakovani)
+        os.remove(cesta)
+        inkrementalni, znovu = mer_inkrementalni(cesta, zaznamy, args.opakovani)
+        vysledky['cele_vadne_1000_p50_ms'] = round(percentil(cele, 50) * 1000, 3)
+        vysledky['inkrementalni_vadne_1000_p50_ms'] = round(percentil(inkrementalni, 50) * 1000, 3)
+        vysledky['znovu_vracene_rany'] += znovu
+    vysledky['spickova_rss_mb'] = spickova_rss_mb()
+    return vyhodnot('parser', vysledky, args,
+                    parametry={'velikosti': args.velikosti, 'opakovani': args.opakovani})
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import argparse
+import random
+
+# Generátor syntetických SETA .tch souborů pro benchmarky a zátěžové testy.
+
+HLAVICKA = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<Match>\n'
+    '  <Game_information>\n'
+    '    <user_name>{user_name}</user_name>\n'
+    '    <discipline>10m Air Rifle</discipline>\n'
+    '  </Game_information>\n'
+    '  <GameData>\n'
+)
+PATICKA = '  </GameData>\n</Match>\n'
+
+
+def zaznam(x, y, cas):
+    """Vrátí XML jednoho záznamu rány."""
+    return (f'    <Shot>\n'
+            f'      <x_data>{x:.6f}</x_data>\n'
+            f'      <y_data>{y:.6f}</y_data>\n'
+            f'      <time_stamp>{cas}</time_stamp>\n'
+            f'    </Shot>\n')
+
+
+def vadny_zaznam(rng):
+    """Vrátí záznam, který parser musí přeskočit (chybějící nebo neplatná data)."""
+    if rng.random() < 0.5:
+        return f'    <Shot>\n      <x_data>{rng.random():.6f}</x_data>\n    </Shot>\n'
+    return '    <Shot>\n      <x_data>abc</x_data>\n      <y_data>1</y_data>\n      <time_stamp>x</time_stamp>\n    </Shot>\n'
+
+
+def generuj_zaznamy(pocet, vadne=0.0, seed=0):
+    """Vrátí seznam XML záznamů; podíl vadne z nich je poškozený."""
+    rng = random.Random(seed)
+    zaznamy = []
+    for index in range(pocet):
+        if vadne and rng.random() < vadne:
+            zaznamy.append(vadny_zaznam(rng))
+            continue
+        # Rozptyl kolem středu terče v metrech, podobně jako u 10m vzduchovky
+        x = rng.gauss(0, 0.002)
+        y = rng.gauss(0, 0.002)
+        sekundy = 9 * 3600 + index * 45
+        cas = f'{sekundy // 3600:02d}:{sekundy // 60 % 60:02d}:{sekundy % 60:02d}'
+        zaznamy.append(zaznam(x, y, cas))
+    return zaznamy
+
+
+def sestav_dokument(zaznamy, user_name='BENCH', uplny=True):
+    """Sestaví celý dokument; uplny=False vynechá uzavírací tagy (rozepsaný soubor)."""
+    dokument = HLAVICKA.format(user_name=user_name) + ''.join(zaznamy)
+    return dokument + PATICKA if uplny else dokument
+
+
+def generuj_tch(pocet, vadne=0.0, seed=0, user_name='BENCH', useknuti=None):
+    """Vrátí obsah .tch souboru v bajtech.
+
+    useknuti (0-1) ořízne dokument na daný podíl délky a simuluje tak
+    soubor čtený uprostřed zápisu.
+    """
+    data = sestav_dokument(generuj_zaznamy(pocet, vadne, seed), user_name).encode('utf-8')
+    if useknuti is not None:
+        data = data[:int(len(data) * useknuti)]
+    return data
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Vygeneruje syntetický SETA .tch soubor.")
+    parser.add_argument('vystup', help="cesta k výstupnímu souboru")
+    parser.add_argument('-n', '--pocet', type=int, default=60, help="počet ran (10 až 10000)")
+    parser.add_argument('--vadne', type=float, default=0.0, help="podíl poškozených záznamů")
+    parser.add_argument('--useknuti', type=float, help="oříznout na daný podíl délky (0-1)")
+    parser.add_argument('--user-name', default='BENCH')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.vystup, 'wb') as file:
+        file.write(generuj_tch(args.pocet, args.vadne, args.seed, args.user_name, args.useknuti))
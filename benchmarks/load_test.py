@@ -0,0 +1,152 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.generuj_tch import PATICKA, generuj_zaznamy, sestav_dokument, zaznam
+from benchmarks.spolecne import (percentil, pridej_spolecne_argumenty, spickova_rss_mb,
+                                 vyhodnot, ztlum_logovani)
+from MultiLaneMonitor import MultiLaneMonitor
+from SetaCore import parsuj_tch_soubor, spust_odesilani, zastav_odesilani
+
+# End-to-end zátěžový test: simulované dráhy zapisují Match_*.tch soubory,
+# MultiLaneMonitor je nahrává na lokální náhradu /api/shots a měří se
+# zpoždění od zápisu rány do potvrzení serverem.
+#
+#   python -m benchmarks.load_test [--drahy 40] [--rany 60] [--zaznam Match_X.tch ...]
+
+
+class NahradniServer(ThreadingHTTPServer):
+    """Lokální náhrada /api/shots, která si pamatuje čas příjmu každé rány."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), NahradniHandler)
+        self.lock = threading.Lock()
+        self.potvrzeno = {}  # (user_id, index) -> perf_counter při příjmu
+        self.pozadavky = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/api/shots"
+
+
+class NahradniHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        telo = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            telo = gzip.decompress(telo)
+        data = json.loads(telo)
+        ted = time.perf_counter()
+        with self.server.lock:
+            self.server.pozadavky += 1
+            for strela in data.get('shots') or [data['shot_data']]:
+                self.server.potvrzeno.setdefault((data['user_id'], strela['index']), ted)
+
+        odpoved = b'{"success": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(odpoved)))
+        self.end_headers()
+        self.wfile.write(odpoved)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def nacti_zaznamy(cesty):
+    """Převede nahrané zápasy na seznamy XML záznamů pro přehrání."""
+    zapasy = []
+    for cesta in cesty:
+        strely = parsuj_tch_soubor(cesta) or []
+        zapasy.append([zaznam(strela['x'], strela['y'], strela['time']) for strela in strely])
+    return [zapas for zapas in zapasy if zapas]
+
+
+def simuluj_drahu(cesta, zaznamy, interval, zpozdeni, zapsano, lock):
+    """Připisuje rány do souboru dráhy tak, jak to dělá SETA."""
+    time.sleep(zpozdeni)  # Dráhy nestřílí synchronně
+    user_id = os.path.basename(cesta)[len('Match_'):-len('.tch')]
+    prefix = sestav_dokument([], user_name=user_id, uplny=False)
+    for index, radek in enumerate(zaznamy):
+        prefix += radek
+        with open(cesta, 'w', encoding='utf-8') as file:
+            file.write(prefix + PATICKA)
+        with lock:
+            zapsano[(user_id, index)] = time.perf_counter()
+        time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test")
+    parser.add_argument('--drahy', type=int, default=40, help="počet simulovaných drah")
+    parser.add_argument('--rany', type=int, default=60, help="počet ran na dráhu (syntetické)")
+    parser.add_argument('--interval', type=float, default=0.25, help="pauza mezi ranami (s)")
+    parser.add_argument('--zaznam', nargs='*', default=[], help="nahrané .tch zápasy k přehrání")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    pridej_spolecne_argumenty(parser)
+    args = parser.parse_args(argv)
+    ztlum_logovani()
+
+    zapasy = nacti_zaznamy(args.zaznam) or [generuj_zaznamy(args.rany, seed=i) for i in range(args.drahy)]
+    server = NahradniServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as adresar, tempfile.TemporaryDirectory() as log_dir:
+        send_queue = spust_odesilani(server.url, log_dir=log_dir)
+        monitor = MultiLaneMonitor(adresar, send_queue)
+        monitor.start()
+
+        zapsano = {}
+        lock = threading.Lock()
+        start = time.perf_counter()
+        drahy = []
+        for cislo in range(args.drahy):
+            cesta = os.path.join(adresar, f'Match_L{cislo:03d}.tch')
+            vlakno = threading.Thread(target=simuluj_drahu, daemon=True,
+                                      args=(cesta, zapasy[cislo % len(zapasy)], args.interval,
+                                            args.interval * cislo / args.drahy, zapsano, lock))
+            drahy.append(vlakno)
+            vlakno.start()
+        for vlakno in drahy:
+            vlakno.join()
+
+        celkem = len(zapsano)
+        konec = time.monotonic() + args.timeout
+        while len(server.potvrzeno) < celkem and time.monotonic() < konec:
+            time.sleep(0.01)
+        trvani = time.perf_counter() - start
+        monitor.stop()
+        zastav_odesilani(send_queue)
+    server.shutdown()
+
+    latence = [server.potvrzeno[klic] - zapsano[klic] for klic in zapsano if klic in server.potvrzeno]
+    vysledky = {
+        'ran': celkem,
+        'potvrzeno': len(latence),
+        'pozadavku': server.pozadavky,
+        'propustnost_ran_s': round(len(latence) / trvani, 1),
+        'latence_p50_ms': round(percentil(latence, 50) * 1000, 2) if latence else None,
+        'latence_p99_ms': round(percentil(latence, 99) * 1000, 2) if latence else None,
+        'spickova_rss_mb': spickova_rss_mb(),
+    }
+    kod = vyhodnot('load_test', vysledky, args, vyssi_je_lepsi=('propustnost_ran_s', 'potvrzeno'),
+                   parametry={'drahy': args.drahy, 'rany': args.rany, 'interval': args.interval,
+                              'zaznam': args.zaznam})
+    if len(latence) < celkem:
+        print(f"CHYBA: potvrzeno jen {len(latence)} z {celkem} ran")
+        return 1
+    return kod
+
+
+if __name__ == '__main__':
+    sys.exit(main())
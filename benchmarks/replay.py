@@ -0,0 +1,320 @@
+import argparse
+import datetime
+import heapq
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from benchmarks.generuj_tch import HLAVICKA, PATICKA, zaznam
+from benchmarks.spolecne import percentil
+from ShotMetrics import cas_seta
+from ShotStore import ShotStore
+
+# Přehrávač nahraných zápasů: zapisuje Match_<dráha>.tch stejně jako SETA,
+# s původními rozestupy ran (volitelně zrychlenými), na libovolném počtu drah.
+# Monitoring (SetaDaemon --multi-lane) tak lze ladit bez SETA.exe i na Linuxu.
+#
+#   python -m benchmarks.replay ZDROJ... --adresar /tmp/seta [--rychlost 10] [--drahy 40]
+#                               [--api-url http://localhost:3000/api/shots] [--daemon]
+#
+# ZDROJ je .tch soubor nebo adresář; prohledá se rekurzivně a každý .tch soubor
+# i každý adresář závodu z data/shots (race.shots, *.json) je jeden zápas.
+# S --api-url se rány dohledávají na serveru (GET /api/shots s kurzorem) a
+# vypíše se zpoždění potvrzení proti původnímu časování.
+
+RACE_SOUBOR = 'race.shots'  # Stejné jméno jako v seta-web/src/lib/shotIngest.ts
+# Referenční okamžik pro čas dne (HH:MM:SS) - konec dne, aby se nic neposunulo o den zpět
+KONEC_DNE = datetime.datetime.combine(datetime.date.today(), datetime.time(23, 59, 59)).timestamp()
+
+
+class Zapas:
+    """Jeden nahraný zápas: XML hlavička a záznamy ran s časem od první rány."""
+
+    def __init__(self, nazev, hlavicka, zaznamy):
+        self.nazev = nazev
+        self.hlavicka = hlavicka
+        self.zaznamy = zaznamy  # [(posun v sekundách, XML záznamu)]
+
+
+def _posuny(casy, interval, max_pauza=None):
+    """Převede časy ran na neklesající posuny od první rány v sekundách."""
+    posuny = []
+    predchozi = None
+    posun = 0.0
+    for cas in casy:
+        cas = cas_seta(cas, KONEC_DNE)
+        if cas is not None and predchozi is not None:
+            rozdil = cas - predchozi
+            if rozdil < -43200:
+                rozdil += 86400  # Zápas přes půlnoc
+            krok = max(rozdil, 0.0)
+        else:
+            krok = interval if posuny else 0.0
+        if max_pauza is not None:
+            krok = min(krok, max_pauza)
+        posun += krok
+        posuny.append(posun)
+        if cas is not None:
+            predchozi = cas
+    return posuny
+
+
+def nacti_tch(cesta, interval, max_pauza):
+    """Načte .tch soubor; záznamy ran se přehrají beze změny, jak je SETA zapsala."""
+    root = ET.parse(cesta).getroot()
+    game_info = root.find('Game_information')
+    game_data = root.find('GameData')
+    if game_info is None or game_data is None or len(game_data) == 0:
+        return None
+    hlavicka = ('<?xml version="1.0" encoding="utf-8"?>\n<Match>\n  '
+                + ET.tostring(game_info, encoding='unicode').strip() + '\n  <GameData>\n')
+    zaznamy = ['    ' + ET.tostring(prvek, encoding='unicode').strip() + '\n' for prvek in game_data]
+    casy = [prvek.findtext('time_stamp') for prvek in game_data]
+    return Zapas(os.path.basename(cesta), hlavicka, list(zip(_posuny(casy, interval, max_pauza), zaznamy)))
+
+
+def nacti_zavod(adresar, interval, max_pauza):
+    """Načte závod uložený serverem (starší *.json soubory a race.shots) jako zápas."""
+    strely = []
+    for jmeno in sorted(os.listdir(adresar)):
+        if jmeno.endswith('.json'):
+            with open(os.path.join(adresar, jmeno), 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            strely.append((data['shot_data'], data.get('timestamp')))
+    if os.path.exists(os.path.join(adresar, RACE_SOUBOR)):
+        # Jen čtení - zápis by živému závodu uřízl nedopsaný konec
+        store = ShotStore(os.path.join(adresar, RACE_SOUBOR), jen_cist=True)
+        try:
+            sloupce = store.nacti()
+            for strela, prijato in zip(store.strely(), sloupce['prijato']):
+                strely.append((strela, float(prijato) / 1000))
+        finally:
+            store.zavri()
+    if not strely:
+        return None
+    # Čas ze SETA, když chybí, tak čas přijetí serverem
+    casy = [strela.get('time') if cas_seta(strela.get('time'), KONEC_DNE) is not None else prijato
+            for strela, prijato in strely]
+    user_id = os.path.basename(os.path.dirname(os.path.abspath(adresar)))
+    zaznamy = [zaznam(float(strela['x']), float(strela['y']), strela.get('time') or '')
+               for strela, _ in strely]
+    nazev = f"{user_id}/{os.path.basename(os.path.abspath(adresar))}"
+    return Zapas(nazev, HLAVICKA.format(user_name=user_id), list(zip(_posuny(casy, interval, max_pauza), zaznamy)))
+
+
+def najdi_zapasy(zdroje, interval=1.0, max_pauza=None):
+    """Najde a načte zápasy ze zadaných souborů a adresářů."""
+    zapasy = []
+    for zdroj in zdroje:
+        if os.path.isfile(zdroj):
+            kandidati = [('tch', zdroj)]
+        else:
+            kandidati = []
+            for adresar, _, jmena in sorted(os.walk(zdroj)):
+                kandidati += [('tch', os.path.join(adresar, jmeno)) for jmeno in sorted(jmena)
+                              if jmeno.lower().endswith('.tch')]
+                if RACE_SOUBOR in jmena or any(jmeno.endswith('.json') for jmeno in jmena):
+                    kandidati.append(('zavod', adresar))
+        for druh, cesta in kandidati:
+            try:
+                zapas = (nacti_tch if druh == 'tch' else nacti_zavod)(cesta, interval, max_pauza)
+            except (OSError, ValueError, KeyError, ET.ParseError) as e:
+                logging.warning(f"Zápas {cesta} nelze načíst: {e}")
+                continue
+            if zapas:
+                zapasy.append(zapas)
+    return zapasy
+
+
+class Draha:
+    """Přehrávaná dráha - soubor Match_<user_id>.tch a rozepsaný dokument."""
+
+    def __init__(self, adresar, user_id, zapas):
+        self.user_id = user_id
+        self.zapas = zapas
+        self.cesta = os.path.join(adresar, f"Match_{user_id}.tch")
+        self.dokument = zapas.hlavicka
+        self.zapsano = 0
+
+    def zapis(self, pocet):
+        """Přepíše soubor s prvními pocet ranami, tak jak to dělá SETA po každé ráně."""
+        while self.zapsano < pocet:
+            self.dokument += self.zapas.zaznamy[self.zapsano][1]
+            self.zapsano += 1
+        with open(self.cesta, 'w', encoding='utf-8') as file:
+            file.write(self.dokument + PATICKA)
+
+
+class SledovaniServeru:
+    """Dohledává přehrané rány na serveru a zaznamená, kdy je poprvé viděl."""
+
+    def __init__(self, api_url, user_ids, interval=0.2):
+        from ShotApiClient import ShotApiClient
+
+        self.klient = ShotApiClient(api_url)
+        self.interval = interval
+        self.videno = {}  # (user_id, index) -> perf_counter
+        self._zavody = {}  # user_id -> race_id přehrávaného závodu
+        self._puvodni = {user_id: set(self._zavody_uzivatele(user_id)) for user_id in user_ids}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._smycka, name='replay-server', daemon=True)
+
+    def _zavody_uzivatele(self, user_id):
+        try:
+            return self.klient.zavody(user_id)
+        except Exception:
+            return []
+
+    def spust(self):
+        self._thread.start()
+
+    def zastav(self):
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self.klient.zavri()
+
+    def _smycka(self):
+        while not self._stop.wait(self.interval):
+            for user_id, puvodni in self._puvodni.items():
+                race_id = self._zavody.get(user_id)
+                if race_id is None:
+                    nove = sorted(set(self._zavody_uzivatele(user_id)) - puvodni)
+                    if not nove:
+                        continue
+                    race_id = self._zavody[user_id] = nove[-1]  # race_id začíná časem startu
+                try:
+                    strely = self.klient.nove_rany(user_id, race_id)
+                except Exception as e:
+                    logging.debug(f"Dotaz na rány {user_id}/{race_id} selhal: {e}")
+                    continue
+                ted = time.perf_counter()
+                for strela in strely:
+                    self.videno.setdefault((user_id, strela['shot_data'].get('index')), ted)
+
+
+def prehraj(drahy, rychlost, sledovani=None, prubeh=5.0):
+    """Zapisuje rány všech drah podle plánu, vrátí (plánované, skutečné) časy zápisu."""
+    plan = [(posun / rychlost, cislo, index)
+            for cislo, draha in enumerate(drahy) for index, (posun, _) in enumerate(draha.zapas.zaznamy)]
+    heapq.heapify(plan)
+    for draha in drahy:
+        draha.zapis(0)  # SETA založí soubor se zápasem ještě před první ranou
+    start = time.perf_counter() + 0.5  # Monitor si nové soubory stihne zaregistrovat
+    planovano = {}
+    zapsano = {}
+    dalsi_prubeh = time.monotonic() + prubeh
+    while plan:
+        termin, cislo, index = heapq.heappop(plan)
+        cekani = start + termin - time.perf_counter()
+        if cekani > 0:
+            time.sleep(cekani)
+        draha = drahy[cislo]
+        draha.zapis(index + 1)
+        klic = (draha.user_id, index)
+        planovano[klic] = start + termin
+        zapsano[klic] = time.perf_counter()
+        if time.monotonic() >= dalsi_prubeh:
+            dalsi_prubeh = time.monotonic() + prubeh
+            text = f"Zapsáno {len(zapsano)} ran, zbývá {len(plan)}"
+            if sledovani:
+                text += f", na serveru {len(sledovani.videno)}"
+            logging.info(text)
+    return planovano, zapsano
+
+
+def souhrn(planovano, zapsano, videno=None):
+    """Zpoždění zápisu a (se serverem) zpoždění potvrzení proti původnímu časování v ms."""
+    def ms(hodnoty, p):
+        hodnota = percentil(hodnoty, p)
+        return None if hodnota is None else round(hodnota * 1000, 1)
+
+    zapis = [zapsano[klic] - planovano[klic] for klic in planovano]
+    vysledky = {'ran': len(planovano), 'zapis_p50_ms': ms(zapis, 50), 'zapis_p99_ms': ms(zapis, 99)}
+    if videno is not None:
+        zpozdeni = [videno[klic] - planovano[klic] for klic in planovano if klic in videno]
+        vysledky.update({
+            'na_serveru': len(zpozdeni),
+            'zpozdeni_p50_ms': ms(zpozdeni, 50),
+            'zpozdeni_p90_ms': ms(zpozdeni, 90),
+            'zpozdeni_p99_ms': ms(zpozdeni, 99),
+            'zpozdeni_max_ms': ms(zpozdeni, 100),
+        })
+    return vysledky
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay",
+                                     description="Přehraje nahrané zápasy do Match_*.tch souborů.")
+    parser.add_argument('zdroje', nargs='+', help=".tch soubory nebo adresáře (např. seta-web/data/shots)")
+    parser.add_argument('--adresar', required=True, help="adresář, kam se zapisují Match_*.tch")
+    parser.add_argument('--rychlost', type=float, default=1.0, help="zrychlení proti originálu (1 až 1000)")
+    parser.add_argument('--drahy', type=int, help="počet drah (výchozí počet zápasů, zápasy se opakují)")
+    parser.add_argument('--prefix', default='REPLAY', help="začátek user_id drah (Match_<prefix><číslo>.tch)")
+    parser.add_argument('--interval', type=float, default=1.0, help="rozestup ran bez čitelného času (s)")
+    parser.add_argument('--max-pauza', type=float, help="zkrátit delší pauzy mezi ranami (s, před zrychlením)")
+    parser.add_argument('--api-url', help="URL /api/shots pro měření zpoždění potvrzení serverem")
+    parser.add_argument('--daemon', action='store_true',
+                        help="spustit python -m SetaDaemon --multi-lane nad adresářem drah")
+    parser.add_argument('--timeout', type=float, default=30.0, help="jak dlouho čekat na poslední rány (s)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="podrobné logování")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if not 1 <= args.rychlost <= 1000:
+        parser.error("--rychlost musí být mezi 1 a 1000")
+
+    zapasy = najdi_zapasy(args.zdroje, args.interval, args.max_pauza)
+    if not zapasy:
+        logging.error("Žádný zápas k přehrání")
+        return 2
+    os.makedirs(args.adresar, exist_ok=True)
+    pocet_drah = args.drahy or len(zapasy)
+    drahy = [Draha(args.adresar, f"{args.prefix}{cislo:03d}", zapasy[cislo % len(zapasy)])
+             for cislo in range(pocet_drah)]
+    for draha in drahy:
+        if os.path.exists(draha.cesta):
+            os.remove(draha.cesta)  # Nový soubor = nový závod v MultiLaneMonitor
+    delka = max(draha.zapas.zaznamy[-1][0] for draha in drahy) / args.rychlost
+    logging.info(f"Přehrávám {len(zapasy)} zápasů na {pocet_drah} drahách, "
+                 f"{sum(len(draha.zapas.zaznamy) for draha in drahy)} ran za {delka:.1f} s")
+
+    daemon = None
+    sledovani = None
+    try:
+        if args.daemon:
+            prikaz = [sys.executable, '-m', 'SetaDaemon', '--multi-lane', '--no-usb', '--adresar', args.adresar,
+                      '--metrics-port', '0']
+            if args.api_url:
+                prikaz += ['--api-url', args.api_url]
+            daemon = subprocess.Popen(prikaz)
+        if args.api_url:
+            sledovani = SledovaniServeru(args.api_url, [draha.user_id for draha in drahy])
+            sledovani.spust()
+
+        planovano, zapsano = prehraj(drahy, args.rychlost, sledovani)
+        if sledovani:
+            konec = time.monotonic() + args.timeout
+            while len(sledovani.videno) < len(planovano) and time.monotonic() < konec:
+                time.sleep(0.1)
+    finally:
+        if sledovani:
+            sledovani.zastav()
+        if daemon:
+            daemon.terminate()
+            daemon.wait(timeout=10)
+
+    vysledky = souhrn(planovano, zapsano, sledovani.videno if sledovani else None)
+    print(json.dumps({'replay': vysledky}, indent=2, sort_keys=True))
+    if sledovani and vysledky['na_serveru'] < vysledky['ran']:
+        print(f"CHYBA: na serveru je jen {vysledky['na_serveru']} z {vysledky['ran']} ran")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
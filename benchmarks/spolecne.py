@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import sys
+
+# Společné pomůcky benchmarků: percentily, špičková RSS a porovnání s baseline.
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+TOLERANCE = 0.5  # Regrese = o víc než 50 % horší než baseline
+MIN_ROZDIL = 0.05  # Absolutní rezerva, aby šum u zlomků milisekund nebyl regresí
+
+
+def ztlum_logovani():
+    """Vypne logování a zápis do faults.log, aby neovlivňovaly měření."""
+    logging.disable(logging.CRITICAL)
+    logging.getLogger('SetaFaultHandler').disabled = True
+
+
+def percentil(hodnoty, p):
+    """Vrátí p-tý percentil (0-100) ze seznamu hodnot."""
+    if not hodnoty:
+        return None
+    serazene = sorted(hodnoty)
+    index = min(len(serazene) - 1, int(round(p / 100 * (len(serazene) - 1))))
+    return serazene[index]
+
+
+def spickova_rss_mb():
+    """Vrátí špičkovou RSS procesu v MB (None, pokud ji nelze zjistit)."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux vrací kB, macOS bajty
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def nacti_baselines():
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES, 'r') as file:
+        return json.load(file)
+
+
+def uloz_baseline(nazev, vysledky, parametry=None):
+    """Uloží výsledky benchmarku jako novou baseline spolu s parametry běhu."""
+    baselines = nacti_baselines()
+    baselines[nazev] = dict(vysledky, parametry=parametry or {})
+    with open(BASELINES, 'w') as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def porovnej_s_baseline(nazev, vysledky, vyssi_je_lepsi=(), parametry=None):
+    """Porovná výsledky s uloženou baseline a vrátí seznam regresí.
+
+    Metriky v vyssi_je_lepsi (např. propustnost) jsou regresí, když klesnou,
+    ostatní (časy, paměť), když stoupnou. Baseline změřená s jinými
+    parametry běhu (počet drah, velikosti...) se neporovnává, vrátí None.
+    """
+    baseline = nacti_baselines().get(nazev)
+    if not baseline:
+        return []
+    # JSON z tuple udělá list, parametry se porovnávají v uložené podobě
+    if baseline.get('parametry') != json.loads(json.dumps(parametry or {})):
+        return None
+    regrese = []
+    for klic, hodnota in vysledky.items():
+        puvodni = baseline.get(klic)
+        if not isinstance(hodnota, (int, float)) or not isinstance(puvodni, (int, float)) or not puvodni:
+            continue
+        if klic in vyssi_je_lepsi:
+            horsi = hodnota < puvodni * (1 - TOLERANCE) - MIN_ROZDIL
+        else:
+            horsi = hodnota > puvodni * (1 + TOLERANCE) + MIN_ROZDIL
+        if horsi:
+            regrese.append(f"{nazev}.{klic}: {hodnota} (baseline {puvodni})")
+    return regrese
+
+
+def vyhodnot(nazev, vysledky, args, vyssi_je_lepsi=(), parametry=None):
+    """Vypíše výsledky, případně uloží baseline; vrátí návratový kód procesu.
+
+    parametry jsou argumenty běhu, které ovlivňují výsledky; s baseline se
+    porovnává jen běh se stejnými parametry.
+    """
+    print(json.dumps({nazev: vysledky}, indent=2, sort_keys=True))
+    if args.ulozit_baseline:
+        uloz_baseline(nazev, vysledky, parametry)
+        print(f"Baseline '{nazev}' uložena do {BASELINES}")
+        return 0
+    regrese = porovnej_s_baseline(nazev, vysledky, vyssi_je_lepsi, parametry)
+    if regrese is None:
+        print(f"Baseline '{nazev}' je změřená s jinými parametry, porovnání přeskočeno")
+        return 0
+    for radek in regrese:
+        print(f"REGRESE {radek}")
+    return 1 if regrese else 0
+
+
+def pridej_spolecne_argumenty(parser):
+    parser.add_argument('--ulozit-baseline', action='store_true',
+                        help="uložit výsledky jako novou baseline místo porovnání")
@@ -61,6 +61,11 @@ const calculateScore = (x: number, y: number) => {
   return Math.round(score * 10) / 10
 }
 
+// Prefer the score computed by the uploader, older shots don't carry it
+const shotScore = (shot) => shot.shot_data.score ?? calculateScore(shot.shot_data.x, shot.shot_data.y)
+
+const sumScores = (shots) => Math.round(shots.reduce((sum, s) => sum + shotScore(s), 0) * 10) / 10
+
 export default function RacePage({ params }: { params: Promise<{ shooter: string; raceId: string }> }) {
   const { shooter, raceId } = use(params)
   const [shots, setShots] = useState([])
@@ -68,31 +73,52 @@ export default function RacePage({ params }: { params: Promise<{ shooter: string
   const [totalScore, setTotalScore] = useState(0)
 
   useEffect(() => {
+    // Shots arrive both from fetches and the socket, the id keeps each one once
+    const seenIds = new Set()
+    const addShots = (incoming) => {
+      const fresh = incoming.filter(shot => {
+        const id = shot.shot_data?.id
+        if (!id) return true
+        if (seenIds.has(id)) return false
+        seenIds.add(id)
+        return true
+      })
+      if (fresh.length === 0) return
+      setShots(prev => [...prev, ...fresh])
+      // Add just the new shots instead of re-scoring the whole race
+      setTotalScore(prev => Math.round((prev + sumScores(fresh)) * 10) / 10)
+    }
+
+    // Cursor from the last response, so a reconnect fetches only what was missed
+    let cursor = 0
+    const fetchShots = () =>
+      fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/shots?user_id=${shooter}&race_id=${raceId}&since=${cursor}`)
+        .then(res => res.json())
+        .then(data => {
+          const loaded = data.shots || []
+          cursor = data.cursor ?? cursor + loaded.length
+          addShots(loaded)
+        })
+
     // Initial data load
-    fetch(`${process.env.NEXT_PUBLIC_API_BASE_URL}/api/shots?user_id=${shooter}&race_id=${raceId}`)
-      .then(res => res.json())
-      .then(data => setShots(data.shots || []))
+    fetchShots()
 
     // WebSocket setup
     const socket = io(process.env.NEXT_PUBLIC_API_BASE_URL, {
       path: '/api/socket'
     })
 
-    socket.on('connect', () => setIsConnected(true))
+    let connectedBefore = false
+    socket.on('connect', () => {
+      setIsConnected(true)
+      // Rooms don't survive a reconnect, so subscribe again and catch up on missed shots
+      socket.emit('subscribeToRace', { shooter, raceId })
+      if (connectedBefore) fetchShots()
+      connectedBefore = true
+    })
     socket.on('disconnect', () => setIsConnected(false))
 
-    socket.emit('subscribeToRace', { shooter, raceId })
-
-    socket.on('newShot', (shot) => {
-      setShots(prev => {
-        const newShots = [...prev, shot]
-        const newTotalScore = newShots.reduce((sum, s) => 
-          sum + calculateScore(s.shot_data.x, s.shot_data.y), 0
-        )
-        setTotalScore(newTotalScore)
-        return newShots
-      })
-    })
+    socket.on('newShot', (shot) => addShots([shot]))
 
     return () => {
       socket.off('connect')
@@ -108,14 +134,20 @@ export default function RacePage({ params }: { params: Promise<{ shooter: string
     doc.text(`Závod: ${raceId}`, 20, 30)
     doc.text(`Celkové skóre: ${totalScore}`, 20, 40)
 
+    // Quick export of the current view; full protocols with target plots come from python -m RaceExport
+    let y = 50
     shots.forEach((shot, index) => {
-      const y = 50 + (index * 10)
-      const score = calculateScore(shot.shot_data.x, shot.shot_data.y)
+      if (y > doc.internal.pageSize.getHeight() - 15) {
+        doc.addPage()
+        y = 20
+      }
+      const score = shotScore(shot)
       doc.text(
         `Rána ${index + 1}: X=${shot.shot_data.x.toFixed(3)}, Y=${shot.shot_data.y.toFixed(3)}, Skóre=${score}`,
         20,
         y
       )
+      y += 10
     })
 
     doc.save(`${shooter}-${raceId}.pdf`)
@@ -125,7 +157,7 @@ export default function RacePage({ params }: { params: Promise<{ shooter: string
     labels: shots.map((_, i) => `Rána ${i + 1}`),
     datasets: [{
       label: 'Skóre',
-      data: shots.map(shot => calculateScore(shot.shot_data.x, shot.shot_data.y)),
+      data: shots.map(shotScore),
       borderColor: 'rgb(75, 192, 192)',
       backgroundColor: 'rgba(75, 192, 192, 0.5)',
       tension: 0.1
@@ -253,7 +285,7 @@ export default function RacePage({ params }: { params: Promise<{ shooter: string
                 <div className="flex justify-between items-center">
                   <span className="font-bold">Rána #{index + 1}</span>
                   <span className="text-lg font-bold text-blue-600">
-                    Skóre: {calculateScore(shot.shot_data.x, shot.shot_data.y)}
+                    Skóre: {shotScore(shot)}
                   </span>
                 </div>
                 <p className="text-gray-600">Čas: {shot.shot_data.time}</p>
@@ -1,53 +1,64 @@
 import { NextResponse } from 'next/server'
 import path from 'path'
 import fs from 'fs/promises'
+import { gunzipSync } from 'zlib'
 import { emitNewShot } from '../socket/route'
+import { DATA_DIR, getRaceShots, ingestShots } from '@/lib/shotIngest'
+import { SHOT_FRAME_TYPE, decodeShotFrame } from '@/lib/shotCodec'
 
-const DATA_DIR = path.join(process.cwd(), 'data', 'shots')
+// Uploader may gzip larger request bodies or send a compact binary batch
+async function readJsonBody(request: Request) {
+  if (request.headers.get('content-type')?.startsWith(SHOT_FRAME_TYPE)) {
+    return decodeShotFrame(Buffer.from(await request.arrayBuffer()))
+  }
+  if (request.headers.get('content-encoding') === 'gzip') {
+    const body = Buffer.from(await request.arrayBuffer())
+    return JSON.parse(gunzipSync(body).toString('utf-8'))
+  }
+  return request.json()
+}
 
-async function ensureDir(dirPath: string) {
+export async function POST(request: Request) {
+  let data
   try {
-    await fs.access(dirPath)
+    data = await readJsonBody(request)
   } catch {
-    await fs.mkdir(dirPath, { recursive: true })
+    return NextResponse.json(
+      { error: 'Invalid request body' },
+      { status: 400 }
+    )
   }
-}
 
-export async function POST(request: Request) {
   try {
-    const data = await request.json()
     const { user_id, race_id, shot_data } = data
+    // Batch body carries an array of shot_data objects in `shots`
+    const shots = Array.isArray(data.shots) ? data.shots : shot_data ? [shot_data] : []
+    const idempotencyKey = request.headers.get('idempotency-key')
+    if (shot_data && !shot_data.id && idempotencyKey) {
+      shot_data.id = idempotencyKey
+    }
 
     // Basic validation
-    if (!user_id || !race_id || !shot_data) {
+    if (!user_id || !race_id || shots.length === 0) {
       return NextResponse.json(
         { error: 'Missing required fields' },
         { status: 400 }
       )
     }
 
-    // Create user and race directories
-    const userDir = path.join(DATA_DIR, user_id)
-    const raceDir = path.join(userDir, race_id)
-    await ensureDir(raceDir)
+    const { timestamp, accepted, duplicates } = await ingestShots(user_id, race_id, shots)
 
-    // Save shot data
-    const timestamp = new Date().toISOString()
-    const shotData = {
-      user_id,
-      race_id,
-      timestamp,
-      shot_data
+    // Emit new shot events
+    for (const shotData of accepted) {
+      emitNewShot(user_id, race_id, shotData)
     }
-    const filename = `${timestamp}.json`
-    const filepath = path.join(raceDir, filename)
-
-    await fs.writeFile(filepath, JSON.stringify(shotData, null, 2))
 
-    // Emit new shot event
-    emitNewShot(user_id, race_id, shotData)
-
-    return NextResponse.json({ success: true, timestamp })
+    return NextResponse.json({
+      success: true,
+      timestamp,
+      count: shots.length - duplicates,
+      duplicates
+    })
 
   } catch (error) {
     console.error('Error saving shot:', error)
@@ -82,23 +93,13 @@ export async function GET(request: Request) {
       }
     }
 
-    // Return shots for specific race
-    const raceDir = path.join(userDir, race_id)
-    try {
-      const files = await fs.readdir(raceDir)
-      const shots = await Promise.all(
-        files.map(async (file) => {
-          const content = await fs.readFile(
-            path.join(raceDir, file),
-            'utf-8'
-          )
-          return JSON.parse(content)
-        })
-      )
-      return NextResponse.json({ shots })
-    } catch {
-      return NextResponse.json({ shots: [] })
-    }
+    // Return shots for specific race. `since` is the cursor from an earlier response,
+    // so clients fetch only shots stored after it; `limit` pages through long races.
+    const all = await getRaceShots(user_id, race_id)
+    const since = Math.min(Math.max(parseInt(searchParams.get('since') ?? '', 10) || 0, 0), all.length)
+    const limit = parseInt(searchParams.get('limit') ?? '', 10)
+    const shots = limit > 0 ? all.slice(since, since + limit) : all.slice(since)
+    return NextResponse.json({ shots, cursor: since + shots.length, total: all.length })
 
   } catch (error) {
     console.error('API Error:', error)
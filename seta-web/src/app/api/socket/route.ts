@@ -1,6 +1,8 @@
 import { Server } from 'socket.io'
 import { NextApiResponse } from 'next'
 import { createServer } from 'http'
+import { ingestShots } from '@/lib/shotIngest'
+import { decodeShotFrame, isShotFrame } from '@/lib/shotCodec'
 
 const io = new Server({
   path: '/api/socket',
@@ -17,7 +19,49 @@ io.on('connection', (socket) => {
     const { shooter, raceId } = data
     socket.join(`${shooter}-${raceId}`)
   })
+
+  // Push channel from the uploader: one message per batch (JSON or compact frame), acked once stored
+  socket.on('ingestShots', async (data, ack) => {
+    const reply = typeof ack === 'function' ? ack : () => {}
+    try {
+      let batch = data
+      if (isShotFrame(data)) {
+        try {
+          batch = decodeShotFrame(data)
+        } catch {
+          reply({ error: 'Invalid shot frame', status: 400 })
+          return
+        }
+      }
+      const { user_id, race_id, shots } = batch ?? {}
+      if (!user_id || !race_id || !Array.isArray(shots) || shots.length === 0) {
+        reply({ error: 'Missing required fields', status: 400 })
+        return
+      }
+      const { timestamp, accepted, duplicates } = await ingestShots(user_id, race_id, shots)
+      for (const shotData of accepted) {
+        emitNewShot(user_id, race_id, shotData)
+      }
+      reply({ success: true, status: 200, timestamp, count: accepted.length, duplicates })
+    } catch (error) {
+      console.error('Error ingesting shots:', error)
+      reply({ error: 'Internal server error', status: 500 })
+    }
+  })
   
+  // Shots already stored by the ingest gateway (python -m IngestGateway), batched per race.
+  // Only broadcast here, the gateway is the writer.
+  socket.on('publishShots', (data) => {
+    const token = process.env.SETA_GATEWAY_TOKEN
+    const { user_id, race_id, shots } = data ?? {}
+    if (!token || data?.token !== token || !user_id || !race_id || !Array.isArray(shots)) {
+      return
+    }
+    for (const shot of shots) {
+      emitNewShot(user_id, race_id, shot)
+    }
+  })
+
   socket.on('disconnect', () => {
     console.log('Client disconnected')
   })
@@ -0,0 +1,84 @@
+import { gunzipSync } from 'zlib'
+
+// Compact binary shot batch, encoded by the uploader (ShotCodec.py).
+//
+// Frame: 'SETB' | u8 version | u8 flags (bit 0 = gzip body) | body
+// Body:  string user_id | string race_id | varint shot count | shots
+// Shot:  varint flags (bit 0 = id, bit 1 = score)
+//        | zigzag dx | zigzag dy   delta to the previous shot in micrometres
+//        | zigzag index delta | string time
+//        | [id u64 big-endian] | [varint score * 10]
+// Strings are a varint length followed by UTF-8 bytes.
+
+export const SHOT_FRAME_TYPE = 'application/x-seta-shots'
+
+const MAGIC = 'SETB'
+const VERSION = 1
+const GZIP = 0x01
+const QUANTUM = 1e6
+
+export function isShotFrame(data: unknown): data is Buffer {
+  return Buffer.isBuffer(data) && data.length >= 6 && data.toString('latin1', 0, 4) === MAGIC
+}
+
+export function decodeShotFrame(frame: Buffer) {
+  if (!isShotFrame(frame) || frame[4] !== VERSION) {
+    throw new Error('Invalid shot frame')
+  }
+  const body = frame[5] & GZIP ? gunzipSync(frame.subarray(6)) : frame.subarray(6)
+  let pos = 0
+
+  // Arithmetic instead of bit operators, values may exceed 32 bits
+  const varint = () => {
+    let value = 0
+    let scale = 1
+    for (;;) {
+      if (pos >= body.length) throw new Error('Truncated shot frame')
+      const byte = body[pos++]
+      value += (byte & 0x7f) * scale
+      if (byte < 0x80) return value
+      scale *= 128
+    }
+  }
+  const zigzag = () => {
+    const value = varint()
+    return value % 2 === 0 ? value / 2 : -(value + 1) / 2
+  }
+  const string = () => {
+    const length = varint()
+    pos += length
+    if (pos > body.length) throw new Error('Truncated shot frame')
+    return body.toString('utf-8', pos - length, pos)
+  }
+
+  const user_id = string()
+  const race_id = string()
+  const count = varint()
+  const shots = []
+  let x = 0
+  let y = 0
+  let index = 0
+  for (let i = 0; i < count; i++) {
+    const flags = varint()
+    x += zigzag()
+    y += zigzag()
+    index += zigzag()
+    const shot: { x: number; y: number; time: string; index: number; id: string | null; score: number | null } = {
+      x: x / QUANTUM,
+      y: y / QUANTUM,
+      time: string(),
+      index,
+      id: null,
+      score: null
+    }
+    if (flags & 1) {
+      shot.id = body.toString('hex', pos, pos + 8)
+      pos += 8
+    }
+    if (flags & 2) {
+      shot.score = varint() / 10
+    }
+    shots.push(shot)
+  }
+  return { user_id, race_id, shots }
+}
@@ -0,0 +1,158 @@
+import path from 'path'
+import fs from 'fs/promises'
+import { appendShots, normalizeShotId, readShots } from '@/lib/shotStore'
+
+// Shared by the HTTP route (/api/shots) and the socket.io push channel
+export const DATA_DIR = path.join(process.cwd(), 'data', 'shots')
+// Each race directory holds one columnar file; older races may still have per-shot JSON files
+const RACE_FILE = 'race.shots'
+
+async function ensureDir(dirPath: string) {
+  try {
+    await fs.access(dirPath)
+  } catch {
+    await fs.mkdir(dirPath, { recursive: true })
+  }
+}
+
+// Reads all shots of a race in the shape the page expects
+export async function loadRace(user_id: string, race_id: string, raceDir: string) {
+  const stored = (await readShots(path.join(raceDir, RACE_FILE))).map(({ received, ...shot_data }) => ({
+    user_id,
+    race_id,
+    timestamp: new Date(received).toISOString(),
+    shot_data
+  }))
+  let legacyFiles: string[] = []
+  try {
+    legacyFiles = (await fs.readdir(raceDir)).filter(file => file.endsWith('.json'))
+  } catch {
+    // Race directory does not exist yet
+  }
+  const legacy = await Promise.all(
+    legacyFiles.sort().map(async (file) =>
+      JSON.parse(await fs.readFile(path.join(raceDir, file), 'utf-8'))
+    )
+  )
+  return [...legacy, ...stored]
+}
+
+// Recently read races, least recently used first. Entries remember the race file
+// size, so writes from outside this process (bulk import) are picked up.
+const RACE_CACHE_SIZE = 64
+const raceCache = new Map<string, { shots: any[]; size: number }>()
+
+async function raceFileSize(raceDir: string) {
+  try {
+    return (await fs.stat(path.join(raceDir, RACE_FILE))).size
+  } catch {
+    return 0
+  }
+}
+
+function cacheRace(raceDir: string, entry: { shots: any[]; size: number }) {
+  raceCache.delete(raceDir)
+  raceCache.set(raceDir, entry)
+  if (raceCache.size > RACE_CACHE_SIZE) {
+    raceCache.delete(raceCache.keys().next().value!)
+  }
+}
+
+// All shots of a race in storage order, served from the cache when current
+export async function getRaceShots(user_id: string, race_id: string) {
+  const raceDir = path.join(DATA_DIR, user_id, race_id)
+  const size = await raceFileSize(raceDir)
+  const cached = raceCache.get(raceDir)
+  if (cached && cached.size === size) {
+    cacheRace(raceDir, cached)
+    return cached.shots
+  }
+  const shots = await loadRace(user_id, race_id, raceDir)
+  cacheRace(raceDir, { shots, size })
+  return shots
+}
+
+// Idempotency keys (shot_data.id) already stored per race directory, an LRU of the
+// same size as raceCache. An evicted set is reloaded from the race file on demand.
+const seenShotIds = new Map<string, Promise<Set<string>>>()
+
+async function loadShotIds(raceDir: string) {
+  const ids = new Set<string>()
+  for (const shot of await loadRace('', '', raceDir)) {
+    if (shot.shot_data?.id) ids.add(normalizeShotId(shot.shot_data.id))
+  }
+  return ids
+}
+
+function getSeenShotIds(raceDir: string) {
+  // The promise is cached so concurrent first requests share one loaded set
+  const ids = seenShotIds.get(raceDir) ?? loadShotIds(raceDir)
+  seenShotIds.delete(raceDir)
+  seenShotIds.set(raceDir, ids)
+  if (seenShotIds.size > RACE_CACHE_SIZE) {
+    seenShotIds.delete(seenShotIds.keys().next().value!)
+  }
+  return ids
+}
+
+// Appends to one race file are chained so concurrent requests don't interleave
+const raceWrites = new Map<string, Promise<unknown>>()
+
+function serializeRaceWrite<T>(raceDir: string, write: () => Promise<T>) {
+  const next = (raceWrites.get(raceDir) ?? Promise.resolve()).then(write)
+  const tail = next.catch(() => {})
+  raceWrites.set(raceDir, tail)
+  tail.then(() => {
+    if (raceWrites.get(raceDir) === tail) raceWrites.delete(raceDir)
+  })
+  return next
+}
+
+// Stores a batch of shots, skipping ones whose idempotency key is already stored.
+// Dedupe runs inside the serialized write so ids are only marked seen once stored.
+export async function ingestShots(user_id: string, race_id: string, shots: any[]) {
+  const raceDir = path.join(DATA_DIR, user_id, race_id)
+  await ensureDir(raceDir)
+
+  const received = Date.now()
+  const timestamp = new Date(received).toISOString()
+  const accepted = await serializeRaceWrite(raceDir, async () => {
+    // Loaded inside the write chain, so a set reloaded after eviction sees all earlier appends
+    const seenIds = await getSeenShotIds(raceDir)
+    const batchIds = new Set<string>()
+    const fresh = shots.filter((shot) => {
+      if (!shot.id) return true
+      shot.id = normalizeShotId(String(shot.id))
+      if (seenIds.has(shot.id) || batchIds.has(shot.id)) return false
+      batchIds.add(shot.id)
+      return true
+    })
+    await appendShots(path.join(raceDir, RACE_FILE), fresh, received)
+    batchIds.forEach(id => seenIds.add(id))
+    // Keep a cached race current (in its stored shape) instead of re-reading it
+    const cached = raceCache.get(raceDir)
+    if (cached && fresh.length > 0) {
+      cached.shots.push(...fresh.map(shot => ({
+        user_id,
+        race_id,
+        timestamp,
+        shot_data: {
+          x: shot.x,
+          y: shot.y,
+          score: shot.score ?? null,
+          id: shot.id ?? null,
+          index: shot.index ?? 0,
+          time: String(shot.time ?? '')
+        }
+      })))
+      cached.size = await raceFileSize(raceDir)
+    }
+    return fresh
+  })
+
+  return {
+    timestamp,
+    accepted: accepted.map(shot => ({ user_id, race_id, timestamp, shot_data: shot })),
+    duplicates: shots.length - accepted.length
+  }
+}
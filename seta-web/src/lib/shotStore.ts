@@ -0,0 +1,156 @@
+import fs from 'fs/promises'
+import { createHash } from 'crypto'
+
+// Columnar race file (.shots), same layout as ShotStore.py on the uploader side.
+//
+// Header (32 B, little-endian):
+//   magic 'SETASHOT' | u16 version | u16 header size | u16 time width
+//   | u16 reserved | u64 committed shot count | u64 reserved
+// Followed by one block per append:
+//   u32 shot count n | u32 reserved
+//   x f64[n] | y f64[n] | score f64[n] | received f64[n] | id u64[n] | index i32[n]
+//   | time bytes[TIME_WIDTH * n] | padding to 8 B
+// The header count is written after the block, so a torn block is ignored.
+
+const MAGIC = 'SETASHOT'
+const VERSION = 1
+const HEADER_SIZE = 32
+const BLOCK_HEADER_SIZE = 8
+const TIME_WIDTH = 32
+const COUNT_OFFSET = 16
+
+export interface StoredShot {
+  x: number
+  y: number
+  time: string
+  index: number
+  id: string | null
+  score: number | null
+  received: number
+}
+
+const blockSize = (n: number) => {
+  const size = BLOCK_HEADER_SIZE + n * (8 * 5 + 4 + TIME_WIDTH)
+  return size + (-size & 7)
+}
+
+// Shot ids are 16 hex digits (uploader fingerprints), other keys are hashed to fit u64
+export function normalizeShotId(id: string) {
+  if (/^[0-9a-f]{16}$/.test(id)) return id
+  return createHash('sha256').update(id).digest('hex').slice(0, 16)
+}
+
+function checkHeader(header: Buffer, file: string) {
+  if (header.toString('latin1', 0, 8) !== MAGIC || header.readUInt16LE(8) !== VERSION ||
+      header.readUInt16LE(12) !== TIME_WIDTH) {
+    throw new Error(`Invalid race file: ${file}`)
+  }
+  return Number(header.readBigUInt64LE(COUNT_OFFSET))
+}
+
+function decodeBlocks(data: Buffer, count: number) {
+  const shots: StoredShot[] = []
+  let pos = data.readUInt16LE(10)
+  while (shots.length < count) {
+    const n = data.readUInt32LE(pos)
+    const start = pos + BLOCK_HEADER_SIZE
+    const column = (i: number) => start + i * 8 * n
+    const indexStart = column(5)
+    const timeStart = indexStart + 4 * n
+    for (let i = 0; i < n; i++) {
+      const score = data.readDoubleLE(column(2) + 8 * i)
+      const id = data.readBigUInt64LE(column(4) + 8 * i)
+      const time = data.subarray(timeStart + i * TIME_WIDTH, timeStart + (i + 1) * TIME_WIDTH)
+      const end = time.indexOf(0)
+      shots.push({
+        x: data.readDoubleLE(column(0) + 8 * i),
+        y: data.readDoubleLE(column(1) + 8 * i),
+        score: Number.isNaN(score) ? null : score,
+        received: data.readDoubleLE(column(3) + 8 * i),
+        id: id ? id.toString(16).padStart(16, '0') : null,
+        index: data.readInt32LE(indexStart + 4 * i),
+        time: time.toString('utf-8', 0, end === -1 ? TIME_WIDTH : end)
+      })
+    }
+    pos += blockSize(n)
+  }
+  return shots
+}
+
+// Loads a whole race with one sequential read
+export async function readShots(file: string) {
+  let data: Buffer
+  try {
+    data = await fs.readFile(file)
+  } catch {
+    return []
+  }
+  return decodeBlocks(data, checkHeader(data, file))
+}
+
+// End offset and count of committed blocks per file, so appends don't rescan the file
+const fileState = new Map<string, { count: number; end: number }>()
+
+async function committedEnd(fh: fs.FileHandle, file: string, count: number) {
+  const cached = fileState.get(file)
+  if (cached && cached.count === count) return cached.end
+  let end = HEADER_SIZE
+  let seen = 0
+  const blockHeader = Buffer.alloc(BLOCK_HEADER_SIZE)
+  while (seen < count) {
+    await fh.read(blockHeader, 0, BLOCK_HEADER_SIZE, end)
+    const n = blockHeader.readUInt32LE(0)
+    end += blockSize(n)
+    seen += n
+  }
+  return end
+}
+
+// Appends shots as one block; callers must serialize appends to the same file
+export async function appendShots(file: string, shots: Omit<StoredShot, 'received'>[], received = Date.now()) {
+  if (shots.length === 0) return
+  let fh: fs.FileHandle
+  try {
+    fh = await fs.open(file, 'r+')
+  } catch {
+    fh = await fs.open(file, 'w+')
+    const header = Buffer.alloc(HEADER_SIZE)
+    header.write(MAGIC, 0, 'latin1')
+    header.writeUInt16LE(VERSION, 8)
+    header.writeUInt16LE(HEADER_SIZE, 10)
+    header.writeUInt16LE(TIME_WIDTH, 12)
+    await fh.write(header, 0, HEADER_SIZE, 0)
+  }
+  try {
+    const header = Buffer.alloc(HEADER_SIZE)
+    await fh.read(header, 0, HEADER_SIZE, 0)
+    const count = checkHeader(header, file)
+    const end = await committedEnd(fh, file, count)
+
+    const n = shots.length
+    const block = Buffer.alloc(blockSize(n))
+    block.writeUInt32LE(n, 0)
+    const column = (i: number) => BLOCK_HEADER_SIZE + i * 8 * n
+    const indexStart = column(5)
+    const timeStart = indexStart + 4 * n
+    shots.forEach((shot, i) => {
+      block.writeDoubleLE(shot.x, column(0) + 8 * i)
+      block.writeDoubleLE(shot.y, column(1) + 8 * i)
+      block.writeDoubleLE(shot.score ?? NaN, column(2) + 8 * i)
+      block.writeDoubleLE(received, column(3) + 8 * i)
+      block.writeBigUInt64LE(shot.id ? BigInt('0x' + normalizeShotId(shot.id)) : 0n, column(4) + 8 * i)
+      block.writeInt32LE(shot.index ?? 0, indexStart + 4 * i)
+      const time = Buffer.from(String(shot.time ?? ''), 'utf-8').subarray(0, TIME_WIDTH)
+      time.copy(block, timeStart + i * TIME_WIDTH)
+    })
+    await fh.write(block, 0, block.length, end)
+    await fh.truncate(end + block.length)
+
+    const countBuffer = Buffer.alloc(8)
+    countBuffer.writeBigUInt64LE(BigInt(count + n))
+    await fh.write(countBuffer, 0, 8, COUNT_OFFSET)
+    fileState.set(file, { count: count + n, end: end + block.length })
+  } finally {
+    await fh.close()
+  }
+}
@@ -0,0 +1,127 @@
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import unittest
+
+try:
+    from aiohttp.test_utils import TestClient, TestServer
+except ImportError:
+    TestClient = None
+
+from IngestGateway import MAX_NEUSPECHU, IngestGateway, Uzivatele, Zapisovac, hash_hesla
+from ShotCodec import TYP_OBSAHU, zakoduj_davku
+
+
+def davka(user_id='pepa', race_id='zavod_1', pocet=2):
+    return {'user_id': user_id, 'race_id': race_id, 'shots': [
+        {'x': 0.001 * i, 'y': 0.0, 'time': f"09:00:{i:02d}", 'index': i, 'id': f"{i + 1:016x}"}
+        for i in range(pocet)]}
+
+
+@unittest.skipIf(TestClient is None, "brána vyžaduje aiohttp")
+class TestIngestGateway(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.adresar = tempfile.TemporaryDirectory()
+        cesta = os.path.join(self.adresar.name, 'users.json')
+        # Málo iterací PBKDF2, ať test nečeká na ověřování hesel
+        with open(cesta, 'w', encoding='utf-8') as file:
+            json.dump({'pepa': {'heslo': hash_hesla('tajne', iterace=1000)},
+                       'klub': {'heslo': hash_hesla('klubheslo', iterace=1000), 'strelci': ['pepa']}}, file)
+        self.store = os.path.join(self.adresar.name, 'shots')
+        os.makedirs(self.store)
+        self.gateway = IngestGateway(self.store, Uzivatele(cesta), zapisovace=2)
+        self.client = TestClient(TestServer(self.gateway.aplikace(), auto_decompress=False))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.adresar.cleanup()
+
+    async def posli(self, payload, prihlaseni=('pepa', 'tajne'), **kwargs):
+        if prihlaseni:
+            udaje = base64.b64encode(':'.join(prihlaseni).encode('utf-8')).decode('ascii')
+            kwargs['headers'] = dict(kwargs.get('headers', {}), Authorization=f"Basic {udaje}")
+        if isinstance(payload, bytes):
+            kwargs['data'] = payload
+        else:
+            kwargs['json'] = payload
+        response = await self.client.post('/api/shots', **kwargs)
+        return response, await response.json()
+
+    async def test_prijata_davka(self):
+        response, odpoved = await self.posli(davka())
+        self.assertEqual(response.status, 200)
+        self.assertEqual((odpoved['count'], odpoved['duplicates']), (2, 0))
+        # Opakované odeslání stejných ran se zahodí podle id
+        response, odpoved = await self.posli(davka(pocet=3))
+        self.assertEqual((odpoved['count'], odpoved['duplicates']), (1, 2))
+        self.assertTrue(os.path.exists(os.path.join(self.store, 'pepa', 'zavod_1', 'race.shots')))
+
+    async def test_kompaktni_ramec(self):
+        response, odpoved = await self.posli(zakoduj_davku(davka(pocet=40)),
+                                             headers={'Content-Type': TYP_OBSAHU})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(odpoved['count'], 40)
+
+    async def test_bez_prihlaseni(self):
+        for prihlaseni in (None, ('pepa', 'spatne'), ('nikdo', 'tajne')):
+            with self.subTest(prihlaseni=prihlaseni):
+                response, odpoved = await self.posli(davka(), prihlaseni=prihlaseni)
+                self.assertEqual(response.status, 401)
+                self.assertEqual(odpoved['error'], 'Unauthorized')
+                self.assertIn('WWW-Authenticate', response.headers)
+
+    async def test_cizi_strelec(self):
+        response, _ = await self.posli(davka(user_id='klub'))
+        self.assertEqual(response.status, 403)
+        # Klubový účet smí posílat pod povolenými střelci
+        response, _ = await self.posli(davka(), prihlaseni=('klub', 'klubheslo'))
+        self.assertEqual(response.status, 200)
+
+    async def test_opakovane_spatne_heslo_omezi_ucet(self):
+        for _ in range(MAX_NEUSPECHU):
+            response, _ = await self.posli(davka(), prihlaseni=('pepa', 'spatne'))
+            self.assertEqual(response.status, 401)
+        response, odpoved = await self.posli(davka(), prihlaseni=('pepa', 'spatne'))
+        self.assertEqual(response.status, 429)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+        self.assertEqual(odpoved['retry_after'], int(response.headers['Retry-After']))
+        # Během omezení se nepřihlásí ani správné heslo
+        response, _ = await self.posli(davka())
+        self.assertEqual(response.status, 429)
+
+    async def test_neplatne_race_id(self):
+        for race_id in ('..', '../etc', 'a/b', 'x' * 129, ''):
+            with self.subTest(race_id=race_id):
+                response, odpoved = await self.posli(davka(race_id=race_id))
+                self.assertEqual(response.status, 400)
+                self.assertIn(odpoved['error'], ('Invalid user_id or race_id', 'Missing required fields'))
+        self.assertEqual(os.listdir(self.store), [])
+
+    async def test_neplatne_telo(self):
+        response, odpoved = await self.posli(b'{"user_id": ', headers={'Content-Type': 'application/json'})
+        self.assertEqual(response.status, 400)
+        self.assertEqual(odpoved['error'], 'Invalid request body')
+
+
+@unittest.skipIf(TestClient is None, "brána vyžaduje aiohttp")
+class TestPlnaFronta(unittest.IsolatedAsyncioTestCase):
+    async def test_plna_fronta_zapisovace_vrati_429(self):
+        with tempfile.TemporaryDirectory() as adresar:
+            gateway = IngestGateway(adresar, Uzivatele(os.path.join(adresar, 'users.json')))
+            # Zapisovač bez běžící smyčky - první dávka zůstane ve frontě
+            gateway.zapisovace = [Zapisovac(0, adresar, fronta=1)]
+            prvni = asyncio.create_task(gateway.prijmi('pepa', davka()))
+            await asyncio.sleep(0)
+            status, odpoved, hlavicky = await gateway.prijmi('pepa', davka(race_id='zavod_2'))
+            prvni.cancel()
+            gateway._overovani.shutdown()
+        self.assertEqual(status, 429)
+        self.assertGreaterEqual(int(hlavicky['Retry-After']), 1)
+        self.assertEqual(odpoved['retry_after'], int(hlavicky['Retry-After']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import json
+import os
+import random
+import re
+import unittest
+
+import ShotCodec
+from ShotCodec import PrilisVelkeTelo, dekoduj_davku, zakoduj_davku
+from ShotTransport import ShotTransport
+
+SHOT_CODEC_TS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'seta-web', 'src', 'lib', 'shotCodec.ts')
+
+
+def davka(pocet, seed=0):
+    rng = random.Random(seed)
+    return {'user_id': 'Střelec_1', 'race_id': '20240101_120000_abcd1234', 'shots': [{
+        'x': round(rng.gauss(0, 0.002), 6),
+        'y': round(rng.gauss(0, 0.002), 6),
+        'time': f"09:{i // 60:02d}:{i % 60:02d}",
+        'index': i + (3 if i > 5 else 0),  # Přeskočený vadný záznam
+        'id': f"{rng.getrandbits(64):016x}" if i % 4 else None,
+        'score': round(rng.uniform(0, 10.9), 1) if i % 3 else None,
+    } for i in range(pocet)]}
+
+
+class TestShotCodec(unittest.TestCase):
+    def test_zakodovani_a_dekodovani(self):
+        for pocet, komprimovat in ((1, False), (20, False), (500, True)):
+            with self.subTest(pocet=pocet, komprimovat=komprimovat):
+                payload = davka(pocet, seed=pocet)
+                ramec = zakoduj_davku(payload, komprimovat)
+                self.assertEqual(bool(ramec[5] & ShotCodec.GZIP), komprimovat)
+                self.assertEqual(dekoduj_davku(ramec), payload)
+
+    def test_id_mimo_otisk_nelze_zakodovat(self):
+        payload = davka(2)
+        payload['shots'][1]['id'] = 'klic-z-webu'
+        self.assertIsNone(zakoduj_davku(payload))
+
+    def test_stats_se_neposilaji(self):
+        payload = davka(1)
+        payload['shots'][0]['stats'] = {'prumer': 9.5}
+        self.assertNotIn('stats', dekoduj_davku(zakoduj_davku(payload))['shots'][0])
+
+    def test_gzip_bomba_se_odmitne(self):
+        payload = davka(500)
+        ramec = zakoduj_davku(payload)
+        with self.assertRaises(PrilisVelkeTelo):
+            dekoduj_davku(ramec, max_velikost=1024)
+
+    def test_poskozeny_ramec(self):
+        ramec = zakoduj_davku(davka(3), komprimovat=False)
+        for vadny in (b'SETX' + ramec[4:], ramec[:4] + b'\x02' + ramec[5:], ramec[:-5]):
+            with self.subTest(vadny=vadny[:6]):
+                with self.assertRaises((ValueError, IndexError)):
+                    dekoduj_davku(vadny)
+
+    def test_konstanty_odpovidaji_shot_codec_ts(self):
+        with open(SHOT_CODEC_TS, 'r', encoding='utf-8') as file:
+            zdroj = file.read()
+        ts = dict(re.findall(r"^(?:export )?const (\w+) = '?([\w/.+-]+)'?$", zdroj, re.MULTILINE))
+        self.assertEqual(ts['MAGIC'].encode('ascii'), ShotCodec.MAGIC)
+        self.assertEqual(int(ts['VERSION']), ShotCodec.VERZE)
+        self.assertEqual(int(ts['GZIP'], 16), ShotCodec.GZIP)
+        self.assertEqual(float(ts['QUANTUM']), ShotCodec.KVANTUM)
+        self.assertEqual(ts['SHOT_FRAME_TYPE'], ShotCodec.TYP_OBSAHU)
+
+    def test_bajty_ramce_podle_shot_codec_ts(self):
+        payload = {'user_id': 'A', 'race_id': 'r', 'shots': [
+            {'x': 0.000001, 'y': -0.000002, 'time': 't', 'index': 1, 'id': '00000000000000ff', 'score': 10.5},
+            {'x': 0.000001, 'y': 0.0, 'time': '', 'index': 0, 'id': None, 'score': None},
+        ]}
+        self.assertEqual(zakoduj_davku(payload, komprimovat=False), (
+            b'SETB\x01\x00'          # magic, verze, příznaky
+            b'\x01A\x01r\x02'        # user_id, race_id, počet ran
+            b'\x03\x02\x03\x02\x01t'  # příznaky id+score, zigzag dx=1, dy=-2, dindex=1, time
+            b'\x00\x00\x00\x00\x00\x00\x00\xff\x69'  # id big-endian, score 105
+            b'\x00\x00\x04\x01\x00'  # bez id a score, dx=0, dy=+2, dindex=-1, prázdný time
+        ))
+
+
+class Odpoved:
+    def __init__(self, status_code, chyba=None):
+        self.status_code = status_code
+        self.text = json.dumps({'error': chyba} if chyba else {'success': True})
+        self.headers = {}
+
+
+class Uploader:
+    def __init__(self, *kompaktni):
+        self.kompaktni = list(kompaktni)
+        self.json = []
+
+    def odesli_kompaktne(self, ramec):
+        return self.kompaktni.pop(0) if len(self.kompaktni) > 1 else self.kompaktni[0]
+
+    def odesli(self, payload):
+        self.json.append(payload)
+        return Odpoved(200)
+
+
+class TestShotTransport(unittest.TestCase):
+    def test_neznamy_format_prepne_na_json(self):
+        for odpoved in (Odpoved(415, 'Unsupported Media Type'), Odpoved(400, 'Invalid request body')):
+            with self.subTest(status=odpoved.status_code):
+                uploader = Uploader(odpoved)
+                transport = ShotTransport(uploader)
+                self.assertEqual(transport.odesli(davka(3)).status_code, 200)
+                self.assertFalse(transport.kompaktni)
+                self.assertEqual(uploader.json, [davka(3)])
+
+    def test_vadna_davka_kompresi_nevypne(self):
+        for chyba in ('Invalid shot', 'Invalid shot frame', 'Invalid user_id or race_id'):
+            with self.subTest(chyba=chyba):
+                uploader = Uploader(Odpoved(400, chyba))
+                transport = ShotTransport(uploader)
+                self.assertEqual(transport.odesli(davka(3)).status_code, 400)
+                self.assertTrue(transport.kompaktni)
+                self.assertEqual(uploader.json, [])
+
+    def test_overeny_server_zustane_kompaktni(self):
+        uploader = Uploader(Odpoved(200), Odpoved(415, 'Unsupported Media Type'))
+        transport = ShotTransport(uploader)
+        transport.odesli(davka(3))
+        self.assertEqual(transport.odesli(davka(3)).status_code, 415)
+        self.assertTrue(transport.kompaktni)
+        self.assertEqual(uploader.json, [])
+
+    def test_nezakodovatelna_davka_jde_jako_json(self):
+        payload = davka(2)
+        payload['shots'][0]['id'] = 'klic-z-webu'
+        uploader = Uploader(Odpoved(200))
+        transport = ShotTransport(uploader)
+        self.assertEqual(transport.odesli(payload).status_code, 200)
+        self.assertEqual(uploader.json, [payload])
+        self.assertTrue(transport.kompaktni)
+
+
+if __name__ == '__main__':
+    unittest.main()
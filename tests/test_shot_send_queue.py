@@ -0,0 +1,150 @@
+import json
+import os
+import tempfile
+import unittest
+
+from ShotFingerprints import ShotFingerprintStore
+from ShotOutbox import ShotOutbox
+from ShotSendQueue import ShotSendQueue
+
+
+def strely(pocet, zacatek=0):
+    return [{'x': 0.001 * i, 'y': -0.001 * i, 'time': f"09:00:{i:02d}", 'index': i}
+            for i in range(zacatek, zacatek + pocet)]
+
+
+class Odpoved:
+    def __init__(self, status_code, text='{}', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class Uploader:
+    """Vrací připravené odpovědi a pamatuje si odeslané dávky."""
+
+    def __init__(self, *odpovedi):
+        self.odpovedi = list(odpovedi)
+        self.payloady = []
+
+    def odesli(self, payload):
+        self.payloady.append(payload)
+        odpoved = self.odpovedi.pop(0) if len(self.odpovedi) > 1 else self.odpovedi[0]
+        if isinstance(odpoved, Exception):
+            raise odpoved
+        return odpoved
+
+
+class TestShotOutbox(unittest.TestCase):
+    def setUp(self):
+        self.adresar = tempfile.TemporaryDirectory()
+        self.cesta = os.path.join(self.adresar.name, 'outbox.jsonl')
+
+    def tearDown(self):
+        self.adresar.cleanup()
+
+    def test_po_padu_zustanou_jen_nepotvrzene_rany(self):
+        outbox = ShotOutbox(self.cesta)
+        outbox.pridej('A', 'r1', strely(3))
+        outbox.pridej('B', 'r2', strely(2))
+        outbox.potvrd([id_zaznamu for id_zaznamu, _, _ in outbox.cekajici(limit=2)])
+        outbox._fsync()
+        # Pád uprostřed zápisu: bez zavri() a s neúplným posledním řádkem
+        outbox._soubor.write(b'{"op": "add", "id": 99, "user_')
+        outbox._soubor.flush()
+
+        obnoveny = ShotOutbox(self.cesta)
+        try:
+            cekajici = obnoveny.cekajici()
+            self.assertEqual([(klic, strela['index']) for _, klic, strela in cekajici],
+                             [(('A', 'r1'), 2), (('B', 'r2'), 0), (('B', 'r2'), 1)])
+            # Nová id navazují na obnovená, potvrzení se nepletou
+            obnoveny.pridej('A', 'r1', strely(1, zacatek=3))
+            self.assertEqual(len({id_zaznamu for id_zaznamu, _, _ in obnoveny.cekajici()}), 4)
+        finally:
+            obnoveny.zavri()
+            outbox._soubor.close()
+
+    def test_obnova_prepise_journal_jen_cekajicimi(self):
+        outbox = ShotOutbox(self.cesta)
+        outbox.pridej('A', 'r1', strely(5))
+        outbox.potvrd([id_zaznamu for id_zaznamu, _, _ in outbox.cekajici(limit=4)])
+        outbox.zavri()
+
+        ShotOutbox(self.cesta).zavri()
+        with open(self.cesta, 'rb') as file:
+            zaznamy = [json.loads(radek) for radek in file]
+        self.assertEqual([(zaznam['op'], zaznam['shot']['index']) for zaznam in zaznamy], [('add', 4)])
+
+    def test_plne_potvrzeny_journal_se_zkrati(self):
+        outbox = ShotOutbox(self.cesta, max_velikost_journalu=512)
+        try:
+            for zacatek in range(0, 20, 5):
+                outbox.pridej('A', 'r1', strely(5, zacatek))
+            self.assertGreater(os.path.getsize(self.cesta), 512)
+            outbox.potvrd([id_zaznamu for id_zaznamu, _, _ in outbox.cekajici()])
+            self.assertEqual(os.path.getsize(self.cesta), 0)
+        finally:
+            outbox.zavri()
+
+
+class TestShotSendQueue(unittest.TestCase):
+    def setUp(self):
+        self.adresar = tempfile.TemporaryDirectory()
+        self.karantena = os.path.join(self.adresar.name, 'quarantine.jsonl')
+
+    def tearDown(self):
+        self.adresar.cleanup()
+
+    def fronta(self, *odpovedi, **kwargs):
+        self.uploader = Uploader(*odpovedi)
+        return ShotSendQueue(self.uploader, karantena=self.karantena, **kwargs)
+
+    def test_trvale_odmitnuta_davka_jde_do_karanteny(self):
+        fronta = self.fronta(Odpoved(422, '{"error": "Invalid shot"}'), Odpoved(200))
+        fronta.pridej('A', 'spatny', strely(2))
+        fronta.pridej('B', 'dobry', strely(3))
+
+        self.assertTrue(fronta.odesli())
+        self.assertEqual(fronta.outbox.pocet_cekajicich(), 0)
+        self.assertEqual(fronta.odmitnuto, 2)
+        self.assertEqual(fronta.potvrzeno, {('B', 'dobry'): 3})
+        with open(self.karantena, 'r', encoding='utf-8') as file:
+            zaznamy = [json.loads(radek) for radek in file]
+        self.assertEqual(len(zaznamy), 1)
+        self.assertEqual(zaznamy[0]['status'], 422)
+        self.assertEqual(zaznamy[0]['payload']['race_id'], 'spatny')
+        self.assertEqual([strela['index'] for strela in zaznamy[0]['payload']['shots']], [0, 1])
+
+    def test_429_pocka_na_retry_after(self):
+        fronta = self.fronta(Odpoved(429, headers={'Retry-After': '7'}))
+        fronta.pridej('A', 'r1', strely(3))
+
+        self.assertFalse(fronta.odesli())
+        self.assertEqual(fronta.odlozeno, 7.0)
+        self.assertEqual(fronta.outbox.pocet_cekajicich(), 3)
+        self.assertEqual(fronta.odmitnuto, 0)
+        self.assertFalse(os.path.exists(self.karantena))
+
+    def test_chyba_serveru_se_opakuje(self):
+        for odpoved in (Odpoved(500), Odpoved(408), ConnectionError("spojení odmítnuto")):
+            with self.subTest(odpoved=odpoved):
+                fronta = self.fronta(odpoved, Odpoved(200))
+                fronta.pridej('A', 'r1', strely(2))
+                self.assertFalse(fronta.odesli())
+                self.assertEqual(fronta.outbox.pocet_cekajicich(), 2)
+                self.assertTrue(fronta.odesli())
+                self.assertEqual(fronta.potvrzeno, {('A', 'r1'): 2})
+        self.assertFalse(os.path.exists(self.karantena))
+
+    def test_stejna_rana_se_zaradi_jen_jednou(self):
+        otisky = ShotFingerprintStore(os.path.join(self.adresar.name, 'fingerprints.bin'))
+        fronta = self.fronta(Odpoved(200), otisky=otisky)
+        fronta.pridej('A', 'r1', strely(3))
+        fronta.pridej('A', 'r1', strely(4))
+        self.assertEqual([strela['index'] for _, _, strela in fronta.outbox.cekajici()], [0, 1, 2, 3])
+        otisky.zavri()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+from ShotSocketUploader import OdpovedKanalu, ShotSocketUploader
+
+PAYLOAD = {'user_id': 'A', 'race_id': 'r1', 'shots': [{'x': 0.1, 'y': 0.2, 'time': '09:00:00', 'index': 0}]}
+
+
+class Odpoved:
+    status_code = 200
+    text = '{"success": true}'
+    headers = {}
+
+
+class ZalozniHttp:
+    """Náhrada ShotUploader, pamatuje si, co šlo přes HTTP."""
+
+    def __init__(self):
+        self.odeslano = []
+
+    def odesli(self, payload):
+        self.odeslano.append(payload)
+        return Odpoved()
+
+    def odesli_kompaktne(self, ramec):
+        self.odeslano.append(ramec)
+        return Odpoved()
+
+    def metriky(self):
+        return {'pocet_pozadavku': len(self.odeslano), 'pocet_chyb': 0}
+
+    def zavri(self):
+        pass
+
+
+class TestZaloha(unittest.TestCase):
+    def setUp(self):
+        self.http = ZalozniHttp()
+        # Port 9 (discard) nikdo neposlouchá, kanál se nepřipojí
+        self.uploader = ShotSocketUploader('http://127.0.0.1:9/api/shots', zalozni=self.http,
+                                           interval_pripojeni=3600)
+
+    def tearDown(self):
+        self.uploader.zavri()
+
+    def pripojeny_kanal(self, **kwargs):
+        self.uploader._sio = mock.Mock(connected=True, **kwargs)
+        return self.uploader._sio
+
+    def test_bez_spojeni_posila_pres_http(self):
+        with mock.patch.object(self.uploader, '_pripoj_na_pozadi') as pripoj:
+            response = self.uploader.odesli(PAYLOAD)
+            self.uploader.odesli_kompaktne(b'SETB\x01\x00')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.http.odeslano, [PAYLOAD, b'SETB\x01\x00'])
+        # Spojení se zkouší navázat na pozadí, odesílání na něj nečeká
+        self.assertEqual(pripoj.call_count, 2)
+        self.assertFalse(self.uploader.metriky()['kanal_pripojen'])
+
+    def test_nepripojitelny_server_nezdrzi_odeslani(self):
+        response = self.uploader.odesli(PAYLOAD)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.http.odeslano, [PAYLOAD])
+
+    def test_selhani_kanalu_posle_davku_pres_http(self):
+        kanal = self.pripojeny_kanal(call=mock.Mock(side_effect=TimeoutError("ack nedorazil")))
+        response = self.uploader.odesli(PAYLOAD)
+        self.assertEqual(response.status_code, 200)
+        kanal.call.assert_called_once_with('ingestShots', PAYLOAD, timeout=self.uploader.timeout)
+        self.assertEqual(self.http.odeslano, [PAYLOAD])
+        metriky = self.uploader.metriky()
+        self.assertEqual((metriky['kanal_zprav'], metriky['pocet_chyb']), (1, 1))
+
+    def test_potvrzeni_kanalem_nejde_pres_http(self):
+        self.pripojeny_kanal(call=mock.Mock(return_value={'success': True, 'count': 1}))
+        response = self.uploader.odesli(PAYLOAD)
+        self.assertIsInstance(response, OdpovedKanalu)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.http.odeslano, [])
+
+    def test_odmitnuti_kanalem_nese_status_a_retry_after(self):
+        self.pripojeny_kanal(call=mock.Mock(return_value={'error': 'Too many requests', 'retry_after': 3,
+                                                          'status': 429}))
+        response = self.uploader.odesli(PAYLOAD)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers, {'Retry-After': '3'})
+        # Odmítnutí serverem není výpadek kanálu, přes HTTP se neposílá
+        self.assertEqual(self.http.odeslano, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import math
+import os
+import re
+import struct
+import tempfile
+import unittest
+
+import ShotStore
+from ShotStore import BLOK, HLAVICKA, ShotStore as Store, velikost_bloku
+
+SHOT_STORE_TS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'seta-web', 'src', 'lib', 'shotStore.ts')
+
+
+def strely(pocet, zacatek=0):
+    return [{'x': 0.001 * i, 'y': -0.002 * i, 'time': f"09:00:{i:02d}", 'index': i * 2,
+             'id': f"{i + 1:016x}", 'score': 10.0 + i / 10} for i in range(zacatek, zacatek + pocet)]
+
+
+def konstanty_ts():
+    with open(SHOT_STORE_TS, 'r', encoding='utf-8') as file:
+        zdroj = file.read()
+    konstanty = dict(re.findall(r"^const (\w+) = '?([\w]+)'?$", zdroj, re.MULTILINE))
+    konstanty['SLOUPCU_8B'] = re.search(r'n \* \(8 \* (\d+) \+ 4 \+ TIME_WIDTH\)', zdroj).group(1)
+    return konstanty
+
+
+def cti_jako_ts(data):
+    """Čte soubor podle decodeBlocks v shotStore.ts (pozice sloupců počítá stejně jako TS)."""
+    pocet = struct.unpack_from('<Q', data, 16)[0]
+    pozice = struct.unpack_from('<H', data, 10)[0]
+    vysledek = []
+    while len(vysledek) < pocet:
+        n = struct.unpack_from('<I', data, pozice)[0]
+        zacatek = pozice + 8
+
+        def sloupec(i):
+            return zacatek + i * 8 * n
+
+        zacatek_casu = sloupec(5) + 4 * n
+        for i in range(n):
+            score = struct.unpack_from('<d', data, sloupec(2) + 8 * i)[0]
+            id_strely = struct.unpack_from('<Q', data, sloupec(4) + 8 * i)[0]
+            cas = data[zacatek_casu + i * 32:zacatek_casu + (i + 1) * 32]
+            vysledek.append({
+                'x': struct.unpack_from('<d', data, sloupec(0) + 8 * i)[0],
+                'y': struct.unpack_from('<d', data, sloupec(1) + 8 * i)[0],
+                'score': None if math.isnan(score) else score,
+                'id': f"{id_strely:016x}" if id_strely else None,
+                'index': struct.unpack_from('<i', data, sloupec(5) + 4 * i)[0],
+                'time': cas.split(b'\0', 1)[0].decode('utf-8'),
+            })
+        pozice += velikost_bloku(n)
+    return vysledek
+
+
+class TestShotStore(unittest.TestCase):
+    def setUp(self):
+        self.adresar = tempfile.TemporaryDirectory()
+        self.cesta = os.path.join(self.adresar.name, 'race.shots')
+
+    def tearDown(self):
+        self.adresar.cleanup()
+
+    def test_zapis_a_cteni(self):
+        store = Store(self.cesta)
+        store.pripoj(strely(3))
+        store.pripoj([{'x': 0.5, 'y': 0.25, 'time': None, 'index': 7}])
+        store.zavri()
+
+        store = Store(self.cesta, jen_cist=True)
+        try:
+            self.assertEqual(len(store), 4)
+            self.assertEqual(store.strely(), strely(3) + [
+                {'x': 0.5, 'y': 0.25, 'time': '', 'index': 7, 'id': None, 'score': None}])
+        finally:
+            store.zavri()
+
+    def test_nedokonceny_blok_se_zahodi(self):
+        store = Store(self.cesta)
+        store.pripoj(strely(2))
+        store.zavri()
+        # Pád při zápisu bloku: data jsou v souboru, počet v hlavičce ještě ne
+        with open(self.cesta, 'ab') as file:
+            file.write(BLOK.pack(5, 0) + b'\x01' * 40)
+
+        store = Store(self.cesta)
+        try:
+            self.assertEqual(len(store), 2)
+            store.pripoj(strely(1, zacatek=2))
+            self.assertEqual([strela['index'] for strela in store.strely()], [0, 2, 4])
+        finally:
+            store.zavri()
+        self.assertEqual(os.path.getsize(self.cesta), HLAVICKA.size + velikost_bloku(2) + velikost_bloku(1))
+
+    def test_konstanty_odpovidaji_shot_store_ts(self):
+        ts = konstanty_ts()
+        self.assertEqual(ts['MAGIC'].encode('latin1'), ShotStore.MAGIC)
+        self.assertEqual(int(ts['VERSION']), ShotStore.VERZE)
+        self.assertEqual(int(ts['HEADER_SIZE']), HLAVICKA.size)
+        self.assertEqual(int(ts['BLOCK_HEADER_SIZE']), BLOK.size)
+        self.assertEqual(int(ts['TIME_WIDTH']), ShotStore.SIRKA_CASU)
+        self.assertEqual(int(ts['COUNT_OFFSET']), ShotStore.POZICE_POCTU)
+        # x, y, score, prijato a id po 8 B
+        self.assertEqual(int(ts['SLOUPCU_8B']), len(ShotStore.SLOUPCE_F64) + 1)
+
+    def test_rozlozeni_sloupcu_jako_shot_store_ts(self):
+        store = Store(self.cesta)
+        store.pripoj(strely(3))
+        store.pripoj(strely(2, zacatek=3) + [{'x': 1.0, 'y': 2.0, 'time': 'č' * 20, 'index': -1}])
+        store.zavri()
+        with open(self.cesta, 'rb') as file:
+            data = file.read()
+
+        magic, verze, velikost, sirka, _, pocet, _ = HLAVICKA.unpack_from(data)
+        self.assertEqual((magic, verze, velikost, sirka, pocet), (b'SETASHOT', 1, 32, 32, 6))
+        # Čas se ořízne na SIRKA_CASU bajtů (16 dvoubajtových znaků)
+        ocekavane = strely(5) + [{'x': 1.0, 'y': 2.0, 'time': 'č' * 16, 'index': -1, 'id': None,
+                                  'score': None}]
+        self.assertEqual(cti_jako_ts(data), ocekavane)
+
+
+if __name__ == '__main__':
+    unittest.main()
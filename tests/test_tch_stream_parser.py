@@ -0,0 +1,122 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.generuj_tch import HLAVICKA, PATICKA, generuj_zaznamy, sestav_dokument, zaznam
+from TchStreamParser import TchStreamParser
+
+# Záznam s poškozeným koncovým tagem - parser ho musí přeskočit bez ztráty následující rány
+VADNY = ('    <Shot>\n      <x_data>0.5</x_data>\n      <y_data>0.5</y_data>\n'
+         '      <time_stamp>09:02:15</time_stamp>\n    </Shto>\n')
+
+
+def dobre_zaznamy(pocet):
+    return [(zaznam(0.001 * i, -0.001 * i, f"09:{i * 45 // 60:02d}:{i * 45 % 60:02d}"),
+             f"09:{i * 45 // 60:02d}:{i * 45 % 60:02d}") for i in range(pocet)]
+
+
+class TestPoskozenyKoncovyTag(unittest.TestCase):
+    def setUp(self):
+        self.adresar = tempfile.TemporaryDirectory()
+        self.cesta = os.path.join(self.adresar.name, 'Match_1.tch')
+
+    def tearDown(self):
+        self.adresar.cleanup()
+
+    def zapis(self, obsah):
+        with open(self.cesta, 'w', encoding='utf-8') as file:
+            file.write(obsah)
+
+    def test_dobry_zaznam_za_vadnym_se_neztrati(self):
+        # 3 dobré, 1 vadný (</Shto>), 5 dobrých
+        dobre = dobre_zaznamy(9)
+        dobre = dobre[:3] + dobre[4:]
+        self.zapis(HLAVICKA.format(user_name='A') + ''.join(z for z, _ in dobre[:3]) + VADNY
+                   + ''.join(z for z, _ in dobre[3:]) + PATICKA)
+        strely = TchStreamParser(self.cesta).nacti_nove()
+        self.assertEqual([strela['time'] for strela in strely], [cas for _, cas in dobre])
+        self.assertIn('09:03:00', [strela['time'] for strela in strely])
+        self.assertEqual([strela['index'] for strela in strely], [0, 1, 2, 4, 5, 6, 7, 8])
+
+    def test_dobry_zaznam_za_vadnym_pri_pripisovani(self):
+        dobre = dobre_zaznamy(9)
+        dobre = dobre[:3] + dobre[4:]
+        zacatek = HLAVICKA.format(user_name='A') + ''.join(z for z, _ in dobre[:3]) + VADNY
+        parser = TchStreamParser(self.cesta)
+        self.zapis(zacatek + PATICKA)
+        strely = parser.nacti_nove()
+        # SETA připisuje další rány za vadný záznam
+        self.zapis(zacatek + ''.join(z for z, _ in dobre[3:]) + PATICKA)
+        strely += parser.nacti_nove()
+        self.assertEqual([strela['time'] for strela in strely], [cas for _, cas in dobre])
+
+
+
+class TestPrepisSouboru(unittest.TestCase):
+    """SETA soubor přepisuje zkrácením a novým zápisem, parser ho může číst uprostřed."""
+
+    def setUp(self):
+        self.adresar = tempfile.TemporaryDirectory()
+        self.cesta = os.path.join(self.adresar.name, 'Match_1.tch')
+        self.parser = TchStreamParser(self.cesta)
+        self.indexy = []
+
+    def tearDown(self):
+        self.adresar.cleanup()
+
+    def prepis(self, data, *casti):
+        """Zkrátí soubor a zapíše data po částech, po každé části ho parser přečte."""
+        with open(self.cesta, 'wb') as file:
+            self.cti()
+            zacatek = 0
+            for konec in list(casti) + [len(data)]:
+                file.write(data[zacatek:konec])
+                file.flush()
+                zacatek = konec
+                self.cti()
+
+    def cti(self):
+        self.indexy += [strela['index'] for strela in self.parser.nacti_nove()]
+
+    def test_prepis_stejneho_obsahu_nevraci_rany_znovu(self):
+        zaznamy = generuj_zaznamy(6)
+        self.prepis(sestav_dokument(zaznamy[:5]).encode('utf-8'))
+        self.assertEqual(self.indexy, [0, 1, 2, 3, 4])
+        # Stejný obsah plus jedna rána, zapsaný ve dvou částech
+        data = sestav_dokument(zaznamy).encode('utf-8')
+        self.prepis(data, len(data) // 3)
+        self.assertEqual(self.indexy, [0, 1, 2, 3, 4, 5])
+        self.assertIsNotNone(self.parser.checkpoint)
+
+    def test_nahodne_prepisy(self):
+        for seed in range(50):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                zaznamy = generuj_zaznamy(30, seed=seed)
+                self.parser = TchStreamParser(self.cesta)
+                self.indexy = []
+                pocet = 0
+                while pocet < len(zaznamy):
+                    pocet = min(pocet + rng.randint(1, 4), len(zaznamy))
+                    data = sestav_dokument(zaznamy[:pocet]).encode('utf-8')
+                    self.prepis(data, *sorted(rng.randrange(len(data)) for _ in range(rng.randint(0, 3))))
+                self.assertEqual(self.indexy, list(range(len(zaznamy))))
+
+    def test_jiny_obsah_po_zkraceni_cte_znovu(self):
+        self.prepis(sestav_dokument(generuj_zaznamy(5), user_name='A').encode('utf-8'))
+        # Nový zápas ve stejném souboru (jiný střelec) se čte od začátku
+        self.prepis(sestav_dokument(generuj_zaznamy(2, seed=1), user_name='B').encode('utf-8'))
+        self.assertEqual(self.indexy, [0, 1, 2, 3, 4, 0, 1])
+
+    def test_kratsi_zapas_se_stejnou_hlavickou_po_cekani(self):
+        self.prepis(sestav_dokument(generuj_zaznamy(5)).encode('utf-8'))
+        with mock.patch('TchStreamParser.CEKANI_NA_PREPIS', 0.0):
+            # Soubor zůstal kratší než checkpoint - nejde o rozepsaný přepis, ale nový zápas
+            self.prepis(sestav_dokument(generuj_zaznamy(2, seed=1)).encode('utf-8'))
+        self.assertEqual(self.indexy, [0, 1, 2, 3, 4, 0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()